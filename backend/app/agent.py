@@ -1,13 +1,33 @@
-from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.agents import create_openai_tools_agent
 from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from app.tools import ALL_TOOLS
-from app.config import OPENAI_API_KEY
-from typing import Dict, List
+from app.executor import ParallelAgentExecutor
+from app.sessions import create_session_store
+from app.history import build_history, summarize, asummarize
+from app.response_cache import ResponseCache
+from app.vector_store import get_embeddings, get_index_version, get_name_index
+from app.config import OPENAI_API_KEY, SESSION_BACKEND, SESSION_MAX_COUNT, SESSION_MAX_BYTES, SESSION_IDLE_TTL, SESSION_SWEEP_INTERVAL
+from app.config import HISTORY_TOKEN_BUDGET, HISTORY_RECENT_MESSAGES, HISTORY_SUMMARY_TOKENS
+from app.config import RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
 import uuid
 
+# Exchanges (user message + reply) a session holds before older ones are folded into its summary
+HISTORY_WINDOW = 10
+
+# Tools whose answers come from the web or that have side effects; turns that used them are never cached
+UNCACHEABLE_TOOLS = {
+    "web_search_tool",
+    "ingredient_substitution_tool",
+    "cooking_technique_tool",
+    "video_search_tool",
+    "image_search_tool",
+    "record_unknown_question_tool",
+}
+
 AGENT_SYSTEM_PROMPT = """You are a warm, funny, and knowledgeable Mexican mother-in-law sharing your family recipes and cooking wisdom. You speak both English and Spanish naturally, sometimes mixing them as bilingual people do. You have access to the García family recipe collection and can search the web for additional information.
 
 CRITICAL SAFETY RULES - FOLLOW THESE ABSOLUTELY:
@@ -160,6 +180,14 @@ class RecipeAgent:
             openai_api_key=OPENAI_API_KEY
         )
         
+        # Deterministic, short completions for folding old turns into the session summary
+        self.summary_llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0,
+            max_tokens=HISTORY_SUMMARY_TOKENS,
+            openai_api_key=OPENAI_API_KEY
+        )
+        
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", AGENT_SYSTEM_PROMPT),
             MessagesPlaceholder(variable_name="chat_history", optional=True),
@@ -167,50 +195,173 @@ class RecipeAgent:
             MessagesPlaceholder(variable_name="agent_scratchpad"),
         ])
         
-        self.sessions = {}
+        # One stateless executor for every session; history is passed in per call
+        agent = create_openai_tools_agent(
+            llm=self.llm,
+            tools=ALL_TOOLS,
+            prompt=self.prompt
+        )
+        
+        self.executor = ParallelAgentExecutor(
+            agent=agent,
+            tools=ALL_TOOLS,
+            verbose=True,
+            max_iterations=15,
+            handle_parsing_errors=True,
+            return_intermediate_steps=True
+        )
+        
+        # session_id -> the last HISTORY_WINDOW exchanges as messages
+        self.sessions = create_session_store(
+            SESSION_BACKEND,
+            max_messages=2 * HISTORY_WINDOW,
+            max_sessions=SESSION_MAX_COUNT,
+            max_bytes=SESSION_MAX_BYTES,
+            idle_ttl=SESSION_IDLE_TTL
+        )
+        self.sessions.start_sweeper(interval=SESSION_SWEEP_INTERVAL)
+        
+        # session_id -> the summary being folded in the background after a reply
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Answers to first-turn questions, reused across sessions
+        self.response_cache = ResponseCache(
+            embed_query=lambda text: get_embeddings().embed_query(text),
+            index_version=get_index_version,
+            threshold=RESPONSE_CACHE_THRESHOLD,
+            ttl_seconds=RESPONSE_CACHE_TTL,
+            max_entries=RESPONSE_CACHE_SIZE,
+            recipe_words=lambda text: get_name_index().name_words(text)
+        ) if RESPONSE_CACHE_SIZE > 0 else None
+    
+    def _load_history(self, session_id: str):
+        """Return the stored messages and the token-budgeted chat_history built from them"""
+        messages = self.sessions.get(session_id)
+        summary = self.sessions.get_summary(session_id) if messages else None
+        chat_history = build_history(messages, summary, HISTORY_TOKEN_BUDGET, HISTORY_RECENT_MESSAGES)
+        return messages, chat_history
+    
+    def _cached_response(self, user_message: str, stored: List[BaseMessage]) -> Optional[str]:
+        """Cached answer for a first turn; later turns depend on history and are never cached"""
+        if self.response_cache is None or stored:
+            return None
+        try:
+            return self.response_cache.get(user_message)
+        except Exception:
+            return None
     
-    def _get_or_create_session(self, session_id: str):
-        if session_id not in self.sessions:
-            memory = ConversationBufferWindowMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                k=10
-            )
+    def _cache_response(self, user_message: str, stored: List[BaseMessage], response: str, tools_used: List[str]):
+        if self.response_cache is None or stored or not response:
+            return
+        if UNCACHEABLE_TOOLS.intersection(tools_used):
+            return
+        try:
+            self.response_cache.put(user_message, response)
+        except Exception:
+            pass
+    
+    def _append_turn(self, session_id: str, stored: List[BaseMessage], user_message: str, response: str):
+        """Save the exchange; returns the messages to fold into the summary, if the window is full"""
+        turn = [HumanMessage(content=user_message), AIMessage(content=response)]
+        self.sessions.append(session_id, turn)
+        
+        messages = stored + turn
+        if len(messages) < 2 * HISTORY_WINDOW:
+            return None
+        return messages[:-HISTORY_RECENT_MESSAGES]
+    
+    def _save_turn(self, session_id: str, stored: List[BaseMessage], user_message: str, response: str):
+        overflow = self._append_turn(session_id, stored, user_message, response)
+        if overflow:
+            summary = summarize(self.summary_llm, self.sessions.get_summary(session_id), overflow, HISTORY_SUMMARY_TOKENS)
+            self.sessions.set_summary(session_id, summary, keep_last=HISTORY_RECENT_MESSAGES)
+    
+    async def _asave_turn(self, session_id: str, stored: List[BaseMessage], user_message: str, response: str):
+        """Async _save_turn(); the summary is folded in the background so the reply doesn't wait for it.
+        
+        One summary runs per session at a time; overflow that arrives while it
+        runs stays stored and is folded by the next one.
+        """
+        overflow = await asyncio.to_thread(self._append_turn, session_id, stored, user_message, response)
+        if overflow and session_id not in self._summary_tasks:
+            task = asyncio.create_task(self._asummarize_overflow(session_id, overflow))
+            self._summary_tasks[session_id] = task
+            task.add_done_callback(lambda _: self._summary_tasks.pop(session_id, None))
+    
+    async def _asummarize_overflow(self, session_id: str, overflow: List[BaseMessage]):
+        try:
+            previous = await asyncio.to_thread(self.sessions.get_summary, session_id)
+            summary = await asummarize(self.summary_llm, previous, overflow, HISTORY_SUMMARY_TOKENS)
+            await asyncio.to_thread(self.sessions.set_summary, session_id, summary, keep_last=HISTORY_RECENT_MESSAGES)
+        except Exception:
+            pass
+    
+    async def _wait_for_summary(self, session_id: str):
+        """Let a summary still being folded for this session land before its history is loaded"""
+        task = self._summary_tasks.get(session_id)
+        if task is not None:
+            await asyncio.shield(task)
+    
+    def chat(self, user_message: str, session_id: str = None) -> Dict:
+        try:
+            if not session_id:
+                session_id = str(uuid.uuid4())
+            
+            stored, chat_history = self._load_history(session_id)
             
-            agent = create_openai_tools_agent(
-                llm=self.llm,
-                tools=ALL_TOOLS,
-                prompt=self.prompt
-            )
+            cached = self._cached_response(user_message, stored)
+            if cached is not None:
+                self._save_turn(session_id, stored, user_message, cached)
+                return {"response": cached, "tools_used": [], "session_id": session_id, "cached": True}
             
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=ALL_TOOLS,
-                memory=memory,
-                verbose=True,
-                max_iterations=15,
-                handle_parsing_errors=True
-            )
+            result = self.executor.invoke({
+                "input": user_message,
+                "chat_history": chat_history
+            })
+            response = result.get("output", "")
+            tools_used = [action.tool for action, _ in result.get("intermediate_steps", [])]
+            self._save_turn(session_id, stored, user_message, response)
+            self._cache_response(user_message, stored, response, tools_used)
             
-            self.sessions[session_id] = {
-                'memory': memory,
-                'executor': agent_executor
+            return {
+                "response": response,
+                "tools_used": tools_used,
+                "session_id": session_id
             }
         
-        return self.sessions[session_id]
+        except Exception as e:
+            return {
+                "response": "¡Ay no! I ran into a little problem. Can you try asking that again?",
+                "tools_used": [],
+                "error": str(e),
+                "session_id": session_id or str(uuid.uuid4())
+            }
     
-    def chat(self, user_message: str, session_id: str = None) -> Dict:
+    async def achat(self, user_message: str, session_id: str = None) -> Dict:
         try:
             if not session_id:
                 session_id = str(uuid.uuid4())
             
-            session = self._get_or_create_session(session_id)
-            result = session['executor'].invoke({"input": user_message})
+            await self._wait_for_summary(session_id)
+            stored, chat_history = await asyncio.to_thread(self._load_history, session_id)
+            
+            cached = await asyncio.to_thread(self._cached_response, user_message, stored)
+            if cached is not None:
+                await self._asave_turn(session_id, stored, user_message, cached)
+                return {"response": cached, "tools_used": [], "session_id": session_id, "cached": True}
+            
+            result = await self.executor.ainvoke({
+                "input": user_message,
+                "chat_history": chat_history
+            })
             response = result.get("output", "")
+            tools_used = [action.tool for action, _ in result.get("intermediate_steps", [])]
+            await self._asave_turn(session_id, stored, user_message, response)
+            await asyncio.to_thread(self._cache_response, user_message, stored, response, tools_used)
             
             return {
                 "response": response,
-                "tools_used": [],
+                "tools_used": tools_used,
                 "session_id": session_id
             }
         
@@ -222,17 +373,55 @@ class RecipeAgent:
                 "session_id": session_id or str(uuid.uuid4())
             }
     
-    def clear_memory(self, session_id: str):
-        if session_id in self.sessions:
-            self.sessions[session_id]['memory'].clear()
-            return True
-        return False
+    async def astream_chat(self, user_message: str, session_id: str = None) -> AsyncIterator[Dict]:
+        """Run the agent and yield tool_start/tool_end/token events, then a final done event"""
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        try:
+            response = ""
+            tools_used = []
+            await self._wait_for_summary(session_id)
+            stored, chat_history = await asyncio.to_thread(self._load_history, session_id)
+            
+            cached = await asyncio.to_thread(self._cached_response, user_message, stored)
+            if cached is not None:
+                await self._asave_turn(session_id, stored, user_message, cached)
+                yield {"type": "token", "content": cached}
+                yield {"type": "done", "response": cached, "tools_used": [], "session_id": session_id, "cached": True}
+                return
+            
+            inputs = {"input": user_message, "chat_history": chat_history}
+            
+            async for event in self.executor.astream_events(inputs, version="v2"):
+                kind = event["event"]
+                
+                if kind == "on_chat_model_stream":
+                    token = event["data"]["chunk"].content
+                    if token:
+                        yield {"type": "token", "content": token}
+                elif kind == "on_tool_start":
+                    tools_used.append(event["name"])
+                    yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    yield {"type": "tool_end", "tool": event["name"]}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    response = event["data"].get("output", {}).get("output", "")
+            
+            await self._asave_turn(session_id, stored, user_message, response)
+            await asyncio.to_thread(self._cache_response, user_message, stored, response, tools_used)
+            yield {"type": "done", "response": response, "tools_used": tools_used, "session_id": session_id}
+        
+        except Exception as e:
+            yield {
+                "type": "error",
+                "response": "¡Ay no! I ran into a little problem. Can you try asking that again?",
+                "error": str(e),
+                "session_id": session_id
+            }
     
-    def cleanup_old_sessions(self, max_sessions: int = 100):
-        if len(self.sessions) > max_sessions:
-            sessions_to_remove = list(self.sessions.keys())[:-max_sessions]
-            for session_id in sessions_to_remove:
-                del self.sessions[session_id]
+    def clear_memory(self, session_id: str):
+        return self.sessions.clear(session_id)
 
 
 _agent_instance = None
@@ -244,5 +433,11 @@ def get_agent() -> RecipeAgent:
     return _agent_instance
 
 
+def close_agent():
+    """Stop the agent's background work; called on app shutdown"""
+    if _agent_instance is not None:
+        _agent_instance.sessions.close()
+
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
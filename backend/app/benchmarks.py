@@ -0,0 +1,162 @@
+"""
+Latency benchmarks for the recipe retrieval path.
+
+Run with: python -m app.benchmarks
+"""
+
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import faiss
+import numpy as np
+
+from app import vector_store as vs
+from app.index_spec import parse_index_spec, build_faiss_index, index_memory_bytes, reconstruct_vectors
+
+BENCHMARK_QUERIES = ["pozole", "chicken", "fajitas", "soup", "atun"]
+
+
+def _time_calls(fn: Callable[[], object], repeats: int) -> Dict:
+    """Call fn repeatedly and summarize the per-call latency in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    timings.sort()
+    return {
+        "calls": repeats,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def benchmark_store_access(repeats: int = 50) -> Dict:
+    """Compare reloading the store from disk on every call with the shared cached handle"""
+    vs.get_vector_store()
+    return {
+        "load_per_call": _time_calls(vs.load_vector_store, repeats),
+        "shared_handle": _time_calls(vs.get_vector_store, repeats),
+    }
+
+
+def benchmark_search_latency(queries: List[str] = None, repeats: int = 5) -> Dict:
+    """Compare end-to-end search latency with and without the shared store handle"""
+    queries = queries or BENCHMARK_QUERIES
+    
+    def uncached():
+        store = vs.load_vector_store()
+        for query in queries:
+            store.similarity_search_with_score(query, k=3)
+    
+    def cached():
+        for query in queries:
+            vs.search_recipes(query, k=3)
+    
+    return {
+        "load_per_call": _time_calls(uncached, repeats),
+        "shared_handle": _time_calls(cached, repeats),
+    }
+
+
+BENCHMARK_INDEX_SPECS = [
+    "flat",
+    "flat:compression=sq8",
+    "hnsw:M=16,efSearch=32",
+    "hnsw:M=32,efSearch=64",
+    "hnsw:M=32,efSearch=64,compression=sq8",
+    "ivf:nlist=128,nprobe=4",
+    "ivf:nlist=128,nprobe=16",
+    "ivf:nlist=128,nprobe=16,compression=pq16",
+]
+
+
+def _synthetic_corpus(base: np.ndarray, size: int, seed: int = 0) -> np.ndarray:
+    """Grow the real recipe vectors into a larger corpus of noisy neighbours"""
+    rng = np.random.default_rng(seed)
+    picks = base[rng.integers(0, len(base), size)]
+    noise = rng.normal(0, base.std() * 0.5, picks.shape).astype(np.float32)
+    return np.ascontiguousarray(picks + noise, dtype=np.float32)
+
+
+def benchmark_index_specs(
+    specs: List[str] = None,
+    corpus_size: int = 10000,
+    n_queries: int = 200,
+    k: int = 5,
+) -> List[Dict]:
+    """Recall@k against exact Flat search, query latency and memory for each index spec"""
+    store = vs.get_vector_store()
+    base = reconstruct_vectors(store.index, range(store.index.ntotal))
+    corpus = _synthetic_corpus(base, corpus_size)
+    queries = _synthetic_corpus(base, n_queries, seed=1)
+    
+    exact = faiss.IndexFlatL2(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, k)
+    
+    rows = []
+    for spec_text in specs or BENCHMARK_INDEX_SPECS:
+        spec = parse_index_spec(spec_text)
+        start = time.perf_counter()
+        index = build_faiss_index(spec, corpus)
+        build_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for query in queries:
+            _, found = index.search(query.reshape(1, -1), k)
+        per_query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        
+        _, found = index.search(queries, k)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        
+        rows.append({
+            "spec": spec_text,
+            "recall_at_k": float(recall),
+            "query_ms": per_query_ms,
+            "memory_mb": index_memory_bytes(index) / 1e6,
+            "build_s": build_seconds,
+        })
+    
+    return rows
+
+
+def print_index_spec_benchmark(**kwargs):
+    rows = benchmark_index_specs(**kwargs)
+    print(f"\n{'index spec':<42} {'recall@k':>8} {'query ms':>9} {'MB':>8} {'build s':>8}")
+    print("-" * 80)
+    for row in rows:
+        print(
+            f"{row['spec']:<42} {row['recall_at_k']:8.3f} {row['query_ms']:9.3f} "
+            f"{row['memory_mb']:8.2f} {row['build_s']:8.2f}"
+        )
+
+
+def _print_report(title: str, report: Dict):
+    print(f"\n{title}")
+    print("-" * 60)
+    for name, stats in report.items():
+        print(
+            f"{name:<16} mean {stats['mean_ms']:8.2f} ms | "
+            f"p50 {stats['p50_ms']:8.2f} ms | p95 {stats['p95_ms']:8.2f} ms"
+        )
+
+
+def print_search_latency_benchmark():
+    print("=" * 60)
+    print("⏱️  Vector store latency benchmark")
+    print("=" * 60)
+    _print_report("Store access (no embedding calls)", benchmark_store_access())
+    
+    try:
+        _print_report("Search (includes query embedding)", benchmark_search_latency())
+    except Exception as e:
+        print(f"\n⚠️  Skipping search benchmark: {str(e)}")
+
+
+if __name__ == "__main__":
+    print_search_latency_benchmark()
+    print_index_spec_benchmark()
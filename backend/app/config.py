@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # App metadata
 APP_NAME = "SazónBot"
 APP_VERSION = "1.0.0"
@@ -13,6 +15,9 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Serper API Key (for web search)
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
+# Serper endpoint; point at fake_serper.py (e.g. http://127.0.0.1:8765) for local testing
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+
 # Pushover credentials (for notifications)
 PUSHOVER_USER = os.getenv("PUSHOVER_USER")
 PUSHOVER_TOKEN = os.getenv("PUSHOVER_TOKEN")
@@ -27,6 +32,91 @@ VECTOR_STORE_PATH = "data/vector_store"
 # Recipe data path
 RECIPE_DATA_PATH = "data/recipes"
 
+# Embedding provider: "openai" or "hashing" (CPU-local, no network)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "512"))
+
+# Query-embedding cache (set EMBEDDING_CACHE_PATH="" to keep it in memory only)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(BACKEND_DIR, "data", "cache", "embeddings.sqlite3")
+)
+EMBEDDING_CACHE_DISK_SIZE = int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "20000"))
+
+# FAISS index type, e.g. "flat", "hnsw:M=32,efSearch=64", "ivf:nlist=64,nprobe=8,compression=pq16"
+VECTOR_INDEX_SPEC = os.getenv("VECTOR_INDEX_SPEC", "flat")
+
+# Serve queries from the memory-mapped, read-only index files when they exist
+INDEX_MMAP = os.getenv("INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+
+# Index build: PDF extraction processes and pages per task
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Index build: embedding batch size, worker pool and resumable checkpoints
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "4"))
+EMBED_CHECKPOINT_DIR = os.getenv(
+    "EMBED_CHECKPOINT_DIR",
+    os.path.join(BACKEND_DIR, "data", "cache", "embedding_checkpoints")
+)
+
+# Agent: tool calls of one step run concurrently and share this deadline (seconds)
+TOOL_STEP_TIMEOUT = float(os.getenv("TOOL_STEP_TIMEOUT", "15"))
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+
+# Chat sessions: "memory://" (single worker), "sqlite:///data/sessions.sqlite3" or
+# "redis://[:password@]host:6379/0" to share history across workers and replicas
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory://")
+
+# Chat sessions: bounded by count and bytes (memory only), dropped after an idle TTL (seconds)
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+# Prompt history: token budget, messages kept verbatim, and size of the rolling summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "4"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "250"))
+
+# First-turn response cache: cosine threshold for a semantic match, TTL (seconds), max entries (0 disables)
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+
+# Serper result cache: max entries and TTL (seconds) per kind of lookup; a TTL of 0 disables caching
+SERPER_CACHE_SIZE = int(os.getenv("SERPER_CACHE_SIZE", "512"))
+SERPER_TTL_WEB = float(os.getenv("SERPER_TTL_WEB", str(6 * 3600)))
+SERPER_TTL_REFERENCE = float(os.getenv("SERPER_TTL_REFERENCE", str(7 * 24 * 3600)))
+SERPER_TTL_MEDIA = float(os.getenv("SERPER_TTL_MEDIA", str(24 * 3600)))
+
+# Outbound HTTP (Serper, Pushover): pooled connections per upstream host, keep-alive expiry (seconds)
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Outbound HTTP retries: max per call, backoff base (seconds), extra traffic retries may add per upstream
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+HTTP_RETRY_BUDGET_RATIO = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.2"))
+
+# Circuit breaker per upstream: consecutive failures that open it, seconds before a trial call
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET = float(os.getenv("HTTP_BREAKER_RESET", "30"))
+
+# Unknown-question reports: SQLite queue, seconds between Pushover digests, questions per digest,
+# retry backoff cap (seconds), and how long a reported question stays deduplicated (seconds)
+UNKNOWN_QUESTIONS_PATH = os.getenv(
+    "UNKNOWN_QUESTIONS_PATH",
+    os.path.join(BACKEND_DIR, "data", "unknown_questions.sqlite3")
+)
+NOTIFY_INTERVAL = float(os.getenv("NOTIFY_INTERVAL", "60"))
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "20"))
+NOTIFY_MAX_BACKOFF = float(os.getenv("NOTIFY_MAX_BACKOFF", "3600"))
+NOTIFY_DEDUPE_WINDOW = float(os.getenv("NOTIFY_DEDUPE_WINDOW", str(24 * 3600)))
+
 # print("✅ Configuration loaded")
 # print(f"   - OpenAI API Key: {'Set' if OPENAI_API_KEY else 'Missing'}")
 # print(f"   - Serper API Key: {'Set' if SERPER_API_KEY else 'Missing'}")
@@ -0,0 +1,231 @@
+"""
+Read-only, memory-mapped columnar docstore for the recipe vector store.
+
+Replaces the pickled InMemoryDocstore at query time. Instead of one
+Python Document per chunk:
+
+- chunk text lives in one contiguous UTF-8 buffer (docstore/text.bin)
+  addressed by an offsets array
+- recipe names, recipe types and recipe hashes are interned into small
+  string tables and stored as integer codes
+- numeric and boolean metadata are NumPy columns (docstore/<column>.npy)
+
+Every file is opened with mmap, so uvicorn workers share the same pages
+through the OS page cache, and metadata filters are vectorized NumPy masks.
+Documents are only materialized when search() is called.
+
+Mapped files are never rewritten. Each build goes into a new
+docstore.<version>/ directory, and the docstore.current pointer file is
+swapped to it with os.replace. The previous version is kept for readers
+that are still opening it, and older ones are deleted (unlinking a mapped
+file is safe; truncating it is not).
+"""
+
+import json
+import mmap
+import os
+import shutil
+import time
+from typing import Dict, List, Union
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import Docstore
+
+DOCSTORE_DIR = "docstore"
+POINTER_FILE = "docstore.current"
+TEXT_FILE = "text.bin"
+META_FILE = "docstore.json"
+
+# Docstore versions kept on disk: the current one and the one before it
+KEEP_VERSIONS = 2
+
+# Interned string columns: metadata key -> string table name in docstore.json
+STRING_COLUMNS = {
+    "recipe_name": "names",
+    "recipe_type": "types",
+    "recipe_hash": "hashes",
+}
+
+# Numeric columns: metadata key -> dtype. -1 marks a missing value.
+NUMERIC_COLUMNS = {
+    "servings": np.int32,
+    "page": np.int32,
+    "chunk_index": np.int32,
+    "total_chunks": np.int32,
+}
+
+BOOL_COLUMNS = ("has_ingredients", "has_instructions")
+
+# Keys always present on recipe chunks, even when their value is None
+ALWAYS_PRESENT = {"recipe_name", "servings", "recipe_type", "has_ingredients",
+                  "has_instructions", "chunk_index", "total_chunks"}
+
+MISSING = -1
+
+
+def docstore_directory(path: str) -> str:
+    """Directory of the current docstore version (the pre-versioning docstore/ if there is no pointer)"""
+    pointer = os.path.join(path, POINTER_FILE)
+    if os.path.exists(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    return os.path.join(path, DOCSTORE_DIR)
+
+
+def _remove_old_versions(path: str, current: str):
+    versions = sorted(
+        (name for name in os.listdir(path)
+         if name == DOCSTORE_DIR or (name.startswith(f"{DOCSTORE_DIR}.") and name != POINTER_FILE
+                                     and not name.endswith(".tmp"))),
+        key=lambda name: os.path.getmtime(os.path.join(path, name)),
+        reverse=True,
+    )
+    keep = {current, *versions[:KEEP_VERSIONS]}
+    for name in versions:
+        if name not in keep:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def write_columnar_docstore(vector_store, path: str, index_digest: str):
+    """Write the docstore of a FAISS store, in index-position order, as a new version and switch to it"""
+    version = f"{DOCSTORE_DIR}.{time.time_ns()}"
+    directory = os.path.join(path, f"{version}.tmp")
+    os.makedirs(directory)
+
+    ids = [vector_store.index_to_docstore_id[p] for p in sorted(vector_store.index_to_docstore_id)]
+    tables = {table: {} for table in STRING_COLUMNS.values()}
+    columns = {key: [] for key in list(STRING_COLUMNS) + list(NUMERIC_COLUMNS) + list(BOOL_COLUMNS)}
+    extra = {}
+    offsets = [0]
+
+    with open(os.path.join(directory, TEXT_FILE), "wb") as f:
+        for row, doc_id in enumerate(ids):
+            doc = vector_store.docstore.search(doc_id)
+            encoded = doc.page_content.encode("utf-8")
+            f.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+
+            metadata = dict(doc.metadata)
+            for key, table in STRING_COLUMNS.items():
+                value = metadata.pop(key, None)
+                columns[key].append(MISSING if value is None else tables[table].setdefault(value, len(tables[table])))
+            for key in NUMERIC_COLUMNS:
+                value = metadata.pop(key, None)
+                columns[key].append(MISSING if value is None else value)
+            for key in BOOL_COLUMNS:
+                columns[key].append(bool(metadata.pop(key, False)))
+
+            if metadata:
+                extra[str(row)] = metadata
+
+    np.save(os.path.join(directory, "text_offsets.npy"), np.array(offsets, dtype=np.int64))
+    for key in STRING_COLUMNS:
+        np.save(os.path.join(directory, f"{key}.npy"), np.array(columns[key], dtype=np.int32))
+    for key, dtype in NUMERIC_COLUMNS.items():
+        np.save(os.path.join(directory, f"{key}.npy"), np.array(columns[key], dtype=dtype))
+    for key in BOOL_COLUMNS:
+        np.save(os.path.join(directory, f"{key}.npy"), np.array(columns[key], dtype=np.bool_))
+
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "index_digest": index_digest,
+            "ids": ids,
+            **{table: list(values) for table, values in tables.items()},
+            "extra": extra,
+        }, f, ensure_ascii=False)
+
+    os.rename(directory, os.path.join(path, version))
+    pointer = os.path.join(path, POINTER_FILE)
+    with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(f"{pointer}.tmp", pointer)
+    _remove_old_versions(path, version)
+
+
+class ColumnarDocstore(Docstore):
+    """Docstore backed by memory-mapped text and metadata columns"""
+
+    def __init__(self, path: str):
+        directory = docstore_directory(path)
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.index_digest = meta.get("index_digest")
+        self.ids: List[str] = meta["ids"]
+        self.tables: Dict[str, List[str]] = {table: meta[table] for table in STRING_COLUMNS.values()}
+        self._extra: Dict[str, Dict] = meta.get("extra", {})
+        self._positions: Dict[str, int] = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+        self._offsets = np.load(os.path.join(directory, "text_offsets.npy"), mmap_mode="r")
+        self.columns: Dict[str, np.ndarray] = {
+            key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r")
+            for key in list(STRING_COLUMNS) + list(NUMERIC_COLUMNS) + list(BOOL_COLUMNS)
+        }
+
+        with open(os.path.join(directory, TEXT_FILE), "rb") as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index_to_docstore_id(self) -> Dict[int, str]:
+        return dict(enumerate(self.ids))
+
+    def text(self, position: int) -> str:
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return self._text[start:end].decode("utf-8")
+
+    def metadata(self, position: int) -> Dict:
+        metadata = {}
+        for key, table in STRING_COLUMNS.items():
+            code = int(self.columns[key][position])
+            if code != MISSING:
+                metadata[key] = self.tables[table][code]
+            elif key in ALWAYS_PRESENT:
+                metadata[key] = None
+        for key in NUMERIC_COLUMNS:
+            value = int(self.columns[key][position])
+            if value != MISSING:
+                metadata[key] = value
+            elif key in ALWAYS_PRESENT:
+                metadata[key] = None
+        for key in BOOL_COLUMNS:
+            metadata[key] = bool(self.columns[key][position])
+
+        metadata.update(self._extra.get(str(position), {}))
+        return metadata
+
+    def mask(self, **criteria) -> np.ndarray:
+        """Boolean row mask for equality criteria, e.g. mask(recipe_type="soup", has_ingredients=True)"""
+        result = np.ones(len(self.ids), dtype=np.bool_)
+        for key, value in criteria.items():
+            if key in STRING_COLUMNS:
+                table = self.tables[STRING_COLUMNS[key]]
+                if value not in table:
+                    return np.zeros(len(self.ids), dtype=np.bool_)
+                result &= self.columns[key] == table.index(value)
+            elif key in NUMERIC_COLUMNS:
+                result &= self.columns[key] == (MISSING if value is None else value)
+            elif key in BOOL_COLUMNS:
+                result &= self.columns[key] == bool(value)
+            else:
+                raise KeyError(f"Cannot filter on metadata key '{key}'")
+        return result
+
+    def search(self, search: str) -> Union[str, Document]:
+        position = self._positions.get(search)
+        if position is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=self.text(position), metadata=self.metadata(position))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        raise NotImplementedError("ColumnarDocstore is read-only; rebuild or update the index instead")
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("ColumnarDocstore is read-only; rebuild or update the index instead")
+
+
+def columnar_docstore_exists(path: str) -> bool:
+    return os.path.exists(os.path.join(docstore_directory(path), META_FILE))
@@ -0,0 +1,215 @@
+"""
+Query-embedding cache for the recipe vector store.
+
+Wraps any LangChain Embeddings object and memoizes embed_query results by
+(model, normalized text) in a bounded LRU with optional TTL, backed by an
+optional SQLite spill file that survives restarts. The spill file is
+pruned of expired rows and trimmed to max_disk_entries as it is written.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query for cache lookups (unicode form, case and whitespace)"""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.casefold().split())
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query vectors in memory and, optionally, on disk"""
+    
+    # Prune the spill file after this many writes
+    PRUNE_EVERY = 100
+    
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        persist_path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+    ):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self.persist_path = persist_path or None
+        self.max_disk_entries = max_disk_entries or 10 * max_entries
+        
+        # _lock guards the in-memory LRU only; SQLite I/O happens under _db_lock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "pruned": 0}
+        self._writes = 0
+        self._db = None
+        
+        if self.persist_path:
+            self._db = self._open_db(self.persist_path)
+            self._prune()
+    
+    @staticmethod
+    def _open_db(path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " model TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created REAL NOT NULL,"
+            " PRIMARY KEY (model, text))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_created ON query_embeddings (model, created)")
+        db.commit()
+        return db
+    
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+    
+    def _get_memory(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return vector
+                del self._entries[key]
+            if self._db is None:
+                self._stats["misses"] += 1
+            return None
+    
+    def _get_disk(self, key: str) -> Optional[List[float]]:
+        """Look up the spill file (only called after a memory miss with a spill file configured)"""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT vector, created FROM query_embeddings WHERE model = ? AND text = ?",
+                (self.model_name, key),
+            ).fetchone()
+        
+        with self._lock:
+            if row and not self._expired(row[1]):
+                vector = array("f", row[0]).tolist()
+                self._remember(key, vector, row[1])
+                self._stats["disk_hits"] += 1
+                return vector
+            self._stats["misses"] += 1
+            return None
+    
+    def _get(self, key: str) -> Optional[List[float]]:
+        vector = self._get_memory(key)
+        if vector is None and self._db is not None:
+            vector = self._get_disk(key)
+        return vector
+    
+    def _remember(self, key: str, vector: List[float], created: float):
+        """Insert into the in-memory LRU. Caller must hold _lock"""
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+    
+    def _put_memory(self, key: str, vector: List[float], created: float):
+        with self._lock:
+            self._remember(key, vector, created)
+    
+    def _put_disk(self, key: str, vector: List[float], created: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, text, vector, created) VALUES (?, ?, ?, ?)",
+                (self.model_name, key, array("f", vector).tobytes(), created),
+            )
+            self._db.commit()
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune()
+    
+    def _put(self, key: str, vector: List[float]):
+        created = time.time()
+        self._put_memory(key, vector, created)
+        if self._db is not None:
+            self._put_disk(key, vector, created)
+    
+    def _prune(self):
+        """Drop expired rows, then the oldest rows beyond max_disk_entries"""
+        with self._db_lock:
+            pruned = 0
+            if self.ttl_seconds is not None:
+                pruned += self._db.execute(
+                    "DELETE FROM query_embeddings WHERE model = ? AND created < ?",
+                    (self.model_name, time.time() - self.ttl_seconds),
+                ).rowcount
+            pruned += self._db.execute(
+                "DELETE FROM query_embeddings WHERE model = ? AND text IN ("
+                " SELECT text FROM query_embeddings WHERE model = ?"
+                " ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.model_name, self.model_name, self.max_disk_entries),
+            ).rowcount
+            self._db.commit()
+        with self._lock:
+            self._stats["pruned"] += pruned
+    
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._put(key, vector)
+        return vector
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._get_memory(key)
+        if vector is None and self._db is not None:
+            vector = await asyncio.to_thread(self._get_disk, key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            created = time.time()
+            self._put_memory(key, vector, created)
+            if self._db is not None:
+                await asyncio.to_thread(self._put_disk, key, vector, created)
+        return vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Index builds embed each chunk once, so documents bypass the cache
+        return self.underlying.embed_documents(texts)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying.aembed_documents(texts)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM query_embeddings WHERE model = ?", (self.model_name,))
+                self._db.commit()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hit_rate = (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(hit_rate, 4),
+                "persistent": self._db is not None,
+            }
@@ -0,0 +1,74 @@
+"""
+Embedding providers for the recipe vector store.
+
+EMBEDDING_BACKEND selects the provider:
+- "openai":  OpenAI embeddings over the network (default)
+- "hashing": CPU-local hashed word + character n-gram vectors, no network
+
+Every provider has a backend id that is recorded in the index metadata,
+so an index is never queried with vectors from a different model.
+"""
+
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.config import EMBEDDING_BACKEND, HASHING_EMBEDDING_DIM
+from app.utils.name_index import normalize_name
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Signed feature hashing of words and character n-grams into a fixed-size,
+    L2-normalized vector. Deterministic across processes, needs no model
+    download, and embeds a query in well under a millisecond.
+    """
+    
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.model_name = f"hashing:v1:{dim}"
+    
+    def _features(self, text: str):
+        low, high = self.ngram_range
+        for word in normalize_name(text).split():
+            yield word, 1.0
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n], 0.5
+    
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def create_embeddings(backend: str = EMBEDDING_BACKEND) -> Tuple[Embeddings, str]:
+    """Build the configured embeddings provider; returns (embeddings, backend id)"""
+    backend = (backend or "openai").lower()
+    
+    if backend == "openai":
+        embeddings = OpenAIEmbeddings()
+        return embeddings, f"openai:{embeddings.model}"
+    
+    if backend == "hashing":
+        embeddings = HashingEmbeddings()
+        return embeddings, embeddings.model_name
+    
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Use 'openai' or 'hashing'.")
@@ -0,0 +1,88 @@
+"""
+AgentExecutor that runs the tool calls of one agent step concurrently.
+
+OpenAI tools agents often return several tool calls in one step (e.g. a
+recipe search, an image search and a video search). The stock executor
+runs them one after another on the sync path. Here all calls of a step
+share a deadline (TOOL_STEP_TIMEOUT), so wall time is the slowest call.
+A call that misses the deadline gets an observation saying so, and the
+agent carries on with whatever did finish.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import wait
+from typing import Dict, List
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from app.config import TOOL_STEP_TIMEOUT, TOOL_MAX_WORKERS
+
+# Tool threads outlive a timed-out step, so they get their own pool
+_tool_pool = ContextThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="agent-tool")
+
+# Actions of the step being executed on this thread, and their results
+_step_state = threading.local()
+
+
+def _timeout_observation(action: AgentAction, timeout: float) -> str:
+    return f"{action.tool} did not finish within {timeout:g}s and was skipped. Answer with the other results, or try again later."
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    step_timeout: float = TOOL_STEP_TIMEOUT
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        # The parent yields every AgentAction of the step before it performs any of them,
+        # so by the first _perform_agent_action call the whole batch is known
+        _step_state.actions = []
+        _step_state.results = {}
+        try:
+            for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager):
+                if isinstance(item, AgentAction):
+                    _step_state.actions.append(item)
+                yield item
+        finally:
+            _step_state.actions = []
+            _step_state.results = {}
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        actions: List[AgentAction] = getattr(_step_state, "actions", [])
+        results: Dict[int, AgentStep] = getattr(_step_state, "results", {})
+
+        if id(agent_action) not in results:
+            batch = actions if any(a is agent_action for a in actions) else [agent_action]
+            results.update(self._perform_batch(name_to_tool_map, color_mapping, batch, run_manager))
+
+        return results.pop(id(agent_action))
+
+    def _perform_batch(self, name_to_tool_map, color_mapping, actions: List[AgentAction], run_manager=None) -> Dict[int, AgentStep]:
+        """Run a step's tool calls on the tool pool and wait for them up to the step deadline"""
+        perform = super()._perform_agent_action
+        futures = {
+            id(action): _tool_pool.submit(perform, name_to_tool_map, color_mapping, action, run_manager)
+            for action in actions
+        }
+        wait(futures.values(), timeout=self.step_timeout)
+
+        results = {}
+        for action in actions:
+            future = futures[id(action)]
+            if future.done():
+                results[id(action)] = future.result()
+            else:
+                results[id(action)] = AgentStep(action=action, observation=_timeout_observation(action, self.step_timeout))
+        return results
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        # The parent already gathers a step's calls concurrently; all start together,
+        # so a per-call timeout is the step deadline
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                timeout=self.step_timeout
+            )
+        except asyncio.TimeoutError:
+            return AgentStep(action=agent_action, observation=_timeout_observation(agent_action, self.step_timeout))
@@ -0,0 +1,197 @@
+"""
+Token-budgeted chat history for the agent prompt.
+
+The prompt gets, in order:
+
+- a rolling summary of turns that have left the session window
+- older turns, compacted: replies that carried whole recipes, web results,
+  images or videos become a short sentence plus references
+  ("[shared: recipes: Pozole Blanco; videos: 2dNMtB7dT24; 3 images]")
+- the most recent turns, verbatim
+
+The whole thing is trimmed to HISTORY_TOKEN_BUDGET, measured with tiktoken
+(or about 4 characters per token when the encoding is unavailable).
+Summaries are updated incrementally: when a session's window fills up,
+the oldest turns are folded into the existing summary by one LLM call.
+"""
+
+import re
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+TOKEN_MODEL = "gpt-4o-mini"
+
+# Per-message framing tokens in the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Older messages longer than this are compacted
+COMPACT_MESSAGE_TOKENS = 80
+
+VIDEO_PATTERN = re.compile(r"VIDEO:([\w-]{11})")
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]+\)")
+RECIPE_TITLE_PATTERN = re.compile(r"^\s*(?:\d+\.\s*)?\*\*([^*\n]{3,80})\*\*", re.MULTILINE)
+
+SUMMARY_PROMPT = """Update the running summary of a cooking chat between a user and SazónBot, a Mexican recipe assistant.
+Keep what matters for later turns: dishes and recipe names discussed, the user's preferences, allergies, servings and language, and open questions.
+Refer to recipes by name instead of repeating ingredients or steps. Write at most {max_words} words, in the language of the conversation.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+Updated summary:"""
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model(TOKEN_MODEL)
+        except Exception:
+            # No tiktoken or no cached encoding (offline); fall back to a character estimate
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return count_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def history_tokens(messages: List[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4].rstrip() + "…"
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]).rstrip() + "…"
+
+
+def message_references(text: str) -> str:
+    """Compact references to the recipes, videos and images a message carried"""
+    refs = []
+
+    recipes = list(dict.fromkeys(name.strip() for name in RECIPE_TITLE_PATTERN.findall(text)))
+    if recipes:
+        refs.append("recipes: " + ", ".join(recipes[:5]))
+
+    videos = list(dict.fromkeys(VIDEO_PATTERN.findall(text)))
+    if videos:
+        refs.append("videos: " + ", ".join(videos))
+
+    images = len(IMAGE_PATTERN.findall(text))
+    if images:
+        refs.append(f"{images} image{'s' if images > 1 else ''}")
+
+    return f"[shared: {'; '.join(refs)}]" if refs else ""
+
+
+def compact_message(message: BaseMessage, max_tokens: int = COMPACT_MESSAGE_TOKENS) -> BaseMessage:
+    """Shrink a long or media-heavy message to its opening text plus references"""
+    text = str(message.content)
+    refs = message_references(text) if isinstance(message, AIMessage) else ""
+
+    if not refs and count_tokens(text) <= max_tokens:
+        return message
+
+    # Keep the prose before the first recipe, media or list block
+    prose = IMAGE_PATTERN.sub("", VIDEO_PATTERN.sub("", text))
+    prose = re.split(r"\n\s*(?:\*\*|\d+\.|[-•]\s)", prose, maxsplit=1)[0]
+    prose = " ".join(prose.replace("- ", " ").split())
+    compacted = truncate_tokens(prose, max_tokens)
+    if refs:
+        compacted = f"{compacted} {refs}".strip()
+
+    return type(message)(content=compacted)
+
+
+def build_history(
+    messages: List[BaseMessage],
+    summary: Optional[str],
+    token_budget: int,
+    recent_messages: int,
+) -> List[BaseMessage]:
+    """Assemble summary + compacted older turns + verbatim recent turns within token_budget"""
+    recent = list(messages[-recent_messages:]) if recent_messages else []
+    older = [compact_message(m) for m in messages[:len(messages) - len(recent)]]
+    head = [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] if summary else []
+
+    total = history_tokens(head) + history_tokens(older) + history_tokens(recent)
+
+    # Over budget: drop compacted older turns first, then compact and drop recent ones
+    while total > token_budget and older:
+        total -= message_tokens(older.pop(0))
+
+    for i, message in enumerate(recent):
+        if total <= token_budget:
+            break
+        compacted = compact_message(message)
+        total += message_tokens(compacted) - message_tokens(message)
+        recent[i] = compacted
+
+    while total > token_budget and len(recent) > 1:
+        total -= message_tokens(recent.pop(0))
+
+    if total > token_budget and head:
+        head = []
+
+    return head + older + recent
+
+
+def _summary_prompt(summary: Optional[str], messages: List[BaseMessage], max_tokens: int) -> str:
+    lines = []
+    for message in messages:
+        speaker = "User" if isinstance(message, HumanMessage) else "SazónBot"
+        lines.append(f"{speaker}: {compact_message(message).content}")
+
+    return SUMMARY_PROMPT.format(
+        max_words=max(20, int(max_tokens * 0.75)),
+        summary=summary or "(none yet)",
+        lines="\n".join(lines),
+    )
+
+
+def _fallback_summary(summary: Optional[str], messages: List[BaseMessage], max_tokens: int) -> str:
+    """Summary without the LLM: previous summary plus compacted lines, cut to max_tokens from the end"""
+    parts = [summary] if summary else []
+    parts += [str(compact_message(m, max_tokens=30).content) for m in messages]
+    text = " | ".join(parts)
+    while count_tokens(text) > max_tokens and " | " in text:
+        text = text.split(" | ", 1)[1]
+    return truncate_tokens(text, max_tokens)
+
+
+def summarize(llm, summary: Optional[str], messages: List[BaseMessage], max_tokens: int) -> str:
+    """Fold messages into the running summary"""
+    try:
+        result = llm.invoke(_summary_prompt(summary, messages, max_tokens))
+        return truncate_tokens(str(result.content).strip(), max_tokens)
+    except Exception:
+        return _fallback_summary(summary, messages, max_tokens)
+
+
+async def asummarize(llm, summary: Optional[str], messages: List[BaseMessage], max_tokens: int) -> str:
+    try:
+        result = await llm.ainvoke(_summary_prompt(summary, messages, max_tokens))
+        return truncate_tokens(str(result.content).strip(), max_tokens)
+    except Exception:
+        return _fallback_summary(summary, messages, max_tokens)
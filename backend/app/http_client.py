@@ -0,0 +1,313 @@
+"""
+Shared outbound HTTP for tool calls (Serper, Pushover).
+
+One requests.Session and one httpx.AsyncClient per process keep connections
+alive across chats, with at most HTTP_POOL_PER_HOST connections per upstream
+host. They are created lazily on first use and closed on app shutdown.
+
+request() and arequest() wrap them with, per upstream host:
+
+- a circuit breaker: after HTTP_BREAKER_FAILURES consecutive failures
+  (connection errors, timeouts, 429 and 5xx) calls fail fast with
+  CircuitOpenError for HTTP_BREAKER_RESET seconds, then one trial call
+  decides whether it closes again
+- retries with full-jitter exponential backoff, only for failures that are
+  cheap to retry (connection errors, 429, 502, 503, 504; not read timeouts),
+  drawn from a retry budget so retries add at most HTTP_RETRY_BUDGET_RATIO
+  of extra traffic to a struggling upstream
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    HTTP_POOL_PER_HOST,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_BUDGET_RATIO,
+    HTTP_BREAKER_FAILURES,
+    HTTP_BREAKER_RESET,
+)
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+# Statuses that mean "upstream is unhealthy" and are worth another attempt
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Longest single backoff sleep (seconds)
+MAX_BACKOFF = 2.0
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_host_limits: Dict[str, asyncio.Semaphore] = {}
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """End a trial call that neither succeeded nor failed (e.g. cancelled)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """Token bucket: each call deposits `ratio` tokens, each retry spends one"""
+
+    def __init__(self, ratio: float, min_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.tokens = min_tokens
+        self.max_tokens = max(min_tokens, 100 * ratio)
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                self.exhausted += 1
+                return False
+            self.tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"retries": self.retries, "budget_exhausted": self.exhausted, "tokens": round(self.tokens, 2)}
+
+
+_upstreams: Dict[str, tuple] = {}
+_upstreams_lock = threading.Lock()
+
+
+def _upstream(url: str):
+    """(CircuitBreaker, RetryBudget) for the url's host"""
+    host = urlsplit(url).netloc
+    with _upstreams_lock:
+        if host not in _upstreams:
+            _upstreams[host] = (
+                CircuitBreaker(HTTP_BREAKER_FAILURES, HTTP_BREAKER_RESET),
+                RetryBudget(HTTP_RETRY_BUDGET_RATIO),
+            )
+        return host, _upstreams[host]
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(MAX_BACKOFF, HTTP_RETRY_BACKOFF * 2 ** attempt))
+
+
+def _can_retry(attempt: int, budget: RetryBudget) -> bool:
+    return attempt < HTTP_MAX_RETRIES and budget.withdraw()
+
+
+def _is_failure(status_code: int) -> bool:
+    return status_code in RETRY_STATUSES or status_code >= 500
+
+
+def get_http_stats() -> Dict:
+    with _upstreams_lock:
+        upstreams = dict(_upstreams)
+    return {host: {**breaker.stats(), **budget.stats()} for host, (breaker, budget) in upstreams.items()}
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide requests.Session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_PER_HOST, pool_block=True, max_retries=0)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide httpx.AsyncClient, creating it on first use"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_keepalive_connections=HTTP_POOL_PER_HOST,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _async_host_limits.clear()
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared client; called from the FastAPI shutdown hook"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    _async_host_limits.clear()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """session.request() behind the host's circuit breaker, with budgeted jittered retries"""
+    host, (breaker, budget) = _upstream(url)
+    budget.deposit()
+    attempt = 0
+
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} is unavailable (circuit open)")
+
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except requests.Timeout as e:
+            breaker.record_failure()
+            # A read timeout may have reached the upstream; another full timeout is not worth it
+            if isinstance(e, requests.ConnectTimeout) and _can_retry(attempt, budget):
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            raise
+        except requests.ConnectionError:
+            breaker.record_failure()
+            if _can_retry(attempt, budget):
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        if not _is_failure(response.status_code):
+            breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        if response.status_code in RETRY_STATUSES and _can_retry(attempt, budget):
+            response.close()
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+        return response
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """Async request() on the shared httpx client"""
+    host, (breaker, budget) = _upstream(url)
+    budget.deposit()
+    attempt = 0
+
+    client = get_async_client()
+    if host not in _async_host_limits:
+        _async_host_limits[host] = asyncio.Semaphore(HTTP_POOL_PER_HOST)
+    limit = _async_host_limits[host]
+
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} is unavailable (circuit open)")
+
+        try:
+            async with limit:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TimeoutException as e:
+            breaker.record_failure()
+            if isinstance(e, httpx.ConnectTimeout) and _can_retry(attempt, budget):
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            raise
+        except httpx.TransportError:
+            breaker.record_failure()
+            if _can_retry(attempt, budget):
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        if not _is_failure(response.status_code):
+            breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        if response.status_code in RETRY_STATUSES and _can_retry(attempt, budget):
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+        return response
@@ -0,0 +1,173 @@
+"""
+FAISS index specifications for the recipe vector store.
+
+A spec is "kind[:key=value,...]":
+    flat                                   exact search (default)
+    flat:compression=sq8                   exact scan over 8-bit scalar-quantized codes
+    hnsw:M=32,efConstruction=80,efSearch=64
+    ivf:nlist=64,nprobe=8,compression=pq16 IVF with product quantization
+
+compression may be "sq8" or "pq<m>" (m sub-quantizers, must divide the
+vector dimension). IVF lists are capped at what the corpus can train
+(about 39 points per centroid), and PQ falls back to SQ8 below 9984
+vectors, the minimum for training 256-centroid codebooks. efSearch and
+nprobe are search-time parameters and can be changed without rebuilding.
+"""
+
+from typing import Dict
+
+import faiss
+import numpy as np
+
+INDEX_KINDS = ("flat", "hnsw", "ivf")
+SEARCH_PARAMS = ("efSearch", "nprobe")
+
+DEFAULTS = {
+    "flat": {},
+    "hnsw": {"M": 32, "efConstruction": 80, "efSearch": 64},
+    "ivf": {"nlist": 64, "nprobe": 8},
+}
+
+
+def parse_index_spec(spec: str) -> Dict:
+    """Parse a spec string into {"kind": ..., **params}"""
+    spec = (spec or "flat").strip()
+    kind, _, params_text = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind '{kind}'. Use one of: {', '.join(INDEX_KINDS)}")
+    
+    params = dict(DEFAULTS[kind])
+    for item in filter(None, (part.strip() for part in params_text.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        value = value.strip()
+        params[key] = value.lower() if key == "compression" else int(value)
+    
+    compression = params.get("compression")
+    if compression and compression != "sq8" and not (compression.startswith("pq") and compression[2:].isdigit()):
+        raise ValueError(f"Unknown compression '{compression}'. Use 'sq8' or 'pq<m>'")
+    
+    return {"kind": kind, **params}
+
+
+def format_index_spec(spec: Dict) -> str:
+    """Inverse of parse_index_spec"""
+    params = ",".join(f"{key}={value}" for key, value in spec.items() if key != "kind")
+    return f"{spec['kind']}:{params}" if params else spec["kind"]
+
+
+# k-means, which trains both IVF coarse centroids and PQ codebooks, wants about
+# this many training points per centroid
+TRAINING_POINTS_PER_CENTROID = 39
+
+# PQ codes are 8 bits per sub-quantizer, so each codebook trains 256 centroids
+PQ_NBITS = 8
+PQ_MIN_TRAINING_POINTS = TRAINING_POINTS_PER_CENTROID * 2 ** PQ_NBITS
+
+
+def _codec(compression: str, ntotal: int) -> str:
+    """Factory suffix for the vector codec; PQ falls back to SQ8 when the corpus is too small to train it"""
+    if not compression:
+        return "Flat"
+    if compression == "sq8" or ntotal < PQ_MIN_TRAINING_POINTS:
+        return "SQ8"
+    return f"PQ{compression[2:]}x{PQ_NBITS}"
+
+
+def factory_string(spec: Dict, ntotal: int) -> str:
+    codec = _codec(spec.get("compression"), ntotal)
+    if spec["kind"] == "flat":
+        return codec
+    if spec["kind"] == "hnsw":
+        return f"HNSW{spec['M']}" if codec == "Flat" else f"HNSW{spec['M']},{codec}"
+    nlist = max(1, min(spec["nlist"], ntotal // TRAINING_POINTS_PER_CENTROID))
+    return f"IVF{nlist},{codec}"
+
+
+def apply_search_params(index, spec: Dict):
+    """Set search-time parameters (efSearch / nprobe) on a built or loaded index"""
+    params = faiss.ParameterSpace()
+    if spec["kind"] == "hnsw" and "efSearch" in spec:
+        params.set_index_parameter(index, "efSearch", spec["efSearch"])
+    if spec["kind"] == "ivf" and "nprobe" in spec:
+        params.set_index_parameter(index, "nprobe", spec["nprobe"])
+
+
+def exact_filtered_search(index, selector):
+    """(index, SearchParameters) that score every id in selector exhaustively, for exact filtered top-k.
+
+    A selector on an HNSW graph or on a few IVF lists only filters what the
+    approximate search happens to visit, so small partitions lose most of
+    their results. Instead, HNSW searches its flat storage and IVF probes
+    every list; both scan the same stored codes without copying vectors.
+    """
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.downcast_index(inner.storage), faiss.SearchParameters(sel=selector)
+    if isinstance(inner, faiss.IndexIVF):
+        return index, faiss.SearchParametersIVF(sel=selector, nprobe=inner.nlist)
+    return index, faiss.SearchParameters(sel=selector)
+
+
+def build_faiss_index(spec: Dict, vectors: np.ndarray, metric: int = faiss.METRIC_L2):
+    """Train (if needed) and fill a FAISS index described by spec"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dimension = vectors.shape
+    index = faiss.index_factory(dimension, factory_string(spec, ntotal), metric)
+    
+    if spec["kind"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = spec.get("efConstruction", 40)
+    if spec["kind"] == "ivf":
+        # reconstruct() needs a direct map to rebuild the index without removed chunks.
+        # A Hashtable map set before add() isn't filled by add() (faiss 1.12), so use an array.
+        faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Array)
+    
+    # Polysemous training only helps polysemous search, which is not used, and dominates PQ build time
+    for sub_index in (index, faiss.try_extract_index_ivf(index), getattr(faiss.downcast_index(index), "storage", None)):
+        if sub_index is not None and hasattr(faiss.downcast_index(sub_index), "do_polysemous_training"):
+            faiss.downcast_index(sub_index).do_polysemous_training = False
+    
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index, spec)
+    return index
+
+
+def supports_removal(index) -> bool:
+    """Only flat indexes (IndexFlatCodes: Flat, SQ8) remove in place and stay aligned with the store.
+
+    remove_ids() on them shifts the later vectors down, which is how
+    LangChain's FAISS.delete renumbers index_to_docstore_id. HNSW graphs
+    can't drop vectors, and IVF lists keep their own ids, so both are
+    rebuilt from the kept vectors instead.
+    """
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlatCodes)
+
+
+def reconstruct_vectors(index, positions) -> np.ndarray:
+    if len(positions) == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type != faiss.DirectMap.Array:
+        # Rebuilt from the inverted lists; indexes saved with a hashtable map may have it empty
+        ivf.set_direct_map_type(faiss.DirectMap.Array)
+    return np.vstack([index.reconstruct(int(p)) for p in positions])
+
+
+def build_params(spec: Dict) -> Dict:
+    """The parts of a spec that require a rebuild when they change"""
+    return {key: value for key, value in spec.items() if key not in SEARCH_PARAMS}
+
+
+def runtime_spec(built: Dict, configured: Dict) -> Dict:
+    """Built spec with search-time parameters overridden by the configured spec of the same kind"""
+    if built["kind"] != configured["kind"]:
+        return built
+    return {**built, **{key: configured[key] for key in SEARCH_PARAMS if key in configured}}
+
+
+def index_memory_bytes(index) -> int:
+    """Serialized size of the index - a close proxy for its resident memory"""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,209 @@
+"""
+Ingest pipeline for building the recipe vector store.
+
+PDF pages are extracted across a process pool and handed on in page
+order with a bounded number of tasks in flight, so memory stays flat
+for large cookbooks. Chunks are embedded in fixed-size batches across a bounded worker pool.
+Every finished batch is checkpointed to disk, keyed by a hash of its
+contents, so an interrupted build resumes where it stopped instead of
+re-embedding everything. Any LangChain Embeddings object works, including
+langchain_core's DeterministicFakeEmbedding for offline runs.
+"""
+
+import hashlib
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from pypdf import PdfReader
+
+from app.config import EMBED_BATCH_SIZE, EMBED_MAX_WORKERS, EMBED_CHECKPOINT_DIR, PDF_WORKERS, PDF_PAGES_PER_TASK
+from app.index_spec import build_faiss_index, reconstruct_vectors, supports_removal
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Extract the text of pages [start, stop) - runs inside a worker process.
+    
+    Uses the same plain extraction and stripping as LangChain's PyPDFLoader.
+    """
+    reader = PdfReader(file_path)
+    return [(i, reader.pages[i].extract_text(extraction_mode="plain").strip()) for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    file_path: str,
+    workers: int = PDF_WORKERS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) in page order, extracting pages in parallel"""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Recipe PDF not found at {file_path}")
+    
+    total_pages = len(PdfReader(file_path).pages)
+    ranges = [(i, min(i + pages_per_task, total_pages)) for i in range(0, total_pages, pages_per_task)]
+    
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield from _extract_page_range(file_path, start, stop)
+        return
+    
+    # Keep a bounded window of tasks in flight so finished pages don't pile up
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        pending = iter(ranges)
+        for start, stop in pending:
+            in_flight.append(pool.submit(_extract_page_range, file_path, start, stop))
+            if len(in_flight) >= workers * 2:
+                break
+        
+        while in_flight:
+            pages = in_flight.popleft().result()
+            next_range = next(pending, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_extract_page_range, file_path, *next_range))
+            yield from pages
+
+
+def _embedding_model_id(embeddings) -> str:
+    return str(getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None) or type(embeddings).__name__)
+
+
+def _batch_key(model_id: str, texts: List[str]) -> str:
+    digest = hashlib.sha1(model_id.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_checkpoint(checkpoint_dir: str, key: str):
+    path = os.path.join(checkpoint_dir, f"{key}.npy")
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+def _save_checkpoint(checkpoint_dir: str, key: str, vectors: np.ndarray):
+    """Write a batch atomically so a crash never leaves a half-written checkpoint"""
+    path = os.path.join(checkpoint_dir, f"{key}.npy")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, vectors)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoints(checkpoint_dir: str = EMBED_CHECKPOINT_DIR):
+    """Remove batch checkpoints once an index has been saved"""
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def embed_chunks(
+    chunks: List[Document],
+    embeddings,
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_workers: int = EMBED_MAX_WORKERS,
+    checkpoint_dir: str = EMBED_CHECKPOINT_DIR,
+) -> Tuple[np.ndarray, Dict]:
+    """Embed chunk texts in batches; returns (vectors in chunk order, throughput stats)"""
+    start = time.perf_counter()
+    texts = [chunk.page_content for chunk in chunks]
+    model_id = _embedding_model_id(embeddings)
+    
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    keys = [_batch_key(model_id, batch) for batch in batches]
+    results = [None] * len(batches)
+    
+    resumed = 0
+    if checkpoint_dir:
+        for i, key in enumerate(keys):
+            results[i] = _load_checkpoint(checkpoint_dir, key)
+            if results[i] is not None:
+                resumed += 1
+    
+    def embed_batch(i: int) -> Tuple[int, np.ndarray]:
+        vectors = np.asarray(embeddings.embed_documents(batches[i]), dtype=np.float32)
+        if checkpoint_dir:
+            _save_checkpoint(checkpoint_dir, keys[i], vectors)
+        return i, vectors
+    
+    pending = [i for i, vectors in enumerate(results) if vectors is None]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = [pool.submit(embed_batch, i) for i in pending]
+            for future in as_completed(futures):
+                i, vectors = future.result()
+                results[i] = vectors
+    
+    vectors = np.vstack(results) if results else np.zeros((0, 0), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    embedded = sum(len(batches[i]) for i in pending)
+    
+    stats = {
+        "chunks": len(texts),
+        "batches": len(batches),
+        "resumed_batches": resumed,
+        "embedded_chunks": embedded,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(embedded / elapsed, 1) if elapsed > 0 and embedded else 0.0,
+    }
+    return vectors, stats
+
+
+def _store_from_vectors(chunks: List[Document], vectors: np.ndarray, embeddings, index_spec: Dict) -> FAISS:
+    index = build_faiss_index(index_spec, vectors)
+    docstore = InMemoryDocstore({
+        chunk.id: Document(id=chunk.id, page_content=chunk.page_content, metadata=chunk.metadata)
+        for chunk in chunks
+    })
+    index_to_docstore_id = {i: chunk.id for i, chunk in enumerate(chunks)}
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def build_faiss_store(chunks: List[Document], embeddings, index_spec: Dict, **kwargs) -> Tuple[FAISS, Dict]:
+    """Embed chunks through the batch pipeline and build a FAISS store of the given index type"""
+    vectors, stats = embed_chunks(chunks, embeddings, **kwargs)
+    return _store_from_vectors(chunks, vectors, embeddings, index_spec), stats
+
+
+def delete_chunks_from_store(vector_store: FAISS, doc_ids: List[str], index_spec: Dict) -> FAISS:
+    """Remove chunks from a store; rebuilds from stored vectors when the index can't remove in place"""
+    if supports_removal(vector_store.index):
+        vector_store.delete(doc_ids)
+        return vector_store
+    
+    stale = set(doc_ids)
+    keep = [p for p in sorted(vector_store.index_to_docstore_id) if vector_store.index_to_docstore_id[p] not in stale]
+    chunks = [vector_store.docstore.search(vector_store.index_to_docstore_id[p]) for p in keep]
+    vectors = reconstruct_vectors(vector_store.index, keep)
+    return _store_from_vectors(chunks, vectors, vector_store.embeddings, index_spec)
+
+
+def add_chunks_to_store(vector_store: FAISS, chunks: List[Document], **kwargs) -> Dict:
+    """Embed chunks through the batch pipeline and append them to an existing store"""
+    vectors, stats = embed_chunks(chunks, vector_store.embeddings, **kwargs)
+    vector_store.add_embeddings(
+        list(zip([chunk.page_content for chunk in chunks], vectors.tolist())),
+        metadatas=[chunk.metadata for chunk in chunks],
+        ids=[chunk.id for chunk in chunks],
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from app.vector_store import load_recipes_from_pdf, create_recipe_chunks
+    
+    chunks = create_recipe_chunks(load_recipes_from_pdf())
+    _, stats = embed_chunks(chunks, DeterministicFakeEmbedding(size=1536), checkpoint_dir=None)
+    print(f"Embedded {stats['chunks']} chunks in {stats['batches']} batches "
+          f"({stats['chunks_per_second']} chunks/s with a local fake embedder)")
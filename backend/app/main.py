@@ -1,9 +1,16 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.agent import get_agent
+from app.agent import get_agent, close_agent
+from app.vector_store import get_embedding_cache_stats
+from app.http_client import close_async_client, close_session, get_http_stats
+from app.serper import get_cache_stats as get_serper_cache_stats
+from app.notifications import get_unknown_question_queue, start_notification_worker, close_notifications
 from app.config import APP_NAME, APP_VERSION, OPENAI_API_KEY, SENTRY_DSN, ENVIRONMENT
 import os
+import json
+from contextlib import asynccontextmanager
 from typing import Optional
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
@@ -26,10 +33,21 @@ if SENTRY_DSN:
     )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_notification_worker()
+    yield
+    close_agent()
+    close_notifications()
+    await close_async_client()
+    close_session()
+
+
 app = FastAPI(
     title=APP_NAME,
     version=APP_VERSION,
-    description="SazónBot - Mexican Recipe Assistant with Session Support"
+    description="SazónBot - Mexican Recipe Assistant with Session Support",
+    lifespan=lifespan
 )
 
 ALLOWED_ORIGINS = [
@@ -70,7 +88,7 @@ def read_root():
     }
 
 @app.post("/agent-chat", response_model=ChatResponse)
-def agent_chat(request: ChatRequest):
+async def agent_chat(request: ChatRequest):
     try:
         # Add context to Sentry
         if SENTRY_DSN:
@@ -80,10 +98,7 @@ def agent_chat(request: ChatRequest):
             })
         
         agent = get_agent()
-        result = agent.chat(request.message, session_id=request.session_id)
-        
-        # Clean up old sessions periodically
-        agent.cleanup_old_sessions(max_sessions=100)
+        result = await agent.achat(request.message, session_id=request.session_id)
         
         return ChatResponse(
             response=result["response"],
@@ -96,6 +111,30 @@ def agent_chat(request: ChatRequest):
             sentry_sdk.capture_exception(e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/agent-chat/stream")
+async def agent_chat_stream(request: ChatRequest):
+    """Stream the agent run as Server-Sent Events: tool_start, tool_end, token, then done (or error)"""
+    if SENTRY_DSN:
+        sentry_sdk.set_context("chat_request", {
+            "message_length": len(request.message),
+            "has_session_id": bool(request.session_id),
+            "streaming": True
+        })
+    
+    agent = get_agent()
+    
+    async def event_stream():
+        async for event in agent.astream_chat(request.message, session_id=request.session_id):
+            if event["type"] == "error" and SENTRY_DSN:
+                sentry_sdk.capture_message(f"Streaming chat failed: {event.get('error')}")
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/clear-memory")
 def clear_memory(request: ClearMemoryRequest):
     try:
@@ -115,6 +154,18 @@ def clear_memory(request: ClearMemoryRequest):
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/stats")
+def stats():
+    agent = get_agent()
+    return {
+        "embedding_cache": get_embedding_cache_stats(),
+        "sessions": agent.sessions.stats(),
+        "response_cache": agent.response_cache.stats() if agent.response_cache else None,
+        "serper_cache": get_serper_cache_stats(),
+        "upstreams": get_http_stats(),
+        "unknown_questions": get_unknown_question_queue().stats()
+    }
+
 @app.get("/sentry-test")
 def sentry_test():
     """Test endpoint to verify Sentry is working"""
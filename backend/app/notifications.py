@@ -0,0 +1,276 @@
+"""
+Durable, batched reporting of questions the agent couldn't answer.
+
+record_unknown_question_tool only writes the question to a local SQLite
+queue and returns, so the reply never waits on Pushover. A background
+thread sends what has accumulated as one digest notification every
+NOTIFY_INTERVAL seconds:
+
+- questions are deduplicated by cache_key() (case, accents, punctuation);
+  a repeat bumps its count, and is only reported again once
+  NOTIFY_DEDUPE_WINDOW has passed since it was sent
+- a failed digest leaves its questions queued, retried with jittered
+  exponential backoff up to NOTIFY_MAX_BACKOFF
+- rows are claimed with a lease inside an IMMEDIATE transaction, so
+  several workers sharing the file don't send the same question twice
+
+Without Pushover credentials the queue still records every question.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.config import (
+    PUSHOVER_USER,
+    PUSHOVER_TOKEN,
+    UNKNOWN_QUESTIONS_PATH,
+    NOTIFY_INTERVAL,
+    NOTIFY_BATCH_SIZE,
+    NOTIFY_MAX_BACKOFF,
+    NOTIFY_DEDUPE_WINDOW,
+)
+from app.http_client import request as http_request
+from app.response_cache import cache_key
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+PUSHOVER_TIMEOUT = 5
+
+# Pushover's message length limit
+MAX_MESSAGE_CHARS = 1024
+
+# How long claimed rows stay hidden from other workers while a digest is sent (seconds)
+CLAIM_LEASE = 60
+
+
+def pushover_configured() -> bool:
+    return bool(PUSHOVER_USER and PUSHOVER_TOKEN)
+
+
+def format_digest(rows: List[tuple]) -> str:
+    """One bullet per (question, times_asked) row"""
+    lines = []
+    for question, times_asked in rows:
+        line = f"• {' '.join(question.split())}"
+        if times_asked > 1:
+            line += f" (asked {times_asked}×)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class UnknownQuestionQueue:
+    """SQLite-backed queue of unanswered questions, drained as Pushover digests"""
+
+    def __init__(
+        self,
+        path: str,
+        interval: float = 60,
+        batch_size: int = 20,
+        max_backoff: float = 3600,
+        dedupe_window: float = 24 * 3600,
+    ):
+        self.path = path
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.dedupe_window = dedupe_window
+
+        self._db = self._open_db(path)
+        self._lock = threading.Lock()
+        self._stats = {"recorded": 0, "duplicates": 0, "digests_sent": 0, "questions_sent": 0, "send_failures": 0}
+        self._worker = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _open_db(path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS unknown_questions ("
+            " question_key TEXT PRIMARY KEY,"
+            " question TEXT NOT NULL,"
+            " times_asked INTEGER NOT NULL DEFAULT 1,"
+            " first_asked REAL NOT NULL,"
+            " last_asked REAL NOT NULL,"
+            " pending INTEGER NOT NULL DEFAULT 1,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt REAL NOT NULL DEFAULT 0,"
+            " sent_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_unknown_questions_due ON unknown_questions (pending, next_attempt)")
+        return db
+
+    def enqueue(self, question: str) -> bool:
+        """Record a question; False if it was already queued or recently reported"""
+        question = question.strip()
+        key = cache_key(question) or question
+        now = time.time()
+        cutoff = now - self.dedupe_window
+        with self._lock:
+            row = self._db.execute(
+                "SELECT pending, sent_at FROM unknown_questions WHERE question_key = ?", (key,)
+            ).fetchone()
+            new = row is None or (row[0] == 0 and row[1] < cutoff)
+
+            # SET expressions see the old row, so "reopen" is decided before pending changes
+            self._db.execute(
+                "INSERT INTO unknown_questions (question_key, question, first_asked, last_asked)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(question_key) DO UPDATE SET"
+                "  times_asked = times_asked + 1,"
+                "  last_asked = excluded.last_asked,"
+                "  attempts = CASE WHEN pending = 0 AND sent_at < ? THEN 0 ELSE attempts END,"
+                "  next_attempt = CASE WHEN pending = 0 AND sent_at < ? THEN 0 ELSE next_attempt END,"
+                "  pending = CASE WHEN pending = 0 AND sent_at < ? THEN 1 ELSE pending END",
+                (key, question, now, now, cutoff, cutoff, cutoff),
+            )
+            self._stats["recorded" if new else "duplicates"] += 1
+            return new
+
+    def _claim(self) -> List[tuple]:
+        """Lease the oldest due questions that fit in one message"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT question_key, question, times_asked, attempts FROM unknown_questions"
+                    " WHERE pending = 1 AND next_attempt <= ? ORDER BY first_asked LIMIT ?",
+                    (now, self.batch_size),
+                ).fetchall()
+
+                claimed, length = [], 0
+                for row in rows:
+                    length += len(format_digest([(row[1], row[2])])) + 1
+                    if claimed and length > MAX_MESSAGE_CHARS:
+                        break
+                    claimed.append(row)
+
+                self._db.executemany(
+                    "UPDATE unknown_questions SET next_attempt = ? WHERE question_key = ?",
+                    [(now + CLAIM_LEASE, row[0]) for row in claimed],
+                )
+                self._db.execute("COMMIT")
+                return claimed
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _send_digest(self, rows: List[tuple]) -> bool:
+        count = len(rows)
+        message = format_digest([(question, times_asked) for _, question, times_asked, _ in rows])
+        payload = {
+            "token": PUSHOVER_TOKEN,
+            "user": PUSHOVER_USER,
+            "title": f"SazónBot - {count} unanswered question{'s' if count > 1 else ''}",
+            "message": message[:MAX_MESSAGE_CHARS],
+            "priority": 0,
+        }
+        try:
+            response = http_request("POST", PUSHOVER_URL, data=payload, timeout=PUSHOVER_TIMEOUT)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.max_backoff, self.interval * 2 ** attempts) * random.uniform(0.5, 1.0)
+
+    def flush(self) -> int:
+        """Send one digest of due questions; returns how many were reported"""
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        sent = self._send_digest(rows)
+        now = time.time()
+        with self._lock:
+            if sent:
+                self._db.executemany(
+                    "UPDATE unknown_questions SET pending = 0, attempts = 0, sent_at = ? WHERE question_key = ?",
+                    [(now, row[0]) for row in rows],
+                )
+                self._stats["digests_sent"] += 1
+                self._stats["questions_sent"] += len(rows)
+            else:
+                self._db.executemany(
+                    "UPDATE unknown_questions SET attempts = attempts + 1, next_attempt = ? WHERE question_key = ?",
+                    [(now + self._backoff(row[3]), row[0]) for row in rows],
+                )
+                self._stats["send_failures"] += 1
+        return len(rows) if sent else 0
+
+    def start_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        self._stop = threading.Event()
+
+        def run():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.flush()
+                except Exception:
+                    pass
+
+        self._worker = threading.Thread(target=run, name="unknown-question-notifier", daemon=True)
+        self._worker.start()
+
+    def stop_worker(self):
+        if self._worker is not None:
+            self._stop.set()
+            self._worker.join(timeout=PUSHOVER_TIMEOUT + 5)
+            self._worker = None
+
+    def close(self):
+        self.stop_worker()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending, reported = self._db.execute(
+                "SELECT COALESCE(SUM(pending), 0), COALESCE(SUM(1 - pending), 0) FROM unknown_questions"
+            ).fetchone()
+            return {
+                **self._stats,
+                "pending": pending,
+                "reported": reported,
+                "worker_running": self._worker is not None and self._worker.is_alive(),
+            }
+
+
+_queue: Optional[UnknownQuestionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_unknown_question_queue() -> UnknownQuestionQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = UnknownQuestionQueue(
+                UNKNOWN_QUESTIONS_PATH,
+                interval=NOTIFY_INTERVAL,
+                batch_size=NOTIFY_BATCH_SIZE,
+                max_backoff=NOTIFY_MAX_BACKOFF,
+                dedupe_window=NOTIFY_DEDUPE_WINDOW,
+            )
+        return _queue
+
+
+def start_notification_worker():
+    """Start sending digests; called on app startup (no-op without Pushover credentials)"""
+    if pushover_configured():
+        get_unknown_question_queue().start_worker()
+
+
+def close_notifications():
+    """Stop the worker and close the queue; called on app shutdown"""
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.close()
+            _queue = None
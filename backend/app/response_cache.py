@@ -0,0 +1,188 @@
+"""
+Semantic cache for first-turn agent responses.
+
+Many sessions open with the same question ("¿cómo hago pozole?", "show me
+chicken recipes"). For turns with no history, a cached answer is returned
+when a previous question matches:
+
+1. exactly, after normalizing case, accents, punctuation and whitespace, or
+2. by cosine similarity of query embeddings >= RESPONSE_CACHE_THRESHOLD,
+   among questions naming the same recipe words
+
+Embeddings of "receta de mole verde" and "receta de mole rojo" can be close
+enough to pass the threshold, so a semantic hit also needs both questions to
+contain the same words from recipe names (recipe_words).
+
+Entries are scoped by detected language (es/en) so a Spanish question
+never gets an English answer. They expire after RESPONSE_CACHE_TTL, and
+the whole cache is dropped when the vector index digest changes.
+Embeddings go through the vector store's cached embedder.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from app.embedding_cache import normalize_query
+
+SPANISH_WORDS = {
+    "el", "la", "los", "las", "de", "del", "que", "qué", "cómo", "como", "para", "con",
+    "una", "un", "por", "quiero", "tienes", "hago", "hacer", "receta", "recetas",
+    "muéstrame", "muestrame", "dame", "puedo", "cuál", "cuáles", "dónde", "es", "son",
+}
+
+
+def detect_language(text: str) -> str:
+    """'es' or 'en', from Spanish punctuation/letters or common Spanish words"""
+    if re.search(r"[¿¡ñ]", text.lower()):
+        return "es"
+    words = re.findall(r"\w+", text.lower())
+    spanish = sum(1 for word in words if word in SPANISH_WORDS)
+    return "es" if words and spanish / len(words) >= 0.25 else "en"
+
+
+def cache_key(text: str) -> str:
+    """Exact-match key: normalize_query() without accents and punctuation"""
+    text = unicodedata.normalize("NFKD", normalize_query(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+class ResponseCache:
+    """Bounded, TTL-limited cache of responses keyed by language and question"""
+
+    def __init__(
+        self,
+        embed_query: Optional[Callable[[str], List[float]]],
+        index_version: Callable[[], Optional[str]],
+        threshold: float = 0.95,
+        ttl_seconds: Optional[float] = 24 * 3600,
+        max_entries: int = 500,
+        recipe_words: Optional[Callable[[str], FrozenSet[str]]] = None,
+    ):
+        self.embed_query = embed_query
+        self.recipe_words = recipe_words
+        self.index_version = index_version
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds or None
+        self.max_entries = max_entries
+
+        # (language, key) -> {"response", "vector", "words", "created"}
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        # (language, words) -> (keys, matrix of unit vectors), rebuilt after changes
+        self._matrices: Dict[tuple, tuple] = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    def _expired(self, entry: Dict) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry["created"] > self.ttl_seconds
+
+    def _check_version(self):
+        """Drop everything when the index was rebuilt. Caller must hold _lock"""
+        version = self.index_version()
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._matrices.clear()
+            self._version = version
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embed_query is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_query(text), dtype=np.float32)
+        except Exception:
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _words(self, text: str) -> Optional[FrozenSet[str]]:
+        if self.recipe_words is None:
+            return frozenset()
+        try:
+            return self.recipe_words(text)
+        except Exception:
+            return None
+
+    def _matrix(self, language: str, words: FrozenSet[str]):
+        """Keys and stacked vectors of live entries for one language and set of recipe words. Caller must hold _lock"""
+        if (language, words) not in self._matrices:
+            keys = [k for k, e in self._entries.items()
+                    if k[0] == language and e["words"] == words and e["vector"] is not None and not self._expired(e)]
+            matrix = np.stack([self._entries[k]["vector"] for k in keys]) if keys else None
+            self._matrices[(language, words)] = (keys, matrix)
+        return self._matrices[(language, words)]
+
+    def get(self, question: str) -> Optional[str]:
+        language = detect_language(question)
+        key = (language, cache_key(question))
+
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry):
+                    self._entries.move_to_end(key)
+                    self._stats["exact_hits"] += 1
+                    return entry["response"]
+                del self._entries[key]
+                self._matrices.clear()
+
+            has_candidates = any(k[0] == language for k in self._entries)
+
+        # Without the recipe words (lookup failed) a semantic hit could be the wrong recipe
+        words = self._words(question) if has_candidates else None
+        vector = self._embed(question) if words is not None else None
+
+        with self._lock:
+            if vector is not None:
+                keys, matrix = self._matrix(language, words)
+                if matrix is not None and matrix.shape[1] == vector.shape[0]:
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    entry = self._entries.get(keys[best])
+                    if scores[best] >= self.threshold and entry is not None and not self._expired(entry):
+                        self._entries.move_to_end(keys[best])
+                        self._stats["semantic_hits"] += 1
+                        return entry["response"]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, question: str, response: str):
+        language = detect_language(question)
+        key = (language, cache_key(question))
+        words = self._words(question)
+        vector = self._embed(question) if words is not None else None
+
+        with self._lock:
+            self._check_version()
+            self._entries[key] = {"response": response, "vector": vector, "words": words, "created": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrices.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,253 @@
+"""
+Serper.dev API calls, with matching sync and async entry points.
+
+search() uses requests and asearch() uses the shared httpx.AsyncClient.
+Both go through the pooled clients in app.http_client and raise
+SerperError (or SerperTimeout) so tools handle failures the same way on
+either path, including while Serper's circuit breaker is open.
+
+Successful responses are kept in a shared LRU keyed by (endpoint,
+normalized query, params) for the TTL the caller passes, and identical
+requests that arrive while one is in flight wait for it instead of
+calling Serper again (single-flight, per thread pool and per event loop).
+Errors are never cached.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+import requests
+
+from app.config import SERPER_API_KEY, SERPER_BASE_URL, SERPER_CACHE_SIZE
+from app.embedding_cache import normalize_query
+from app.http_client import CircuitOpenError, request as http_request, arequest as http_arequest
+
+SERPER_URL = SERPER_BASE_URL.rstrip("/")
+SERPER_TIMEOUT = 10
+
+# Result list key per endpoint
+RESULT_KEYS = {
+    "search": "organic",
+    "news": "news",
+    "images": "images",
+    "videos": "videos",
+}
+
+
+class SerperError(Exception):
+    pass
+
+
+class SerperTimeout(SerperError):
+    pass
+
+
+def _request(endpoint: str, query: str, **params):
+    url = f"{SERPER_URL}/{endpoint}"
+    headers = {
+        "X-API-KEY": SERPER_API_KEY or "",
+        "Content-Type": "application/json",
+    }
+    payload = {"q": query, **{key: value for key, value in params.items() if value is not None}}
+    return url, headers, payload
+
+
+class _Flight:
+    """A sync request in progress; followers wait on done"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_inflight: Dict[tuple, _Flight] = {}
+_ainflight: Dict[tuple, asyncio.Future] = {}
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evictions": 0}
+
+
+def _cache_key(endpoint: str, query: str, params: Dict) -> tuple:
+    return (
+        endpoint,
+        normalize_query(query),
+        tuple(sorted((key, value) for key, value in params.items() if value is not None)),
+    )
+
+
+def _cache_get(key: tuple) -> Optional[Dict]:
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _cache[key]
+            _stats["expired"] += 1
+            return None
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return data
+
+
+def _cache_put(key: tuple, data: Dict, ttl: Optional[float]):
+    if not ttl or SERPER_CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = (data, time.monotonic() + ttl)
+        _cache.move_to_end(key)
+        while len(_cache) > SERPER_CACHE_SIZE:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_cache_stats() -> Dict:
+    with _cache_lock:
+        lookups = _stats["hits"] + _stats["coalesced"] + _stats["misses"]
+        return {
+            **_stats,
+            "entries": len(_cache),
+            "max_entries": SERPER_CACHE_SIZE,
+            "in_flight": len(_inflight) + len(_ainflight),
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def search(endpoint: str, query: str, ttl: Optional[float] = None, **params) -> Dict:
+    """POST a query to a Serper endpoint ("search", "videos", "images", ...), cached for ttl seconds"""
+    key = _cache_key(endpoint, query, params)
+    data = _cache_get(key)
+    if data is not None:
+        return data
+
+    with _cache_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+            _stats["misses"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _post(endpoint, query, **params)
+        _cache_put(key, flight.result, ttl)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _cache_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+async def asearch(endpoint: str, query: str, ttl: Optional[float] = None, **params) -> Dict:
+    """Async search() on the shared httpx client"""
+    key = _cache_key(endpoint, query, params)
+    data = _cache_get(key)
+    if data is not None:
+        return data
+
+    future = _ainflight.get(key)
+    if future is not None:
+        with _cache_lock:
+            _stats["coalesced"] += 1
+        # shield: a cancelled follower must not cancel the leader's request
+        return await asyncio.shield(future)
+
+    future = _ainflight[key] = asyncio.get_running_loop().create_future()
+    with _cache_lock:
+        _stats["misses"] += 1
+    try:
+        data = await _apost(endpoint, query, **params)
+        _cache_put(key, data, ttl)
+        future.set_result(data)
+        return data
+    except BaseException as e:
+        # Followers of a cancelled leader get an ordinary SerperError, not the cancellation
+        error = SerperError("Serper request was cancelled") if isinstance(e, asyncio.CancelledError) else e
+        future.set_exception(error)
+        # Mark the exception retrieved so a leader without followers doesn't log a warning
+        future.exception()
+        raise
+    finally:
+        _ainflight.pop(key, None)
+
+
+def _post(endpoint: str, query: str, **params) -> Dict:
+    url, headers, payload = _request(endpoint, query, **params)
+    try:
+        response = http_request("POST", url, headers=headers, json=payload, timeout=SERPER_TIMEOUT)
+    except requests.Timeout as e:
+        raise SerperTimeout(str(e)) from e
+    except (requests.RequestException, CircuitOpenError) as e:
+        raise SerperError(str(e)) from e
+
+    if response.status_code != 200:
+        raise SerperError(f"Serper returned {response.status_code}")
+    return response.json()
+
+
+async def _apost(endpoint: str, query: str, **params) -> Dict:
+    url, headers, payload = _request(endpoint, query, **params)
+    try:
+        response = await http_arequest("POST", url, headers=headers, json=payload, timeout=SERPER_TIMEOUT)
+    except httpx.TimeoutException as e:
+        raise SerperTimeout(str(e)) from e
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise SerperError(str(e)) from e
+
+    if response.status_code != 200:
+        raise SerperError(f"Serper returned {response.status_code}")
+    return response.json()
+
+
+def parse_snippets(results: Dict, endpoint: str = "search", k: int = 10) -> str:
+    """Flatten a Serper response into text, the way GoogleSerperAPIWrapper.run() does"""
+    snippets: List[str] = []
+
+    answer_box = results.get("answerBox")
+    if answer_box:
+        if answer_box.get("answer"):
+            return answer_box["answer"]
+        if answer_box.get("snippet"):
+            return answer_box["snippet"].replace("\n", " ")
+        if answer_box.get("snippetHighlighted"):
+            return " ".join(answer_box["snippetHighlighted"])
+
+    kg = results.get("knowledgeGraph")
+    if kg:
+        title = kg.get("title")
+        if kg.get("type"):
+            snippets.append(f"{title}: {kg['type']}.")
+        if kg.get("description"):
+            snippets.append(kg["description"])
+        for attribute, value in kg.get("attributes", {}).items():
+            snippets.append(f"{title} {attribute}: {value}.")
+
+    for result in results.get(RESULT_KEYS[endpoint], [])[:k]:
+        if "snippet" in result:
+            snippets.append(result["snippet"])
+        for attribute, value in result.get("attributes", {}).items():
+            snippets.append(f"{attribute}: {value}.")
+
+    if not snippets:
+        return "No good Google Search Result was found"
+    return " ".join(snippets)
@@ -0,0 +1,606 @@
+"""
+Per-session chat history stores.
+
+SessionBackend is the interface RecipeAgent talks to. Three backends:
+
+- SessionStore (memory://): process-local LRU with idle TTL, a session
+  count limit and a byte budget. Fastest, but only for a single worker.
+- SQLiteSessionStore (sqlite:///path): WAL database shared by every worker
+  on one host. Each turn appends rows, and reads take the last N rows.
+- RedisSessionStore (redis://host:port/db): one Redis list per session,
+  spoken over a minimal RESP socket client. Shared by workers and replicas.
+
+Messages are serialized as compact JSON ({"t": "h"|"a"|"s", "c": content}).
+create_session_store() picks the backend from a SESSION_BACKEND URL.
+"""
+
+import json
+import os
+import select
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+# Rough per-message overhead (object, type, metadata) on top of its text
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def message_size(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return len(content.encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+
+_MESSAGE_TYPES = {"h": HumanMessage, "a": AIMessage, "s": SystemMessage}
+_TYPE_CODES = {"human": "h", "ai": "a", "system": "s"}
+
+
+def encode_message(message: BaseMessage) -> str:
+    return json.dumps({"t": _TYPE_CODES[message.type], "c": message.content}, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_message(payload) -> BaseMessage:
+    data = json.loads(payload)
+    return _MESSAGE_TYPES[data["t"]](content=data["c"])
+
+
+class SessionBackend:
+    """Interface for session history stores"""
+
+    backend = "base"
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        raise NotImplementedError
+
+    def append(self, session_id: str, messages: List[BaseMessage]):
+        raise NotImplementedError
+
+    def clear(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def get_summary(self, session_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set_summary(self, session_id: str, summary: str, keep_last: int):
+        """Store the rolling summary and drop all but the last keep_last messages it now covers"""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        return 0
+
+    def start_sweeper(self, interval: float = 60):
+        if getattr(self, "_sweeper", None) is not None and self._sweeper.is_alive():
+            return
+
+        self._stop = threading.Event()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception:
+                    pass
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        if getattr(self, "_sweeper", None) is not None:
+            self._stop.set()
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def close(self):
+        self.stop_sweeper()
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend}
+
+
+class _Session:
+    __slots__ = ("messages", "summary", "size", "last_access")
+
+    def __init__(self):
+        self.messages: List[BaseMessage] = []
+        self.summary: Optional[str] = None
+        self.size = 0
+        self.last_access = time.monotonic()
+
+
+class SessionStore(SessionBackend):
+    """Thread-safe LRU of session message windows with idle TTL and a byte budget"""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_messages: int = 20,
+        max_sessions: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: Optional[float] = 3600,
+    ):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl or None
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evicted_lru": 0, "evicted_bytes": 0, "expired": 0}
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return self.idle_ttl is not None and now - session.last_access > self.idle_ttl
+
+    def _drop(self, session_id: str):
+        """Remove a session. Caller must hold _lock"""
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+
+    def _enforce_limits(self):
+        """Evict least-recently-used sessions until within count and byte budget. Caller must hold _lock"""
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)))
+            self._stats["evicted_lru"] += 1
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)))
+            self._stats["evicted_bytes"] += 1
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        """Return a copy of the session's messages and mark it as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and self._expired(session, now):
+                self._drop(session_id)
+                self._stats["expired"] += 1
+                session = None
+
+            if session is None:
+                self._stats["misses"] += 1
+                return []
+
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            self._stats["hits"] += 1
+            return list(session.messages)
+
+    def append(self, session_id: str, messages: List[BaseMessage]):
+        """Append messages to a session, keeping only the last max_messages"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+
+            session.messages.extend(messages)
+            del session.messages[:-self.max_messages]
+            self._touch(session_id, session)
+
+    def _touch(self, session_id: str, session: _Session):
+        """Recount a changed session's size, mark it recently used and enforce limits. Caller must hold _lock"""
+        size = sum(message_size(m) for m in session.messages)
+        if session.summary:
+            size += len(session.summary.encode("utf-8"))
+        self._bytes += size - session.size
+        session.size = size
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+        self._enforce_limits()
+
+    def get_summary(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.summary if session is not None else None
+
+    def set_summary(self, session_id: str, summary: str, keep_last: int):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+
+            session.summary = summary
+            session.messages = session.messages[-keep_last:] if keep_last else []
+            self._touch(session_id, session)
+
+    def clear(self, session_id: str) -> bool:
+        """Forget a session's messages; returns False if the session is unknown"""
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def sweep(self) -> int:
+        """Drop sessions idle for longer than idle_ttl; returns how many were dropped"""
+        if self.idle_ttl is None:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            # Oldest access first, so stop at the first session still alive
+            expired = []
+            for session_id, session in self._sessions.items():
+                if not self._expired(session, now):
+                    break
+                expired.append(session_id)
+            for session_id in expired:
+                self._drop(session_id)
+            self._stats["expired"] += len(expired)
+            return len(expired)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                **self._stats,
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "idle_ttl": self.idle_ttl,
+            }
+
+
+class SQLiteSessionStore(SessionBackend):
+    """Session history in a SQLite WAL database, shared by all workers on a host"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_messages: int = 20, idle_ttl: Optional[float] = 3600):
+        self.path = path
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl or None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0}
+        self._db = self._open_db(path)
+
+    @staticmethod
+    def _open_db(path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS session_messages_by_session ON session_messages (session_id, id)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS session_summaries ("
+            " session_id TEXT PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        db.commit()
+        return db
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload, created FROM session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, self.max_messages),
+            ).fetchall()
+
+            if rows and self.idle_ttl is not None and time.time() - rows[0][1] > self.idle_ttl:
+                self._delete_locked(session_id)
+                self._db.commit()
+                self._stats["expired"] += 1
+                rows = []
+
+            self._stats["hits" if rows else "misses"] += 1
+            return [decode_message(payload) for payload, _ in reversed(rows)]
+
+    def append(self, session_id: str, messages: List[BaseMessage]):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO session_messages (session_id, created, payload) VALUES (?, ?, ?)",
+                [(session_id, now, encode_message(m)) for m in messages],
+            )
+            self._db.commit()
+
+    def _delete_locked(self, session_id: str) -> int:
+        deleted = self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,)).rowcount
+        deleted += self._db.execute("DELETE FROM session_summaries WHERE session_id = ?", (session_id,)).rowcount
+        return deleted
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._delete_locked(session_id)
+            self._db.commit()
+            return deleted > 0
+
+    def get_summary(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary FROM session_summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_summary(self, session_id: str, summary: str, keep_last: int):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO session_summaries (session_id, summary, updated) VALUES (?, ?, ?)",
+                (session_id, summary, time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM session_messages WHERE session_id = ? AND id NOT IN ("
+                " SELECT id FROM session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, keep_last),
+            )
+            self._db.commit()
+
+    def sweep(self) -> int:
+        """Delete idle sessions and rows that fell out of every session's window"""
+        with self._lock:
+            expired = []
+            if self.idle_ttl is not None:
+                expired = [row[0] for row in self._db.execute(
+                    "SELECT session_id FROM session_messages GROUP BY session_id HAVING MAX(created) < ?",
+                    (time.time() - self.idle_ttl,),
+                )]
+                for expired_id in expired:
+                    self._delete_locked(expired_id)
+                self._stats["expired"] += len(expired)
+                self._db.execute(
+                    "DELETE FROM session_summaries WHERE updated < ? AND session_id NOT IN ("
+                    " SELECT DISTINCT session_id FROM session_messages)",
+                    (time.time() - self.idle_ttl,),
+                )
+            self._db.execute(
+                "DELETE FROM session_messages WHERE id IN ("
+                " SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY id DESC) AS rn"
+                " FROM session_messages) WHERE rn > ?)",
+                (self.max_messages,),
+            )
+            self._db.commit()
+            return len(expired)
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions, rows = self._db.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM session_messages"
+            ).fetchone()
+            return {
+                "backend": self.backend,
+                **self._stats,
+                "sessions": sessions,
+                "rows": rows,
+                "path": self.path,
+                "idle_ttl": self.idle_ttl,
+            }
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    """Minimal Redis (RESP2) client over one socket, enough for list commands and pipelines"""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._call_locked([("AUTH", self.password)])
+        if self.db:
+            self._call_locked([("SELECT", self.db)])
+
+    def _disconnect(self):
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RespError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    def _read_replies(self, count: int):
+        replies, error = [], None
+        for _ in range(count):
+            try:
+                replies.append(self._read_reply())
+            except RespError as e:
+                replies.append(None)
+                error = error or e
+        if error:
+            raise error
+        return replies
+
+    def _call_locked(self, commands):
+        self._sock.sendall(b"".join(self._encode(args) for args in commands))
+        return self._read_replies(len(commands))
+
+    def _is_stale(self) -> bool:
+        """An idle connection with something to read was closed (or reset) by the server"""
+        readable, _, _ = select.select([self._sock], [], [], 0)
+        return bool(readable)
+
+    def pipeline(self, *commands):
+        """Send several commands in one write and return their replies in order.
+
+        Only a failure before the request is written is retried, on a new
+        connection: an idle connection the server already closed, or a send
+        on it refused outright. Once written, commands are never resent (a
+        read timeout doesn't mean RPUSH didn't run).
+        """
+        payload = b"".join(self._encode(args) for args in commands)
+        with self._lock:
+            try:
+                if self._sock is not None and self._is_stale():
+                    self._disconnect()
+                if self._sock is None:
+                    self._connect()
+                    self._sock.sendall(payload)
+                else:
+                    try:
+                        self._sock.sendall(payload)
+                    except ConnectionError:
+                        self._disconnect()
+                        self._connect()
+                        self._sock.sendall(payload)
+                return self._read_replies(len(commands))
+            except OSError:
+                self._disconnect()
+                raise
+
+    def execute(self, *args):
+        return self.pipeline(args)[0]
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class RedisSessionStore(SessionBackend):
+    """Session history as Redis lists; idle expiry is the key's TTL"""
+
+    backend = "redis"
+
+    def __init__(self, client: RespClient, max_messages: int = 20, idle_ttl: Optional[float] = 3600,
+                 prefix: str = "sazonbot:session:"):
+        self.client = client
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl or None
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + session_id
+
+    def _touch(self, key: str):
+        return ("EXPIRE", key, int(self.idle_ttl)) if self.idle_ttl is not None else ("PTTL", key)
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        key = self._key(session_id)
+        payloads, _ = self.client.pipeline(("LRANGE", key, -self.max_messages, -1), self._touch(key))
+        with self._lock:
+            self._stats["hits" if payloads else "misses"] += 1
+        return [decode_message(payload) for payload in payloads]
+
+    def append(self, session_id: str, messages: List[BaseMessage]):
+        key = self._key(session_id)
+        self.client.pipeline(
+            ("RPUSH", key, *[encode_message(m) for m in messages]),
+            ("LTRIM", key, -self.max_messages, -1),
+            self._touch(key),
+        )
+
+    def clear(self, session_id: str) -> bool:
+        return self.client.execute("DEL", self._key(session_id), self._key(session_id) + ":summary") > 0
+
+    def get_summary(self, session_id: str) -> Optional[str]:
+        summary = self.client.execute("GET", self._key(session_id) + ":summary")
+        return summary.decode("utf-8") if summary is not None else None
+
+    def set_summary(self, session_id: str, summary: str, keep_last: int):
+        key = self._key(session_id)
+        self.client.pipeline(
+            ("SET", key + ":summary", summary),
+            self._touch(key + ":summary"),
+            ("LTRIM", key, -keep_last, -1) if keep_last else ("DEL", key),
+        )
+
+    def close(self):
+        super().close()
+        self.client.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                **self._stats,
+                "host": f"{self.client.host}:{self.client.port}/{self.client.db}",
+                "idle_ttl": self.idle_ttl,
+            }
+
+
+def create_session_store(url: str, max_messages: int, max_sessions: int,
+                         max_bytes: int, idle_ttl: Optional[float]) -> SessionBackend:
+    """Build a session store from a URL: memory://, sqlite:///path/to/db or redis://[:password@]host:port/db"""
+    parsed = urlparse(url or "memory://")
+
+    if parsed.scheme in ("", "memory"):
+        return SessionStore(max_messages=max_messages, max_sessions=max_sessions,
+                            max_bytes=max_bytes, idle_ttl=idle_ttl)
+
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative.db and sqlite:////absolute/path.db, as in SQLAlchemy URLs
+        path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+        return SQLiteSessionStore(path, max_messages=max_messages, idle_ttl=idle_ttl)
+
+    if parsed.scheme == "redis":
+        client = RespClient(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(parsed.path.strip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+        return RedisSessionStore(client, max_messages=max_messages, idle_ttl=idle_ttl)
+
+    raise ValueError(f"Unsupported SESSION_BACKEND '{url}'. Use memory://, sqlite:///path or redis://host:port/db")
@@ -1,16 +1,60 @@
 from langchain.tools import Tool, StructuredTool
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from typing import List, Dict, Optional
-import re
-import requests
-from app.vector_store import search_recipes, load_vector_store
-from app.config import SERPER_API_KEY, PUSHOVER_USER, PUSHOVER_TOKEN
-from app.utils.recipe_parser import scale_recipe, extract_servings_from_recipe
+from typing import Dict
+import asyncio
+from app.vector_store import (
+    search_recipes,
+    hybrid_search_recipes,
+    list_recipes_by_type,
+    list_recipe_types,
+    find_recipe_by_name,
+    get_recipe_for_chunk,
+    get_full_recipe_text,
+)
+from app.config import SERPER_API_KEY
+from app.config import SERPER_TTL_WEB, SERPER_TTL_REFERENCE, SERPER_TTL_MEDIA
+from app.notifications import get_unknown_question_queue, pushover_configured
+from app.serper import SerperError, SerperTimeout, parse_snippets
+from app.serper import search as serper_search, asearch as serper_asearch
+from app.utils.recipe_parser import scale_recipe
 from pydantic import BaseModel, Field
 
+# Same defaults GoogleSerperAPIWrapper used for text search
+SERPER_SEARCH_PARAMS = {"gl": "us", "hl": "en", "num": 10}
+
+
+def _serper_fallback(tool: Dict, error: Exception) -> str:
+    if isinstance(error, SerperTimeout) and "timeout" in tool:
+        return tool["timeout"]
+    if isinstance(error, SerperError) and "unreachable" in tool:
+        return tool["unreachable"]
+    return tool["error"].format(error=error)
+
+
+def _serper_tool(tool: Dict, *args) -> str:
+    """Run a Serper-backed tool spec: build the query, search, format, or fall back"""
+    if not SERPER_API_KEY:
+        return tool["unavailable"].format(*args)
+    try:
+        data = serper_search(tool["endpoint"], tool["query"](*args), ttl=tool["ttl"], **tool["params"])
+        return tool["format"](args[0], data)
+    except Exception as e:
+        return _serper_fallback(tool, e)
+
+
+async def _aserper_tool(tool: Dict, *args) -> str:
+    """Async _serper_tool()"""
+    if not SERPER_API_KEY:
+        return tool["unavailable"].format(*args)
+    try:
+        data = await serper_asearch(tool["endpoint"], tool["query"](*args), ttl=tool["ttl"], **tool["params"])
+        return tool["format"](args[0], data)
+    except Exception as e:
+        return _serper_fallback(tool, e)
+
+
 def recipe_search_function(query: str) -> str:
     try:
-        results = search_recipes(query, k=3)
+        results = hybrid_search_recipes(query, k=3)
         
         if not results:
             return "No recipes found matching your query. Try different keywords or ask what recipes are available."
@@ -34,16 +78,16 @@ def recipe_search_function(query: str) -> str:
 
 def recipe_list_by_type_function(recipe_type: str) -> str:
     try:
-        vector_store = load_vector_store()
-        results = search_recipes(recipe_type, k=20, recipe_type=recipe_type)
+        recipe_type = recipe_type.strip().lower()
+        recipes = list_recipes_by_type(recipe_type)
         
-        if not results:
-            return f"No {recipe_type} recipes found. Available types: chicken, soup, dessert, beef, seafood, pork, pasta, sauce, beverage, rice, beans, vegetables."
+        if not recipes:
+            return f"No {recipe_type} recipes found. Available types: {', '.join(list_recipe_types())}."
         
         recipe_names = []
         seen_names = set()
-        for result in results:
-            name = result.get('recipe_name', 'Unknown')
+        for recipe in recipes:
+            name = recipe.get('recipe_name', 'Unknown')
             if name not in seen_names:
                 recipe_names.append(name)
                 seen_names.add(name)
@@ -58,18 +102,33 @@ def recipe_list_by_type_function(recipe_type: str) -> str:
 
 def get_full_recipe_function(recipe_name: str) -> str:
     try:
-        results = search_recipes(recipe_name, k=1)
+        recipe = find_recipe_by_name(recipe_name)
+        exact = recipe is not None and recipe.get('match') == 'exact'
         
-        if not results:
-            return f"Recipe '{recipe_name}' not found. Try searching for similar recipes or list recipes by type first."
+        if not recipe:
+            results = search_recipes(recipe_name, k=1)
+            
+            if not results:
+                return f"Recipe '{recipe_name}' not found. Try searching for similar recipes or list recipes by type first."
+            
+            recipe = get_recipe_for_chunk(results[0].get('chunk_id'))
         
-        result = results[0]
-        recipe_name_found = result.get('recipe_name', 'Unknown Recipe')
-        servings = result.get('servings')
-        recipe_type = result.get('recipe_type', 'general')
-        content = result['content']
+        if recipe:
+            recipe_name_found = recipe['recipe_name']
+            servings = recipe.get('servings')
+            recipe_type = recipe.get('recipe_type', 'general')
+            content = get_full_recipe_text(recipe)
+        else:
+            result = results[0]
+            recipe_name_found = result.get('recipe_name', 'Unknown Recipe')
+            servings = result.get('servings')
+            recipe_type = result.get('recipe_type', 'general')
+            content = result['content']
         
-        response = f"**{recipe_name_found}**\n\n"
+        response = ""
+        if not exact:
+            response += f"No recipe is named exactly '{recipe_name}'; closest match: {recipe_name_found}\n\n"
+        response += f"**{recipe_name_found}**\n\n"
         response += f"*Type: {recipe_type}"
         if servings:
             response += f" | Servings: {servings}"
@@ -81,20 +140,31 @@ def get_full_recipe_function(recipe_name: str) -> str:
         return f"Error retrieving recipe: {str(e)}"
 
 
+def _format_web_results(query: str, data: Dict) -> str:
+    results = parse_snippets(data)
+    if not results or results.strip() == "":
+        return f"No web results found for: {query}"
+    
+    return f"**Web Search Results for '{query}':**\n\n{results}"
+
+
+WEB_SEARCH = {
+    "endpoint": "search",
+    "query": lambda query: query,
+    "ttl": SERPER_TTL_WEB,
+    "params": SERPER_SEARCH_PARAMS,
+    "format": _format_web_results,
+    "unavailable": "Web search is not available. Serper API key is not configured.",
+    "error": "Error searching the web: {error}",
+}
+
+
 def web_search_function(query: str) -> str:
-    try:
-        if not SERPER_API_KEY:
-            return "Web search is not available. Serper API key is not configured."
-        
-        search = GoogleSerperAPIWrapper(serper_api_key=SERPER_API_KEY)
-        results = search.run(query)
-        
-        if not results or results.strip() == "":
-            return f"No web results found for: {query}"
-        
-        return f"**Web Search Results for '{query}':**\n\n{results}"
-    except Exception as e:
-        return f"Error searching the web: {str(e)}"
+    return _serper_tool(WEB_SEARCH, query)
+
+
+async def aweb_search_function(query: str) -> str:
+    return await _aserper_tool(WEB_SEARCH, query)
 
 
 class RecipeScaleInput(BaseModel):
@@ -116,44 +186,65 @@ def recipe_scale_function_structured(recipe_text: str, target_servings: int) ->
         return f"Error scaling recipe: {str(e)}"
 
 
+def _substitution_query(ingredient: str, reason: str = "") -> str:
+    search_query = f"substitute for {ingredient} in Mexican cooking"
+    if reason:
+        search_query += f" {reason}"
+    return search_query
+
+
+def _format_substitutions(ingredient: str, data: Dict) -> str:
+    results = parse_snippets(data)
+    if not results or results.strip() == "":
+        return f"Could not find substitution info for '{ingredient}'. Common Mexican ingredient substitutes: cilantro → parsley, epazote → oregano, Mexican oregano → regular oregano, tomatillos → green tomatoes + lime."
+    
+    return f"**Substitutes for {ingredient}:**\n\n{results}"
+
+
+INGREDIENT_SUBSTITUTION = {
+    "endpoint": "search",
+    "query": _substitution_query,
+    "ttl": SERPER_TTL_REFERENCE,
+    "params": SERPER_SEARCH_PARAMS,
+    "format": _format_substitutions,
+    "unavailable": "Substitution lookup is not available without web search. However, common substitutions: cilantro → parsley, epazote → oregano, tomatillos → green tomatoes.",
+    "error": "Error finding substitutes: {error}",
+}
+
+
 def ingredient_substitution_function(ingredient: str, reason: str = "") -> str:
-    try:
-        if not SERPER_API_KEY:
-            return "Substitution lookup is not available without web search. However, common substitutions: cilantro → parsley, epazote → oregano, tomatillos → green tomatoes."
-        
-        search_query = f"substitute for {ingredient} in Mexican cooking"
-        if reason:
-            search_query += f" {reason}"
-        
-        search = GoogleSerperAPIWrapper(serper_api_key=SERPER_API_KEY)
-        results = search.run(search_query)
-        
-        if not results or results.strip() == "":
-            return f"Could not find substitution info for '{ingredient}'. Common Mexican ingredient substitutes: cilantro → parsley, epazote → oregano, Mexican oregano → regular oregano, tomatillos → green tomatoes + lime."
-        
-        return f"**Substitutes for {ingredient}:**\n\n{results}"
-        
-    except Exception as e:
-        return f"Error finding substitutes: {str(e)}"
+    return _serper_tool(INGREDIENT_SUBSTITUTION, ingredient, reason)
+
+
+async def aingredient_substitution_function(ingredient: str, reason: str = "") -> str:
+    return await _aserper_tool(INGREDIENT_SUBSTITUTION, ingredient, reason)
+
+
+def _format_technique(technique: str, data: Dict) -> str:
+    results = parse_snippets(data)
+    if not results or results.strip() == "":
+        return f"Could not find detailed info about '{technique}'. Try asking more specifically, like 'how do I toast chiles' or 'what is sofrito'."
+    
+    return f"**How to: {technique}**\n\n{results}"
+
+
+COOKING_TECHNIQUE = {
+    "endpoint": "search",
+    "query": lambda technique: f"how to {technique} Mexican cooking technique",
+    "ttl": SERPER_TTL_REFERENCE,
+    "params": SERPER_SEARCH_PARAMS,
+    "format": _format_technique,
+    "unavailable": "Technique lookup requires web search. I can explain basic techniques from memory - what would you like to know about {0}?",
+    "error": "Error looking up technique: {error}",
+}
 
 
 def cooking_technique_function(technique: str) -> str:
-    try:
-        if not SERPER_API_KEY:
-            return f"Technique lookup requires web search. I can explain basic techniques from memory - what would you like to know about {technique}?"
-        
-        search_query = f"how to {technique} Mexican cooking technique"
-        
-        search = GoogleSerperAPIWrapper(serper_api_key=SERPER_API_KEY)
-        results = search.run(search_query)
-        
-        if not results or results.strip() == "":
-            return f"Could not find detailed info about '{technique}'. Try asking more specifically, like 'how do I toast chiles' or 'what is sofrito'."
-        
-        return f"**How to: {technique}**\n\n{results}"
-        
-    except Exception as e:
-        return f"Error looking up technique: {str(e)}"
+    return _serper_tool(COOKING_TECHNIQUE, technique)
+
+
+async def acooking_technique_function(technique: str) -> str:
+    return await _aserper_tool(COOKING_TECHNIQUE, technique)
 
 
 def recipe_filter_by_criteria_function(criteria: str) -> str:
@@ -195,156 +286,135 @@ def recipe_filter_by_criteria_function(criteria: str) -> str:
         return f"Error filtering recipes: {str(e)}"
 
 
+def _format_videos(query: str, data: Dict) -> str:
+    videos = data.get('videos', [])
+    
+    if not videos:
+        return f"No cooking videos found for: {query}. Would you like the written recipe instead?"
+    
+    result_lines = []
+    
+    video_count = 0
+    for video in videos[:3]:
+        link = video.get('link', '')
+        
+        youtube_id = None
+        if 'youtube.com/watch?v=' in link:
+            youtube_id = link.split('watch?v=')[1].split('&')[0]
+        elif 'youtu.be/' in link:
+            youtube_id = link.split('youtu.be/')[1].split('?')[0]
+        
+        if youtube_id and len(youtube_id) == 11:
+            result_lines.append(f"- VIDEO:{youtube_id}")
+            video_count += 1
+    
+    if video_count == 0:
+        return "Found some videos but couldn't embed them. Would you like the written recipe instead?"
+    
+    return "\n".join(result_lines)
+
+
+VIDEO_SEARCH = {
+    "endpoint": "videos",
+    "query": lambda query: f"{query} recipe cooking tutorial how to make",
+    "ttl": SERPER_TTL_MEDIA,
+    "params": {"num": 3},
+    "format": _format_videos,
+    "unavailable": "Video search is not available. Serper API key is not configured.",
+    "timeout": "Video search timed out. Let me give you the written recipe instead!",
+    "unreachable": "Could not fetch videos right now. Would you like me to explain the recipe steps instead?",
+    "error": "Having trouble finding videos right now. Would you like me to walk you through the recipe steps instead?",
+}
+
+
 def video_search_function(query: str) -> str:
-    try:
-        if not SERPER_API_KEY:
-            return "Video search is not available. Serper API key is not configured."
-        
-        video_query = f"{query} recipe cooking tutorial how to make"
-        
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
-        
-        payload = {
-            'q': video_query,
-            'num': 3
-        }
-        
-        response = requests.post(
-            'https://google.serper.dev/videos',
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            return "Could not fetch videos right now. Would you like me to explain the recipe steps instead?"
-        
-        data = response.json()
-        videos = data.get('videos', [])
-        
-        if not videos:
-            return f"No cooking videos found for: {query}. Would you like the written recipe instead?"
-        
-        result_lines = []
-        
-        video_count = 0
-        for video in videos[:3]:
-            link = video.get('link', '')
-            
-            youtube_id = None
-            if 'youtube.com/watch?v=' in link:
-                youtube_id = link.split('watch?v=')[1].split('&')[0]
-            elif 'youtu.be/' in link:
-                youtube_id = link.split('youtu.be/')[1].split('?')[0]
-            
-            if youtube_id and len(youtube_id) == 11:
-                result_lines.append(f"- VIDEO:{youtube_id}")
-                video_count += 1
-        
-        if video_count == 0:
-            return f"Found some videos but couldn't embed them. Would you like the written recipe instead?"
-        
-        return "\n".join(result_lines)
-        
-    except requests.Timeout:
-        return "Video search timed out. Let me give you the written recipe instead!"
-    except Exception as e:
-        # print(f"Video search error: {str(e)}")
-        return "Having trouble finding videos right now. Would you like me to walk you through the recipe steps instead?"
+    return _serper_tool(VIDEO_SEARCH, query)
+
+
+async def avideo_search_function(query: str) -> str:
+    return await _aserper_tool(VIDEO_SEARCH, query)
+
+
+def _format_images(query: str, data: Dict) -> str:
+    images = data.get('images', [])
+    
+    if not images:
+        return f"No images found for: {query}. Try different search terms."
+    
+    result_lines = []
+    
+    image_count = 0
+    for img in images[:3]:
+        image_url = img.get('imageUrl', '')
+        if image_url:
+            result_lines.append(f"![Image {image_count + 1}]({image_url})")
+            image_count += 1
+    
+    if image_count == 0:
+        return f"Found some images but couldn't display them. Try searching online for '{query}'."
+    
+    return "\n".join(result_lines)
+
+
+IMAGE_SEARCH = {
+    "endpoint": "images",
+    "query": lambda query: f"{query} Mexican food cooking",
+    "ttl": SERPER_TTL_MEDIA,
+    "params": {"num": 3},
+    "format": _format_images,
+    "unavailable": "Image search is not available. Serper API key is not configured.",
+    "timeout": "Image search timed out. Try describing what you're looking for instead.",
+    "unreachable": "Could not fetch images right now. Try describing what you're looking for instead.",
+    "error": "Having trouble finding images right now. Can I help you in another way?",
+}
 
 
 def image_search_function(query: str) -> str:
-    try:
-        if not SERPER_API_KEY:
-            return "Image search is not available. Serper API key is not configured."
-        
-        image_query = f"{query} Mexican food cooking"
-        
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
-        
-        payload = {
-            'q': image_query,
-            'num': 3
-        }
-        
-        response = requests.post(
-            'https://google.serper.dev/images',
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            return "Could not fetch images right now. Try describing what you're looking for instead."
-        
-        data = response.json()
-        images = data.get('images', [])
-        
-        if not images:
-            return f"No images found for: {query}. Try different search terms."
-        
-        result_lines = []
-        
-        image_count = 0
-        for img in images[:3]:
-            image_url = img.get('imageUrl', '')
-            if image_url:
-                result_lines.append(f"![Image {image_count + 1}]({image_url})")
-                image_count += 1
-        
-        if image_count == 0:
-            return f"Found some images but couldn't display them. Try searching online for '{query}'."
-        
-        return "\n".join(result_lines)
-        
-    except requests.Timeout:
-        return "Image search timed out. Try describing what you're looking for instead."
-    except Exception as e:
-        # print(f"Image search error: {str(e)}")
-        return "Having trouble finding images right now. Can I help you in another way?"
+    return _serper_tool(IMAGE_SEARCH, query)
+
+
+async def aimage_search_function(query: str) -> str:
+    return await _aserper_tool(IMAGE_SEARCH, query)
 
 
 def record_unknown_question_function(question: str) -> str:
     try:
-        if not PUSHOVER_USER or not PUSHOVER_TOKEN:
-            # print(f"⚠️ Unanswered question (Pushover not configured): {question}")
-            return "Question recorded locally (notification system not configured)."
-        
-        payload = {
-            "token": PUSHOVER_TOKEN,
-            "user": PUSHOVER_USER,
-            "message": f"Unanswered question from SazónBot:\n\n{question}",
-            "title": "SazónBot - Unanswered Question",
-            "priority": 0,
-        }
-        
-        response = requests.post(
-            "https://api.pushover.net/1/messages.json",
-            data=payload,
-            timeout=5
-        )
+        get_unknown_question_queue().enqueue(question)
         
-        if response.status_code == 200:
-            # print(f"✅ Pushover notification sent for question: {question}")
-            return "Question recorded and notification sent successfully."
-        else:
-            # print(f"⚠️ Pushover failed ({response.status_code}): {question}")
-            return "Question recorded but notification failed."
+        if not pushover_configured():
+            return "Question recorded locally (notification system not configured)."
+        return "Question recorded. It will be included in the next notification digest."
         
     except Exception as e:
         # print(f"❌ Error recording question: {str(e)}")
         return f"Error recording question: {str(e)}"
 
 
+async def arecord_unknown_question_function(question: str) -> str:
+    return await asyncio.to_thread(record_unknown_question_function, question)
+
+
+# Vector-store tools are CPU-bound (FAISS, BM25); run them off the event loop
+async def arecipe_search_function(query: str) -> str:
+    return await asyncio.to_thread(recipe_search_function, query)
+
+
+async def arecipe_list_by_type_function(recipe_type: str) -> str:
+    return await asyncio.to_thread(recipe_list_by_type_function, recipe_type)
+
+
+async def aget_full_recipe_function(recipe_name: str) -> str:
+    return await asyncio.to_thread(get_full_recipe_function, recipe_name)
+
+
+async def arecipe_filter_by_criteria_function(criteria: str) -> str:
+    return await asyncio.to_thread(recipe_filter_by_criteria_function, criteria)
+
+
 recipe_search_tool = Tool(
     name="recipe_search_tool",
     func=recipe_search_function,
+    coroutine=arecipe_search_function,
     description="""Search the García family recipe database for Mexican recipes using semantic similarity. 
     Use this tool when the user asks about specific dishes (e.g., 'pozole', 'fajitas', 'chicken soup'), 
     ingredients (e.g., 'recipes with chicken', 'seafood dishes'), or general food queries (e.g., 'something spicy'). 
@@ -357,6 +427,7 @@ recipe_search_tool = Tool(
 recipe_list_by_type_tool = Tool(
     name="recipe_list_by_type_tool",
     func=recipe_list_by_type_function,
+    coroutine=arecipe_list_by_type_function,
     description="""List all available recipes filtered by a specific type/category. 
     Use this when users want to browse or see all recipes in a category (e.g., "what chicken recipes do you have?", 
     "show me all desserts", "list your soups"). Returns ONLY recipe names, not full content.
@@ -370,6 +441,7 @@ recipe_list_by_type_tool = Tool(
 get_full_recipe_tool = Tool(
     name="get_full_recipe_tool",
     func=get_full_recipe_function,
+    coroutine=aget_full_recipe_function,
     description="""Get the complete recipe with all ingredients and instructions by name. 
     Use this tool when you know the exact recipe name and need the full details, or when the user 
     explicitly asks for a specific recipe by name (e.g., "get me the pozole recipe", "show me Fajitas a la Vizcaína").
@@ -382,6 +454,7 @@ get_full_recipe_tool = Tool(
 web_search_tool = Tool(
     name="web_search_tool",
     func=web_search_function,
+    coroutine=aweb_search_function,
     description="""Search the web for current information about Mexican food, cooking, and recipes. 
     Use this tool for: recipe history and cultural context, cooking technique explanations, 
     ingredient information not in our database, food trends, nutritional information, 
@@ -409,6 +482,7 @@ recipe_scale_tool = StructuredTool.from_function(
 ingredient_substitution_tool = Tool(
     name="ingredient_substitution_tool",
     func=ingredient_substitution_function,
+    coroutine=aingredient_substitution_function,
     description="""Find substitutes for ingredients in Mexican cooking.
     Use when users ask about replacing ingredients due to allergies, availability, or dietary preferences
     (e.g., "can I use chicken stock instead of water?", "I'm allergic to cilantro", "no epazote available").
@@ -420,6 +494,7 @@ ingredient_substitution_tool = Tool(
 cooking_technique_tool = Tool(
     name="cooking_technique_tool",
     func=cooking_technique_function,
+    coroutine=acooking_technique_function,
     description="""Explain Mexican cooking techniques and methods.
     Use when users ask HOW to do something in cooking (e.g., "how do I toast dried chiles?", 
     "what is sofrito?", "how to properly cook pozole?", "technique for making salsa").
@@ -431,6 +506,7 @@ cooking_technique_tool = Tool(
 recipe_filter_by_criteria_tool = Tool(
     name="recipe_filter_by_criteria_tool",
     func=recipe_filter_by_criteria_function,
+    coroutine=arecipe_filter_by_criteria_function,
     description="""Filter recipes by complex criteria like cooking time, difficulty, or ingredients to avoid.
     Use for complex searches with multiple requirements (e.g., "quick recipes under 30 minutes", 
     "easy soups for beginners", "recipes without dairy", "vegetarian options").
@@ -442,6 +518,7 @@ recipe_filter_by_criteria_tool = Tool(
 video_search_tool = Tool(
     name="video_search_tool",
     func=video_search_function,
+    coroutine=avideo_search_function,
     description="""Search for cooking videos and video tutorials on YouTube.
     Use when users want to SEE how something is made, ask for video demonstrations,
     or use words like "show me", "video", "watch", "tutorial" (e.g., "show me a video on making pozole", 
@@ -456,6 +533,7 @@ video_search_tool = Tool(
 image_search_tool = Tool(
     name="image_search_tool",
     func=image_search_function,
+    coroutine=aimage_search_function,
     description="""Search for food and ingredient images.
     Use when users want to SEE what something looks like, ask for pictures or photos,
     or use words like "show me an image", "what does it look like", "picture of", "imagen de" 
@@ -470,10 +548,11 @@ image_search_tool = Tool(
 record_unknown_question_tool = Tool(
     name="record_unknown_question_tool",
     func=record_unknown_question_function,
+    coroutine=arecord_unknown_question_function,
     description="""Record questions that you cannot answer about Mexican food or cooking.
     Use this ONLY when you genuinely don't know the answer to a food/cooking question, 
     couldn't find it in recipes, and web search didn't help either.
-    This sends a notification to track knowledge gaps.
+    The question is queued and sent to the team in a notification digest to track knowledge gaps.
     DO NOT use this for off-topic questions (politics, etc.) - only for legitimate food questions you can't answer.
     
     Input: The question that couldn't be answered
@@ -0,0 +1,83 @@
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from app.utils.name_index import content_words
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent- and case-insensitive word tokens without stopwords."""
+    return content_words(text)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an in-memory inverted index.
+    
+    Used alongside FAISS so that rare Spanish ingredient words ("epazote",
+    "nopales", "maciza") are matched literally rather than semantically.
+    """
+    
+    def __init__(self, doc_ids: Sequence[str], texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.doc_ids = list(doc_ids)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_lengths: List[int] = []
+        
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                self.postings[term][i] = count
+        
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n = len(self.doc_lengths)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+    
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float, int]]:
+        """Return up to k (doc_id, score, matched_terms) tuples, best first."""
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for i, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[i] += 1
+        
+        ranked = sorted(scores, key=lambda i: scores[i], reverse=True)[:k]
+        return [(self.doc_ids[i], scores[i], matched[i]) for i in ranked]
+    
+    def is_strong_match(self, query: str, results: List[Tuple[str, float, int]]) -> bool:
+        """
+        True when every content word of the query is in the vocabulary and the
+        top hit contains all of them - a keyword answer good enough to skip
+        the embedding call.
+        """
+        terms = set(tokenize(query))
+        if not terms or not results:
+            return False
+        if any(term not in self.postings for term in terms):
+            return False
+        return results[0][2] == len(terms)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merge several ranked id lists into one, scoring each id by sum(1 / (k + rank))."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
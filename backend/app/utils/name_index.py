@@ -0,0 +1,145 @@
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+# Accent-folded Spanish/English function words, and words users add around a
+# recipe name, that carry no lexical signal
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "o", "para", "por", "que", "se", "sin", "su", "un", "una", "y", "como", "mi",
+    "the", "and", "of", "with", "for", "to", "in", "an", "or", "my", "me",
+    "recipe", "recipes", "receta", "recetas", "how", "make", "hacer",
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a recipe name for matching: strip accents, casefold,
+    drop punctuation and collapse whitespace.
+    
+    Examples:
+        "FAJITAS A LA VIZCAÍNA" -> "fajitas a la vizcaina"
+        "Sopa de pasta (codito)" -> "sopa de pasta codito"
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    stripped = re.sub(r"[^\w\s]", " ", stripped.casefold())
+    return " ".join(stripped.split())
+
+
+def content_words(text: str) -> List[str]:
+    """Accent- and case-insensitive words of text without stopwords."""
+    return [t for t in normalize_name(text).split() if len(t) > 1 and t not in STOPWORDS]
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized string, padded at word boundaries."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RecipeNameIndex:
+    """
+    Lookup of recipe names: accent- and case-insensitive exact match first,
+    then a fuzzy fallback that only answers when it is sure.
+    
+    A fuzzy match needs every content word of the query (stopwords dropped)
+    to match a word of the name, allowing typos like "posole" for "pozole".
+    Shared words alone ("de", "pollo", "rojo") never make a match, and a
+    query that fits several names equally well ("sopa de papa") gets None,
+    so the caller falls back to vector search.
+    """
+    
+    def __init__(self, names: Iterable[str], min_score: float = 0.8):
+        self.min_score = min_score
+        self._exact: Dict[str, str] = {}
+        self._words: Dict[str, List[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: Set[str] = set()
+        
+        for name in names:
+            normalized = normalize_name(name)
+            if not normalized or normalized in self._exact:
+                continue
+            self._exact[normalized] = name
+            self._words[normalized] = content_words(normalized)
+            self._vocabulary.update(self._words[normalized])
+            for word in self._words[normalized]:
+                for gram in trigrams(word):
+                    self._postings[gram].add(normalized)
+    
+    def __len__(self) -> int:
+        return len(self._exact)
+    
+    def exact(self, query: str) -> Optional[str]:
+        return self._exact.get(normalize_name(query))
+    
+    def name_words(self, text: str) -> FrozenSet[str]:
+        """Content words of text that occur in some recipe name, e.g. {"mole", "verde"}."""
+        return frozenset(word for word in content_words(text) if word in self._vocabulary)
+    
+    def _score(self, words: List[str], candidate: str) -> float:
+        """
+        Mean similarity of each query word to its closest word of the name, or
+        0 if any query word has no counterpart of at least min_score.
+        """
+        candidate_words = self._words[candidate]
+        if not candidate_words:
+            return 0.0
+        
+        scores = []
+        for word in words:
+            best = max(difflib.SequenceMatcher(None, word, other).ratio() for other in candidate_words)
+            if best < self.min_score:
+                return 0.0
+            scores.append(best)
+        return sum(scores) / len(scores)
+    
+    def fuzzy(self, query: str, max_candidates: int = 50) -> Optional[Dict]:
+        words = content_words(query)
+        if not words:
+            return None
+        
+        shared_counts: Dict[str, int] = defaultdict(int)
+        for word in words:
+            for gram in trigrams(word):
+                for candidate in self._postings.get(gram, ()):
+                    shared_counts[candidate] += 1
+        
+        candidates = sorted(shared_counts, key=lambda c: (-shared_counts[c], c))[:max_candidates]
+        scored = sorted(((self._score(words, c), c) for c in candidates), reverse=True)
+        scored = [(score, candidate) for score, candidate in scored if score > 0]
+        if not scored:
+            return None
+        
+        # Several names contain the query equally well: let vector search decide
+        if len(scored) > 1 and scored[1][0] >= scored[0][0]:
+            return None
+        
+        score, candidate = scored[0]
+        return {"recipe_name": self._exact[candidate], "score": round(score, 4), "match": "fuzzy"}
+    
+    def lookup(self, query: str) -> Optional[Dict]:
+        """Return {recipe_name, score, match} for the best name match, or None."""
+        name = self.exact(query)
+        if name is not None:
+            return {"recipe_name": name, "score": 1.0, "match": "exact"}
+        return self.fuzzy(query)
+
+
+# ============================================================================
+# TESTING
+# ============================================================================
+
+if __name__ == "__main__":
+    index = RecipeNameIndex([
+        "FAJITAS A LA VIZCAÍNA",
+        "POZOLE BLANCO DE LAS BENITEZ",
+        "PECHUGA EN SALSA VERDE CON NOPALES",
+        "SOPA DE PASTA (CODITO) CON ESPINACA",
+    ])
+    
+    for query in ["fajitas a la vizcaina", "pozole", "posole blanco", "pechuga salsa verde", "pozole recipe", "chicken"]:
+        print(f"{query!r:30} -> {index.lookup(query)}")
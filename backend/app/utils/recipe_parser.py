@@ -129,6 +129,30 @@ def scale_recipe(recipe_text: str, target_servings: int) -> str:
     return scaled_recipe
 
 
+def merge_overlapping_chunks(chunks: List[str], max_overlap: int = 400, min_overlap: int = 10) -> str:
+    """
+    Stitch consecutive text-splitter chunks back into one text, removing the
+    overlap each chunk repeats from the end of the previous one.
+    """
+    if not chunks:
+        return ""
+    
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        overlap = 0
+        for size in range(min(len(merged), len(chunk), max_overlap), min_overlap - 1, -1):
+            if merged.endswith(chunk[:size]):
+                overlap = size
+                break
+        
+        if overlap:
+            merged += chunk[overlap:]
+        else:
+            merged += "\n\n" + chunk
+    
+    return merged
+
+
 # ============================================================================
 # TESTING
 # ============================================================================
@@ -1,20 +1,85 @@
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
+import faiss
+import hashlib
+import json
+import numpy as np
 import os
 import re
+import shutil
+import tempfile
+import threading
 from typing import List, Dict
 from dotenv import load_dotenv
+from app.config import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_DISK_SIZE
+from app.config import VECTOR_INDEX_SPEC, INDEX_MMAP
+from app.docstore import ColumnarDocstore, write_columnar_docstore, columnar_docstore_exists
+from app.embedding_cache import CachedEmbeddings
+from app.embeddings import create_embeddings
+from app.ingest import build_faiss_store, add_chunks_to_store, delete_chunks_from_store, clear_checkpoints, iter_pdf_pages
+from app.index_spec import (
+    parse_index_spec,
+    format_index_spec,
+    apply_search_params,
+    build_params,
+    runtime_spec,
+    exact_filtered_search,
+)
+from app.utils.name_index import RecipeNameIndex
+from app.utils.bm25 import BM25Index, reciprocal_rank_fusion
+from app.utils.recipe_parser import merge_overlapping_chunks
 
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 
-VECTOR_STORE_PATH = os.path.join(PROJECT_ROOT, "data", "recipe_vectors")
+VECTOR_STORE_PATH = os.getenv("RECIPE_VECTORS_PATH", os.path.join(PROJECT_ROOT, "data", "recipe_vectors"))
 RECIPE_PDF_PATH = os.path.join(PROJECT_ROOT, "data", "recipes.pdf")
+INDEX_FILES = ("index.faiss", "index.pkl")
+RRF_K = 60
+CATALOG_FILE = "catalog.json"
+MANIFEST_FILE = "manifest.json"
+INDEX_META_FILE = "index_meta.json"
+
+# Indexes saved before index_meta.json existed were built with OpenAI's default model
+LEGACY_EMBEDDING_BACKEND = "openai:text-embedding-ada-002"
+
+# Process-wide vector store handle shared by every tool call
+_store_lock = threading.RLock()
+_store_state = {
+    "vector_store": None,
+    "signature": None,
+    "digest": None,
+    "artifacts": {},
+}
+_embeddings = None
+_embedding_backend_id = None
+
+def get_embeddings():
+    """Return the shared embeddings provider; remote providers get a query-embedding cache"""
+    global _embeddings, _embedding_backend_id
+    if _embeddings is None:
+        base, backend_id = create_embeddings()
+        if backend_id.startswith("openai:"):
+            base = CachedEmbeddings(
+                base,
+                model_name=backend_id,
+                max_entries=EMBEDDING_CACHE_SIZE,
+                ttl_seconds=EMBEDDING_CACHE_TTL,
+                persist_path=EMBEDDING_CACHE_PATH,
+                max_disk_entries=EMBEDDING_CACHE_DISK_SIZE,
+            )
+        _embeddings = base
+        _embedding_backend_id = backend_id
+    return _embeddings
+
+def get_embedding_backend_id() -> str:
+    """Identifier of the configured embedding provider, e.g. 'openai:text-embedding-ada-002'"""
+    get_embeddings()
+    return _embedding_backend_id
 
 def load_pdf_recipes(file_path: str = RECIPE_PDF_PATH):
     """Load recipes from PDF file using LangChain's PyPDFLoader"""
@@ -148,65 +213,133 @@ def debug_recipe_extraction():
         print(unknown[0]["text"][:500])
         print("=" * 60)
 
-def parse_recipes_from_pdf(documents):
-    """Parse PDF documents and extract individual recipes with metadata"""
-    #print("🔍 Parsing recipes and extracting metadata...")
-    
-    all_text = "\n".join([doc.page_content for doc in documents])
-    
-    recipe_pattern = r'Receta:\s*[A-ZÁÉÍÓÚÑ\(\)\s]+'
-    
-    recipe_starts = []
-    for match in re.finditer(recipe_pattern, all_text, re.IGNORECASE):
-        recipe_starts.append(match.start())
+RECIPE_START_PATTERN = re.compile(r'Receta:\s*[A-ZÁÉÍÓÚÑ\(\)\s]+', re.IGNORECASE)
+
+def iter_recipes_from_pages(pages):
+    """Stream recipes with metadata out of (page_number, text) pairs.
     
-    recipes = []
+    Equivalent to splitting the joined text of all pages at every
+    'Receta:' heading, but only the recipe currently being read is kept
+    in memory, with its state carried across page breaks. Falls back to
+    one recipe per page (skipping the first) when fewer than two
+    headings exist.
+    """
+    buffer = ""
+    in_recipe = False
+    starts = 0
+    fallback_pages = []
     
-    if len(recipe_starts) > 1:
-        for i in range(len(recipe_starts)):
-            start = recipe_starts[i]
-            end = recipe_starts[i + 1] if i + 1 < len(recipe_starts) else len(all_text)
-            recipe_text = all_text[start:end].strip()
+    for i, (page_number, text) in enumerate(pages):
+        if starts < 2:
+            fallback_pages.append((page_number, text))
+        
+        buffer += ("\n" if i else "") + text
+        search_from = 1 if in_recipe else 0
+        
+        while True:
+            match = RECIPE_START_PATTERN.search(buffer, search_from)
+            if not match:
+                break
             
-            if len(recipe_text) > 150 and "Ingredientes" in recipe_text:
-                metadata = extract_recipe_metadata(recipe_text)
-                recipes.append({
-                    "text": recipe_text,
-                    "metadata": metadata
-                })
-    else:
-        for i, doc in enumerate(documents):
-            if i == 0:
-                continue
-            metadata = extract_recipe_metadata(doc.page_content)
-            metadata["page"] = doc.metadata.get("page", i)
-            recipes.append({
-                "text": doc.page_content,
-                "metadata": metadata
-            })
+            starts += 1
+            if in_recipe:
+                recipe = _recipe_from_text(buffer[:match.start()])
+                if recipe:
+                    yield recipe
+            
+            buffer = buffer[match.start():]
+            in_recipe = True
+            search_from = 1
+            if starts >= 2:
+                fallback_pages = []
+        
+        if not in_recipe:
+            # Only a heading split by the page join can still start here
+            buffer = buffer[-32:]
     
-    #print(f"✅ Extracted {len(recipes)} recipes with metadata")
+    if starts > 1:
+        recipe = _recipe_from_text(buffer)
+        if recipe:
+            yield recipe
+        return
     
+    for i, (page_number, text) in enumerate(fallback_pages):
+        if i == 0:
+            continue
+        metadata = extract_recipe_metadata(text)
+        metadata["page"] = page_number if page_number is not None else i
+        yield {
+            "text": text,
+            "metadata": metadata
+        }
+
+def _recipe_from_text(text: str):
+    recipe_text = text.strip()
+    if len(recipe_text) > 150 and "Ingredientes" in recipe_text:
+        return {
+            "text": recipe_text,
+            "metadata": extract_recipe_metadata(recipe_text)
+        }
+    return None
+
+def _report_unknown_recipes(recipes: List[Dict]):
     unknown_count = sum(1 for r in recipes if r["metadata"]["recipe_name"] == "Unknown Recipe")
     if unknown_count > 0:
         print(f"⚠️  Warning: {unknown_count} recipes still have 'Unknown Recipe' as name")
     else:
-        print(f"🎉 All recipe names extracted successfully!")
+        print("🎉 All recipe names extracted successfully!")
+
+def parse_recipes_from_pdf(documents):
+    """Parse PDF documents and extract individual recipes with metadata"""
+    #print("🔍 Parsing recipes and extracting metadata...")
     
-    # if recipes:
-    #     #print(f"\n📋 Sample recipe metadata:")
-    #     sample = recipes[0]["metadata"]
-    #     for key, value in sample.items():
-    #         #print(f"   - {key}: {value}")
+    pages = ((doc.metadata.get("page", i), doc.page_content) for i, doc in enumerate(documents))
+    recipes = list(iter_recipes_from_pages(pages))
     
+    #print(f"✅ Extracted {len(recipes)} recipes with metadata")
+    
+    _report_unknown_recipes(recipes)
+    
+    return recipes
+
+def load_recipes_from_pdf(file_path: str = RECIPE_PDF_PATH):
+    """Extract pages in parallel and parse recipes from them as a stream"""
+    recipes = list(iter_recipes_from_pages(iter_pdf_pages(file_path)))
+    _report_unknown_recipes(recipes)
     return recipes
 
-def create_recipe_chunks(recipes: List[Dict]):
-    """Split recipes into optimal chunks while preserving metadata and cleaning text"""
+def recipe_content_hash(recipe: Dict) -> str:
+    """Stable content hash of a parsed recipe, used to detect new or changed recipes"""
+    return hashlib.sha1(recipe["text"].encode("utf-8")).hexdigest()
+
+def recipe_keys(recipes: List[Dict]) -> List[str]:
+    """Manifest key per recipe: its content hash, plus "#n" for the n-th repeat of identical text.
+    
+    A recipe printed twice in the PDF gets two keys, so each copy keeps its
+    own chunks and removing one copy leaves the other indexed.
+    """
+    seen = {}
+    keys = []
+    for recipe in recipes:
+        recipe_hash = recipe_content_hash(recipe)
+        occurrence = seen.get(recipe_hash, 0)
+        seen[recipe_hash] = occurrence + 1
+        keys.append(recipe_hash if occurrence == 0 else f"{recipe_hash}#{occurrence}")
+    return keys
+
+def create_recipe_chunks(recipes: List[Dict], keys: List[str] = None):
+    """Split recipes into optimal chunks while preserving metadata and cleaning text.
+    
+    keys are the recipes' manifest keys (see recipe_keys); pass them when
+    chunking a subset of the PDF's recipes so repeats keep their occurrence.
+    """
     #print("✂️  Splitting recipes into chunks...")
     
+    if keys is None:
+        keys = recipe_keys(recipes)
+    
     cleaned_recipes = []
-    for recipe in recipes:
+    for recipe, key in zip(recipes, keys):
         text = recipe["text"]
         text = ' '.join(text.split())
         text = text.replace(' Ingredientes: ', '\n\nIngredientes:\n')
@@ -216,7 +349,9 @@ def create_recipe_chunks(recipes: List[Dict]):
         
         cleaned_recipes.append({
             "text": text,
-            "metadata": recipe["metadata"]
+            "metadata": recipe["metadata"],
+            "hash": recipe_content_hash(recipe),
+            "key": key
         })
     
     text_splitter = RecursiveCharacterTextSplitter(
@@ -235,8 +370,14 @@ def create_recipe_chunks(recipes: List[Dict]):
             metadata = recipe["metadata"].copy()
             metadata["chunk_index"] = i
             metadata["total_chunks"] = len(chunks)
+            metadata["recipe_hash"] = recipe["hash"]
+            id_prefix = recipe["hash"][:16]
+            if recipe["key"] != recipe["hash"]:
+                metadata["recipe_key"] = recipe["key"]
+                id_prefix += "." + recipe["key"].rpartition("#")[2]
             
             doc = Document(
+                id=f"{id_prefix}-{i}",
                 page_content=chunk,
                 metadata=metadata
             )
@@ -246,41 +387,138 @@ def create_recipe_chunks(recipes: List[Dict]):
     
     return all_chunks
 
+def _write_json_atomic(file_path: str, data, **kwargs):
+    """Write JSON beside file_path and swap it in, so readers never see a partial file"""
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, file_path)
+
+def save_store_files(vector_store, path: str = VECTOR_STORE_PATH):
+    """Write index.faiss and index.pkl into a temp directory and os.replace them into path.
+    
+    Serving workers may have index.faiss memory-mapped; truncating and
+    rewriting it in place (as save_local does) kills them with SIGBUS.
+    A replaced file keeps its old inode alive for existing mappings.
+    """
+    os.makedirs(path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-index-", dir=path)
+    try:
+        vector_store.save_local(tmp_dir)
+        for name in INDEX_FILES:
+            os.replace(os.path.join(tmp_dir, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
 def create_vector_store():
     """Create and save FAISS vector store from recipe PDF"""
     #print("=" * 50)
     #print("🚀 Creating Enhanced Vector Store from PDF")
     #print("=" * 50)
     
-    documents = load_pdf_recipes()
-    recipes = parse_recipes_from_pdf(documents)
+    recipes = load_recipes_from_pdf()
     chunks = create_recipe_chunks(recipes)
     
     #print("🧠 Creating embeddings and building vector store...")
     #print("   (This may take a minute...)")
     
-    embeddings = OpenAIEmbeddings()
-    vector_store = FAISS.from_documents(chunks, embeddings)
+    embeddings = get_embeddings()
+    index_spec = get_configured_index_spec()
+    vector_store, stats = build_faiss_store(chunks, embeddings, index_spec)
+    print(f"🧠 Embedded {stats['embedded_chunks']} chunks ({stats['chunks_per_second']} chunks/s, "
+          f"{stats['resumed_batches']} batches resumed from checkpoints)")
     
-    os.makedirs(os.path.dirname(VECTOR_STORE_PATH), exist_ok=True)
-    vector_store.save_local(VECTOR_STORE_PATH)
+    save_store_files(vector_store)
+    save_index_artifacts(vector_store, index_spec)
+    clear_checkpoints()
     
     #print(f"💾 Vector store saved to {VECTOR_STORE_PATH}/")
     #print("=" * 50)
     
     return vector_store
 
-def load_vector_store():
-    """Load existing FAISS vector store from disk"""
-    embeddings = OpenAIEmbeddings()
+def update_vector_store():
+    """Re-index only the recipes that are new or changed since the last build.
+    
+    Recipes are identified by content hash and, for identical copies, by
+    occurrence (see recipe_keys and manifest.json). Chunks of
+    removed or edited recipes are deleted in place and only new recipe
+    text is embedded. Falls back to a full rebuild for indexes built
+    before manifests existed, with another embedding backend, or with
+    different VECTOR_INDEX_SPEC build parameters.
+    """
+    manifest = load_manifest()
+    index_spec = get_configured_index_spec()
+    if manifest is None or _index_signature() is None or \
+            load_index_meta().get("embedding_backend") != get_embedding_backend_id() or \
+            build_params(get_built_index_spec()) != build_params(index_spec):
+        create_vector_store()
+        return {"mode": "full", "added": len(load_manifest() or {}), "removed": 0}
+    
+    parsed = load_recipes_from_pdf()
+    recipes = dict(zip(recipe_keys(parsed), parsed))
+    
+    removed = [h for h in manifest if h not in recipes]
+    added = [h for h in recipes if h not in manifest]
+    if not removed and not added:
+        return {"mode": "incremental", "added": 0, "removed": 0}
+    
+    vector_store = load_vector_store(read_only=False)
+    stale_ids = [doc_id for h in removed for doc_id in manifest[h]["chunk_ids"]]
+    if stale_ids:
+        vector_store = delete_chunks_from_store(vector_store, stale_ids, index_spec)
+    
+    chunks = create_recipe_chunks([recipes[key] for key in added], keys=added)
+    if chunks:
+        add_chunks_to_store(vector_store, chunks)
+    
+    save_store_files(vector_store)
+    save_index_artifacts(vector_store, index_spec)
+    clear_checkpoints()
+    
+    return {"mode": "incremental", "added": len(added), "removed": len(removed), "embedded_chunks": len(chunks)}
+
+def _read_index_mmap(path: str):
+    """Open index.faiss memory-mapped and read-only, falling back to a normal read"""
+    index_path = os.path.join(path, "index.faiss")
+    try:
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(index_path)
+
+def _load_read_only(embeddings, path: str = VECTOR_STORE_PATH):
+    """Load the index without unpickling, or None if the columnar docstore is missing or stale"""
+    if not columnar_docstore_exists(path):
+        return None
+    
+    docstore = ColumnarDocstore(path)
+    if docstore.index_digest != _index_digest(path):
+        return None
+    
+    return FAISS(embeddings, _read_index_mmap(path), docstore, docstore.index_to_docstore_id)
+
+def load_vector_store(read_only: bool = True):
+    """Load existing FAISS vector store from disk.
+    
+    By default the index is memory-mapped and the docstore read from the
+    columnar docstore files, so workers share pages and skip the pickle. Pass
+    read_only=False for a store that can be modified and saved.
+    """
+    embeddings = get_embeddings()
     
     if os.path.exists(VECTOR_STORE_PATH):
         #print(f"📂 Loading existing vector store from {VECTOR_STORE_PATH}/")
-        vector_store = FAISS.load_local(
-            VECTOR_STORE_PATH, 
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
+        check_embedding_backend()
+        vector_store = None
+        if read_only and INDEX_MMAP:
+            vector_store = _load_read_only(embeddings)
+        if vector_store is None:
+            vector_store = FAISS.load_local(
+                VECTOR_STORE_PATH, 
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+        apply_search_params(vector_store.index, runtime_spec(get_built_index_spec(), get_configured_index_spec()))
         #print("✅ Vector store loaded successfully")
         return vector_store
     else:
@@ -288,31 +526,411 @@ def load_vector_store():
         #print("🔨 Creating new vector store...")
         return create_vector_store()
 
-def search_recipes(query: str, k: int = 1, recipe_type: str = None):
-    """Search for recipes using similarity search - returns only best match"""
+def build_type_selectors(vector_store) -> Dict:
+    """One FAISS ID selector per recipe_type, over positions in the main index.
+    
+    A filtered query scores every selected position of the main index (see
+    exact_filtered_search), so no vectors are copied and any SQ8/PQ
+    compression is kept. Each value is (IDSelectorBitmap, bitmap, count);
+    the bitmap must outlive the selector.
+    """
+    ntotal = vector_store.index.ntotal
+    masks = {}
+    if isinstance(vector_store.docstore, ColumnarDocstore):
+        docstore = vector_store.docstore
+        for recipe_type in docstore.tables["types"]:
+            masks[recipe_type] = docstore.mask(recipe_type=recipe_type)
+    else:
+        for position, doc_id in vector_store.index_to_docstore_id.items():
+            doc = vector_store.docstore.search(doc_id)
+            recipe_type = doc.metadata.get("recipe_type", "general")
+            masks.setdefault(recipe_type, np.zeros(ntotal, dtype=np.bool_))[position] = True
+    
+    selectors = {}
+    for recipe_type, mask in masks.items():
+        bitmap = np.packbits(np.asarray(mask[:ntotal], dtype=np.bool_), bitorder="little")
+        # IDSelectorBitmap's size is the bitmap's length in bytes
+        selectors[recipe_type] = (faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)), bitmap, int(mask.sum()))
+    
+    return selectors
+
+def build_recipe_catalog(vector_store) -> Dict:
+    """Group the indexed chunks back into recipes (name, type, servings, chunk ids).
+    
+    Chunks are stored in index order and every recipe starts at chunk_index 0,
+    so a new catalog entry begins whenever chunk_index resets.
+    """
+    recipes = []
+    for position in sorted(vector_store.index_to_docstore_id):
+        doc_id = vector_store.index_to_docstore_id[position]
+        metadata = vector_store.docstore.search(doc_id).metadata
+        
+        if not recipes or metadata.get("chunk_index", 0) == 0:
+            recipes.append({
+                "recipe_name": metadata.get("recipe_name", "Unknown Recipe"),
+                "recipe_type": metadata.get("recipe_type", "general"),
+                "servings": metadata.get("servings"),
+                "chunk_ids": []
+            })
+        recipes[-1]["chunk_ids"].append(doc_id)
+    
+    return _index_catalog({"recipes": recipes})
+
+def _index_catalog(catalog: Dict) -> Dict:
+    """Add the name, type and chunk lookup tables to a catalog"""
+    if "chunks" not in catalog:
+        catalog["chunks"] = {
+            doc_id: [i, chunk_index]
+            for i, recipe in enumerate(catalog["recipes"])
+            for chunk_index, doc_id in enumerate(recipe["chunk_ids"])
+        }
+    
+    by_name = {}
+    by_type = {}
+    for i, recipe in enumerate(catalog["recipes"]):
+        by_name.setdefault(recipe["recipe_name"], []).append(i)
+        by_type.setdefault(recipe["recipe_type"], []).append(i)
+    
+    catalog["by_name"] = by_name
+    catalog["by_type"] = by_type
+    return catalog
+
+def save_recipe_catalog(catalog: Dict, path: str = VECTOR_STORE_PATH):
+    """Write the recipe catalog next to index.pkl"""
+    _write_json_atomic(os.path.join(path, CATALOG_FILE), {
+        "index_digest": _index_digest(path),
+        "recipes": catalog["recipes"],
+        "chunks": catalog["chunks"]
+    }, ensure_ascii=False)
+
+def load_recipe_catalog(path: str = VECTOR_STORE_PATH, index_digest: str = None):
+    """Read the saved recipe catalog, or None if missing or built for another index"""
+    catalog_path = os.path.join(path, CATALOG_FILE)
+    if not os.path.exists(catalog_path):
+        return None
+    
+    with open(catalog_path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    if index_digest and catalog.get("index_digest") != index_digest:
+        return None
+    
+    return _index_catalog(catalog)
+
+def build_manifest(vector_store):
+    """Map each recipe key (content hash, "#n" for repeats) to its recipe name and chunk ids.
+    
+    Returns None for indexes whose chunks carry no recipe_hash.
+    """
+    manifest = {}
+    for position in sorted(vector_store.index_to_docstore_id):
+        doc_id = vector_store.index_to_docstore_id[position]
+        metadata = vector_store.docstore.search(doc_id).metadata
+        recipe_hash = metadata.get("recipe_hash")
+        if recipe_hash is None:
+            return None
+        entry = manifest.setdefault(metadata.get("recipe_key", recipe_hash), {
+            "recipe_name": metadata.get("recipe_name", "Unknown Recipe"),
+            "chunk_ids": []
+        })
+        entry["chunk_ids"].append(doc_id)
+    return manifest
+
+def save_manifest(manifest: Dict, path: str = VECTOR_STORE_PATH):
+    _write_json_atomic(os.path.join(path, MANIFEST_FILE), manifest, ensure_ascii=False)
+
+def load_manifest(path: str = VECTOR_STORE_PATH):
+    """Read the recipe content-hash manifest, or None if the index has none"""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_index_meta(vector_store, index_spec: Dict, path: str = VECTOR_STORE_PATH):
+    """Record which embedding backend and index type built the index, and the index files' digest.
+    
+    The digest is hashed once here, with the (mtime, size) signature it
+    belongs to, so loading workers don't re-read the index files to get it.
+    """
+    _write_json_atomic(os.path.join(path, INDEX_META_FILE), {
+        "embedding_backend": get_embedding_backend_id(),
+        "dimension": vector_store.index.d,
+        "index_spec": format_index_spec(index_spec),
+        "index_signature": _index_signature(path),
+        "index_digest": _hash_index_files(path)
+    })
+
+def load_index_meta(path: str = VECTOR_STORE_PATH) -> Dict:
+    meta_path = os.path.join(path, INDEX_META_FILE)
+    if not os.path.exists(meta_path):
+        return {"embedding_backend": LEGACY_EMBEDDING_BACKEND, "index_spec": "flat"}
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def get_configured_index_spec() -> Dict:
+    return parse_index_spec(VECTOR_INDEX_SPEC)
+
+def get_built_index_spec(path: str = VECTOR_STORE_PATH) -> Dict:
+    """Index spec the saved index was built with"""
+    return parse_index_spec(load_index_meta(path).get("index_spec", "flat"))
+
+def check_embedding_backend(path: str = VECTOR_STORE_PATH):
+    """Reject an index built by a different embedding backend than the configured one"""
+    built_with = load_index_meta(path).get("embedding_backend")
+    configured = get_embedding_backend_id()
+    if built_with != configured:
+        raise ValueError(
+            f"Vector store at {path} was built with '{built_with}' embeddings but "
+            f"EMBEDDING_BACKEND is '{configured}'. Rebuild it with: python -m app.vector_store"
+        )
+
+def save_index_artifacts(vector_store, index_spec: Dict, path: str = VECTOR_STORE_PATH):
+    """Write the derived lookup structures that accompany a saved index"""
+    save_index_meta(vector_store, index_spec, path)
+    write_columnar_docstore(vector_store, path, _index_digest(path))
+    save_recipe_catalog(build_recipe_catalog(vector_store), path)
+    
+    manifest = build_manifest(vector_store)
+    if manifest is not None:
+        save_manifest(manifest, path)
+
+def _index_signature(path: str = VECTOR_STORE_PATH):
+    """Cheap fingerprint (mtime, size) of the saved index files, or None if missing"""
+    signature = []
+    for name in INDEX_FILES:
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            return None
+        stat = os.stat(file_path)
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+_digest_cache = {}
+
+def _hash_index_files(path: str = VECTOR_STORE_PATH) -> str:
+    digest = hashlib.sha1()
+    for name in INDEX_FILES:
+        with open(os.path.join(path, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _index_digest(path: str = VECTOR_STORE_PATH):
+    """Content hash of the saved index files.
+    
+    Taken from index_meta.json while the files still match the signature
+    recorded there; hashed from the files only for indexes saved without it.
+    Memoized while the files' mtime/size are unchanged.
+    """
+    signature = _index_signature(path)
+    cached = _digest_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    meta = load_index_meta(path)
+    recorded = meta.get("index_signature")
+    if meta.get("index_digest") and recorded is not None and \
+            [list(entry) for entry in recorded] == [list(entry) for entry in signature]:
+        digest = meta["index_digest"]
+    else:
+        digest = _hash_index_files(path)
+    
+    _digest_cache[path] = (signature, digest)
+    return digest
+
+def _reload_locked():
+    """Load the vector store into the shared handle. Caller must hold _store_lock"""
     vector_store = load_vector_store()
+    _store_state["vector_store"] = vector_store
+    _store_state["artifacts"] = {}
+    _store_state["signature"] = _index_signature()
+    _store_state["digest"] = _index_digest() if _store_state["signature"] else None
+    return vector_store
+
+def get_vector_store():
+    """Return the shared vector store, loading it lazily and reloading when the files on disk change"""
+    vector_store = _store_state["vector_store"]
+    if vector_store is not None and _index_signature() == _store_state["signature"]:
+        return vector_store
+    
+    with _store_lock:
+        signature = _index_signature()
+        if _store_state["vector_store"] is None:
+            return _reload_locked()
+        
+        if signature != _store_state["signature"]:
+            # A touched-but-identical file only refreshes the signature
+            if signature is not None and _index_digest() == _store_state["digest"]:
+                _store_state["signature"] = signature
+            else:
+                _reload_locked()
+        
+        return _store_state["vector_store"]
+
+def get_index_version():
+    """Content digest of the index being served; changes whenever the index is rebuilt"""
+    get_vector_store()
+    return _store_state["digest"]
+
+def reload_vector_store():
+    """Force the shared vector store to be reloaded from disk"""
+    with _store_lock:
+        return _reload_locked()
+
+def _get_artifact(name: str, builder):
+    """Return a structure derived from the shared store, rebuilt whenever the store reloads"""
+    vector_store = get_vector_store()
+    artifacts = _store_state["artifacts"]
+    if name not in artifacts:
+        with _store_lock:
+            if name not in artifacts:
+                artifacts[name] = builder(vector_store)
+    return artifacts[name]
+
+def get_type_selectors() -> Dict:
+    """Per-recipe_type ID selectors for the shared vector store"""
+    return _get_artifact("type_selectors", build_type_selectors)
+
+def _load_or_build_catalog(vector_store):
+    catalog = load_recipe_catalog(index_digest=_store_state["digest"])
+    if catalog is None:
+        catalog = build_recipe_catalog(vector_store)
+    return catalog
+
+def get_recipe_catalog() -> Dict:
+    """Recipe catalog for the shared vector store"""
+    return _get_artifact("catalog", _load_or_build_catalog)
+
+def list_recipes_by_type(recipe_type: str) -> List[Dict]:
+    """All catalog entries of a recipe_type, in index order, without a vector search"""
+    catalog = get_recipe_catalog()
+    return [catalog["recipes"][i] for i in catalog["by_type"].get(recipe_type, [])]
+
+def list_recipe_types() -> List[str]:
+    """Recipe types present in the catalog"""
+    return sorted(get_recipe_catalog()["by_type"])
+
+def get_name_index() -> RecipeNameIndex:
+    """Exact/fuzzy recipe-name index over the catalog"""
+    return _get_artifact("name_index", lambda _: RecipeNameIndex(get_recipe_catalog()["by_name"]))
+
+def find_recipe_by_name(recipe_name: str):
+    """Resolve a recipe name to its catalog entry without an embedding call, or None"""
+    match = get_name_index().lookup(recipe_name)
+    if match is None:
+        return None
+    
+    catalog = get_recipe_catalog()
+    recipe = catalog["recipes"][catalog["by_name"][match["recipe_name"]][0]]
+    return {**recipe, "match": match["match"], "match_score": match["score"]}
+
+def get_chunk_text(doc_id: str) -> str:
+    """Text of a single indexed chunk"""
+    return get_vector_store().docstore.search(doc_id).page_content
+
+def get_recipe_for_chunk(doc_id: str):
+    """Catalog entry of the recipe a chunk belongs to, or None"""
+    catalog = get_recipe_catalog()
+    location = catalog["chunks"].get(doc_id)
+    if location is None:
+        return None
+    return catalog["recipes"][location[0]]
+
+def get_full_recipe_text(recipe: Dict) -> str:
+    """Whole recipe text, stitched back together from its de-overlapped chunks"""
+    return merge_overlapping_chunks([get_chunk_text(doc_id) for doc_id in recipe["chunk_ids"]])
+
+def _search_by_type(vector_store, query: str, k: int, recipe_type: str):
+    """Exact top-k search of the main index restricted to one recipe_type"""
+    entry = get_type_selectors().get(recipe_type)
+    if entry is None or entry[2] == 0:
+        return []
+    selector, _, count = entry
+    
+    embedding = np.array([vector_store.embeddings.embed_query(query)], dtype=np.float32)
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(embedding)
+    
+    k = min(k, count)
+    index, params = exact_filtered_search(vector_store.index, selector)
+    scores, positions = index.search(embedding, k, params=params)
+    results = []
+    for score, position in zip(scores[0], positions[0]):
+        if position == -1:
+            continue
+        doc_id = vector_store.index_to_docstore_id[int(position)]
+        results.append((vector_store.docstore.search(doc_id), float(score)))
+    
+    return results
+
+def _format_result(doc, score: float, retrieval: str = "vector") -> Dict:
+    return {
+        "content": doc.page_content,
+        "chunk_id": doc.id,
+        "metadata": doc.metadata,
+        "similarity_score": float(score),
+        "recipe_name": doc.metadata.get("recipe_name", "Unknown Recipe"),
+        "servings": doc.metadata.get("servings"),
+        "recipe_type": doc.metadata.get("recipe_type", "general"),
+        "retrieval": retrieval
+    }
+
+def search_recipes(query: str, k: int = 1, recipe_type: str = None):
+    """Vector search on the shared store; top-k matches, restricted to one recipe_type when given"""
+    vector_store = get_vector_store()
     
     if recipe_type:
-        results = vector_store.similarity_search_with_score(
-            query, 
-            k=k,
-            filter={"recipe_type": recipe_type}
-        )
+        results = _search_by_type(vector_store, query, k, recipe_type)
     else:
         results = vector_store.similarity_search_with_score(query, k=k)
     
-    formatted_results = []
-    for doc, score in results:
-        formatted_results.append({
-            "content": doc.page_content,
-            "metadata": doc.metadata,
-            "similarity_score": float(score),
-            "recipe_name": doc.metadata.get("recipe_name", "Unknown Recipe"),
-            "servings": doc.metadata.get("servings"),
-            "recipe_type": doc.metadata.get("recipe_type", "general")
-        })
+    return [_format_result(doc, score) for doc, score in results]
+
+def _build_bm25_index(vector_store) -> BM25Index:
+    doc_ids = []
+    texts = []
+    for position in sorted(vector_store.index_to_docstore_id):
+        doc_id = vector_store.index_to_docstore_id[position]
+        doc = vector_store.docstore.search(doc_id)
+        doc_ids.append(doc_id)
+        texts.append(f"{doc.metadata.get('recipe_name', '')}\n{doc.page_content}")
+    return BM25Index(doc_ids, texts)
+
+def get_bm25_index() -> BM25Index:
+    """Keyword index over the same chunks as the vector store"""
+    return _get_artifact("bm25", _build_bm25_index)
+
+def hybrid_search_recipes(query: str, k: int = 3):
+    """Keyword (BM25) + vector search merged by reciprocal-rank fusion.
+    
+    When the keywords alone give a strong hit the vector search, and with it
+    the query embedding call, is skipped. Scores are fused ranks (higher is
+    better), not FAISS distances.
+    """
+    vector_store = get_vector_store()
+    bm25 = get_bm25_index()
+    fetch_k = max(k * 4, 20)
     
-    return formatted_results
+    lexical = bm25.search(query, k=fetch_k)
+    if bm25.is_strong_match(query, lexical):
+        return [
+            _format_result(vector_store.docstore.search(doc_id), score, retrieval="lexical")
+            for doc_id, score, _ in lexical[:k]
+        ]
+    
+    semantic = vector_store.similarity_search_with_score(query, k=fetch_k)
+    docs = {doc.id: doc for doc, _ in semantic}
+    fused = reciprocal_rank_fusion(
+        [[doc_id for doc_id, _, _ in lexical], [doc.id for doc, _ in semantic]],
+        k=RRF_K
+    )
+    
+    results = []
+    for doc_id, score in fused[:k]:
+        doc = docs.get(doc_id) or vector_store.docstore.search(doc_id)
+        results.append(_format_result(doc, score, retrieval="hybrid"))
+    
+    return results
 
 def format_search_results_for_chat(results: List[dict]):
     """Format search results for chat response - returns ONE complete recipe"""
@@ -370,6 +988,12 @@ def format_search_results_for_chat(results: List[dict]):
 #     print("✅ Vector store testing complete!")
 #     print("=" * 50)
 
+def get_embedding_cache_stats():
+    """Hit/miss counters for the query-embedding cache"""
+    if not isinstance(_embeddings, CachedEmbeddings):
+        return {"initialized": False, "backend": _embedding_backend_id}
+    return {"initialized": True, "backend": _embedding_backend_id, **_embeddings.stats()}
+
 def get_vector_store_info():
     """Get information about the current vector store"""
     if not os.path.exists(VECTOR_STORE_PATH):
@@ -378,7 +1002,7 @@ def get_vector_store_info():
             "message": "No vector store found. Run setup to create one."
         }
     
-    vector_store = load_vector_store()
+    get_vector_store()
     
     return {
         "exists": True,
@@ -390,11 +1014,16 @@ if __name__ == "__main__":
     #print("🔧 Enhanced Vector Store Setup & Testing")
     #print("=" * 50)
     
-    choice = input("\nWhat would you like to do?\n1. Create new vector store\n4. Debug recipe extraction\n\nChoice (1/4): ")
+    choice = input("\nWhat would you like to do?\n1. Create new vector store\n2. Update vector store (only changed recipes)\n4. Debug recipe extraction\n5. Benchmark search latency\n\nChoice (1/2/4/5): ")
     
     if choice == "1":
         create_vector_store()
+    elif choice == "2":
+        print(update_vector_store())
     elif choice == "4":
         debug_recipe_extraction()
+    elif choice == "5":
+        from app.benchmarks import print_search_latency_benchmark
+        print_search_latency_benchmark()
     else:
         print("Invalid choice. Exiting.")
\ No newline at end of file
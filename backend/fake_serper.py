@@ -0,0 +1,107 @@
+"""
+Local stand-in for google.serper.dev, for trying the web tools without an API key.
+
+    python fake_serper.py --port 8765 --delay 0.5
+    SERPER_BASE_URL=http://127.0.0.1:8765 SERPER_API_KEY=fake python -m uvicorn app.main:app
+
+Answers /search, /news, /videos and /images with canned results built from
+the query. GET /_requests returns how many POSTs each endpoint received, so
+cache hits and coalesced requests can be checked from outside; POST /_reset
+zeroes the counters.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VIDEO_IDS = ["2dNMtB7dT24", "dQw4w9WgXcQ", "M7lc1UVf-VE"]
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def fake_results(endpoint: str, query: str, num: int = 10):
+    if endpoint == "videos":
+        return {"videos": [
+            {"title": f"{query} #{i + 1}", "link": f"https://www.youtube.com/watch?v={video_id}"}
+            for i, video_id in enumerate(VIDEO_IDS[:num])
+        ]}
+    if endpoint == "images":
+        return {"images": [
+            {"title": f"{query} #{i + 1}", "imageUrl": f"https://images.example.com/{i + 1}.jpg"}
+            for i in range(min(num, 3))
+        ]}
+    if endpoint == "news":
+        return {"news": [{"title": query, "snippet": f"News about {query}."}]}
+    return {"organic": [
+        {"title": f"{query} ({i + 1})", "snippet": f"Result {i + 1} for {query}."}
+        for i in range(min(num, 3))
+    ]}
+
+
+class FakeSerperHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    fail_status = 500
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/_requests":
+            return self._send_json(404, {"message": "Not found"})
+        with _counts_lock:
+            self._send_json(200, dict(_counts))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        endpoint = self.path.strip("/")
+
+        if endpoint == "_reset":
+            with _counts_lock:
+                _counts.clear()
+            return self._send_json(200, {})
+
+        with _counts_lock:
+            _counts[endpoint] += 1
+
+        if not self.headers.get("X-API-KEY"):
+            return self._send_json(403, {"message": "Unauthorized."})
+        if endpoint not in ("search", "news", "videos", "images"):
+            return self._send_json(404, {"message": "Not found"})
+
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._send_json(self.fail_status, {"message": "Fake failure"})
+
+        self._send_json(200, fake_results(endpoint, payload.get("q", ""), int(payload.get("num") or 10)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Serper API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--fail-status", type=int, default=500, help="status code of those errors (e.g. 503 is retried)")
+    args = parser.parse_args()
+
+    FakeSerperHandler.delay = args.delay
+    FakeSerperHandler.fail_rate = args.fail_rate
+    FakeSerperHandler.fail_status = args.fail_status
+
+    print(f"Fake Serper listening on http://{args.host}:{args.port}")
+    ThreadingHTTPServer((args.host, args.port), FakeSerperHandler).serve_forever()
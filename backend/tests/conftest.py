@@ -0,0 +1,14 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Build indexes offline with the hashing backend, under a scratch directory.
+# Set before app.config is imported, since it reads these at import time.
+_scratch = tempfile.mkdtemp(prefix="sazonbot-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["EMBEDDING_BACKEND"] = "hashing"
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ["RECIPE_VECTORS_PATH"] = os.path.join(_scratch, "recipe_vectors")
+os.environ["EMBED_CHECKPOINT_DIR"] = os.path.join(_scratch, "embed_checkpoints")
+os.environ["VECTOR_INDEX_SPEC"] = "flat"
@@ -0,0 +1,41 @@
+"""Offline stand-ins for the OpenAI chat model used by the agent tests."""
+
+import json
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+
+class FakeToolModel(GenericFakeChatModel):
+    """Replays scripted AIMessages, including tool calls, through the streaming path"""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+            return
+        for word in message.content.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def script(*turns) -> FakeToolModel:
+    """A model answering each call with the next turn: a reply string, or a list of (tool, args) calls"""
+    messages = []
+    for turn in turns:
+        if isinstance(turn, list):
+            messages.append(AIMessage(content="", tool_calls=[
+                {"name": name, "args": args, "id": f"call_{i}_{name}"} for i, (name, args) in enumerate(turn)
+            ]))
+        else:
+            messages.append(AIMessage(content=turn))
+    return FakeToolModel(messages=iter(messages))
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app import agent as agent_module
+from fakes import script
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """RecipeAgent on a scripted model, a memory session store and a 2-exchange window"""
+    monkeypatch.setattr(agent_module, "RESPONSE_CACHE_SIZE", 0)
+    monkeypatch.setattr(agent_module, "SESSION_BACKEND", "memory://")
+    monkeypatch.setattr(agent_module, "HISTORY_WINDOW", 2)
+    monkeypatch.setattr(agent_module, "HISTORY_RECENT_MESSAGES", 2)
+    agents = []
+
+    def make(*turns):
+        model = script(*turns)
+        monkeypatch.setattr(agent_module, "ChatOpenAI", lambda **kwargs: model)
+        agents.append(agent_module.RecipeAgent())
+        return agents[-1]
+
+    yield make
+    for agent in agents:
+        agent.sessions.close()
+
+
+@pytest.fixture
+def blocked_summarizer(monkeypatch):
+    """asummarize that doesn't return until release is set"""
+    state = {"started": None, "release": None, "calls": 0}
+
+    async def summarize(llm, summary, messages, max_tokens):
+        state["calls"] += 1
+        state["started"].set()
+        await state["release"].wait()
+        return f"summary of {len(messages)} messages"
+
+    monkeypatch.setattr(agent_module, "asummarize", summarize)
+
+    def arm():
+        state["started"], state["release"] = asyncio.Event(), asyncio.Event()
+        return state
+
+    return arm
+
+
+def test_achat_replies_without_waiting_for_the_summary(make_agent, blocked_summarizer):
+    agent = make_agent("uno", "dos", "tres")
+
+    async def run():
+        state = blocked_summarizer()
+        await agent.achat("hola", "s")
+        reply = await asyncio.wait_for(agent.achat("otra pregunta", "s"), timeout=5)
+        assert reply["response"].strip() == "dos"
+
+        await asyncio.wait_for(state["started"].wait(), timeout=5)
+        assert agent.sessions.get_summary("s") is None
+
+        state["release"].set()
+        third = await asyncio.wait_for(agent.achat("y ahora?", "s"), timeout=5)
+        assert third["response"].strip() == "tres"
+        assert agent.sessions.get_summary("s") == "summary of 2 messages"
+        await agent._wait_for_summary("s")
+        # The third exchange filled the window again, so it started the second summary
+        assert state["calls"] == 2
+
+    asyncio.run(run())
+
+
+def test_astream_chat_sends_done_before_the_summary_finishes(make_agent, blocked_summarizer):
+    agent = make_agent("uno", "dos")
+
+    async def run():
+        state = blocked_summarizer()
+        await agent.achat("hola", "s")
+
+        async def stream():
+            return [event async for event in agent.astream_chat("otra pregunta", "s")]
+
+        events = await asyncio.wait_for(stream(), timeout=5)
+        assert events[-1]["type"] == "done"
+        assert not state["release"].is_set()
+
+        state["release"].set()
+        await agent._wait_for_summary("s")
+        assert agent.sessions.get_summary("s") == "summary of 2 messages"
+        assert len(agent.sessions.get("s")) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app.embeddings import HashingEmbeddings, create_embeddings
+
+
+def test_hashing_embeddings_have_configured_dimension_and_unit_norm():
+    embeddings = HashingEmbeddings(dim=128)
+    vectors = embeddings.embed_documents(["Pozole blanco", "Tinga de pollo con chipotle"])
+
+    assert [len(vector) for vector in vectors] == [128, 128]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    assert embeddings.model_name == "hashing:v1:128"
+
+
+def test_hashing_embeddings_are_deterministic_across_processes():
+    text = "Chiles en nogada con granada"
+    code = (
+        "from app.embeddings import HashingEmbeddings; "
+        f"print(HashingEmbeddings(dim=64).embed_query({text!r}))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert eval(output) == pytest.approx(HashingEmbeddings(dim=64).embed_query(text))
+
+
+def test_hashing_embeddings_ignore_accents_and_case():
+    embeddings = HashingEmbeddings(dim=256)
+    assert embeddings.embed_query("FAJITAS A LA VIZCAÍNA") == embeddings.embed_query("fajitas a la vizcaina")
+
+
+def test_hashing_embeddings_rank_shared_words_higher():
+    embeddings = HashingEmbeddings()
+    query = np.array(embeddings.embed_query("pozole"))
+    related, unrelated = np.array(embeddings.embed_documents(["Pozole blanco de las Benitez", "Arroz rojo"]))
+    assert query @ related > query @ unrelated
+
+
+def test_empty_text_embeds_to_zero_vector():
+    assert not any(HashingEmbeddings(dim=32).embed_query(""))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_embeddings("word2vec")
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain.agents import create_openai_tools_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import StructuredTool
+
+from app.executor import ParallelAgentExecutor
+from fakes import script
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("human", "{input}"),
+    MessagesPlaceholder(variable_name="agent_scratchpad"),
+])
+
+# Tool name -> seconds it takes; the first call is the slowest so finish order is the reverse of call order
+DELAYS = {"recipes": 0.3, "images": 0.2, "videos": 0.1}
+
+
+def slow_tools(barrier=None, fail=None):
+    """Fake tools that sleep for DELAYS[name], optionally meeting at a barrier or raising"""
+
+    def make(name):
+        def run(query: str) -> str:
+            if barrier is not None:
+                barrier.wait()
+            time.sleep(DELAYS[name])
+            if name == fail:
+                raise ValueError(f"{name} failed")
+            return f"{name}: {query}"
+
+        async def arun(query: str) -> str:
+            await asyncio.sleep(DELAYS[name])
+            if name == fail:
+                raise ValueError(f"{name} failed")
+            return f"{name}: {query}"
+
+        return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=f"Search {name}")
+
+    return [make(name) for name in DELAYS]
+
+
+def make_executor(tools, step_timeout=5):
+    calls = [(tool.name, {"query": "mole"}) for tool in tools]
+    agent = create_openai_tools_agent(llm=script(calls, "listo"), tools=tools, prompt=PROMPT)
+    return ParallelAgentExecutor(agent=agent, tools=tools, return_intermediate_steps=True, step_timeout=step_timeout)
+
+
+def observations(result):
+    return [(action.tool, observation) for action, observation in result["intermediate_steps"]]
+
+
+def test_tool_calls_of_a_step_run_concurrently():
+    # Sequential calls would never get all three threads to the barrier
+    tools = slow_tools(barrier=threading.Barrier(len(DELAYS), timeout=5))
+    start = time.perf_counter()
+    result = make_executor(tools).invoke({"input": "mole"})
+
+    assert time.perf_counter() - start < sum(DELAYS.values())
+    assert result["output"].strip() == "listo"
+
+
+def test_results_come_back_in_call_order():
+    result = make_executor(slow_tools()).invoke({"input": "mole"})
+    assert observations(result) == [(name, f"{name}: mole") for name in DELAYS]
+
+
+def test_async_results_come_back_in_call_order():
+    start = time.perf_counter()
+    result = asyncio.run(make_executor(slow_tools()).ainvoke({"input": "mole"}))
+
+    assert time.perf_counter() - start < sum(DELAYS.values())
+    assert observations(result) == [(name, f"{name}: mole") for name in DELAYS]
+
+
+def test_tool_errors_propagate():
+    with pytest.raises(ValueError, match="images failed"):
+        make_executor(slow_tools(fail="images")).invoke({"input": "mole"})
+    with pytest.raises(ValueError, match="images failed"):
+        asyncio.run(make_executor(slow_tools(fail="images")).ainvoke({"input": "mole"}))
+
+
+@pytest.mark.parametrize("run", [
+    lambda executor: executor.invoke({"input": "mole"}),
+    lambda executor: asyncio.run(executor.ainvoke({"input": "mole"})),
+], ids=["sync", "async"])
+def test_calls_past_the_step_deadline_are_skipped(run):
+    result = run(make_executor(slow_tools(), step_timeout=0.15))
+
+    assert observations(result)[2] == ("videos", "videos: mole")
+    for name, observation in observations(result)[:2]:
+        assert observation.startswith(f"{name} did not finish within 0.15s")
@@ -0,0 +1,234 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from app import http_client
+from app.http_client import CircuitBreaker, CircuitOpenError, RetryBudget
+
+URL = "http://upstream.test/search"
+
+
+class FakeClock:
+    """Stands in for the time module: monotonic() is settable and sleep() only records"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    return clock
+
+
+class FakeAdapter(BaseAdapter):
+    """requests transport that answers each call with the next scripted status code or exception"""
+
+    def __init__(self, *outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.request = request
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch, clock):
+    """Fresh breaker (3 failures, 30s reset) and budget for upstream.test; install(*outcomes) scripts the transport"""
+    breaker, budget = CircuitBreaker(3, 30), RetryBudget(0.2)
+    monkeypatch.setattr(http_client, "_upstreams", {"upstream.test": (breaker, budget)})
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(http_client, "HTTP_RETRY_BACKOFF", 0)
+
+    def install(*outcomes):
+        adapter = FakeAdapter(*outcomes)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        monkeypatch.setattr(http_client, "_session", session)
+        return adapter
+
+    return breaker, budget, install
+
+
+def test_breaker_goes_closed_open_half_open_closed(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow() and breaker.state == "half_open"
+    # Only one trial at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.stats() == {"state": "closed", "consecutive_failures": 0, "times_opened": 1, "rejected": 3}
+
+
+def test_failed_trial_reopens_for_a_full_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_released_trial_lets_the_next_call_try(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_success_resets_the_consecutive_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for outcome in ["fail", "fail", "ok", "fail", "fail"]:
+        breaker.record_failure() if outcome == "fail" else breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 2
+
+
+def test_retry_budget_allows_ratio_of_calls_beyond_its_reserve():
+    budget = RetryBudget(ratio=0.25, min_tokens=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+
+    for _ in range(4):
+        budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    assert budget.stats() == {"retries": 3, "budget_exhausted": 2, "tokens": 0.0}
+
+    for _ in range(1000):
+        budget.deposit()
+    assert budget.tokens == budget.max_tokens == 25
+
+
+def test_request_retries_unhealthy_statuses_then_succeeds(upstream, clock):
+    breaker, budget, install = upstream
+    adapter = install(503, 429, 200)
+
+    assert http_client.request("POST", URL).status_code == 200
+    assert adapter.calls == 3 and len(clock.sleeps) == 2
+    assert budget.retries == 2 and breaker.state == "closed" and breaker.failures == 0
+
+
+def test_request_stops_after_max_retries(upstream):
+    breaker, _, install = upstream
+    adapter = install(503, 503, 503, 200)
+
+    assert http_client.request("POST", URL).status_code == 503
+    assert adapter.calls == 3 and breaker.state == "open"
+
+
+@pytest.mark.parametrize("outcome, retried", [
+    (500, False),
+    (404, False),
+    (requests.ReadTimeout("read timeout"), False),
+    (requests.ConnectTimeout("connect timeout"), True),
+    (requests.ConnectionError("refused"), True),
+])
+def test_request_retries_only_cheap_failures(upstream, outcome, retried):
+    _, budget, install = upstream
+    adapter = install(outcome, 200)
+
+    if retried:
+        assert http_client.request("POST", URL).status_code == 200
+    elif isinstance(outcome, Exception):
+        with pytest.raises(type(outcome)):
+            http_client.request("POST", URL)
+    else:
+        assert http_client.request("POST", URL).status_code == outcome
+    assert adapter.calls == (2 if retried else 1)
+    assert budget.retries == (1 if retried else 0)
+
+
+def test_request_does_not_retry_once_the_budget_is_spent(upstream):
+    _, budget, install = upstream
+    budget.tokens = 0
+    adapter = install(503, 200)
+
+    # The call's own deposit (0.2 tokens) does not buy a retry
+    assert http_client.request("POST", URL).status_code == 503
+    assert adapter.calls == 1 and budget.exhausted == 1
+
+
+def test_request_fails_fast_while_open_and_recovers_after_a_trial(upstream, clock):
+    breaker, budget, install = upstream
+    budget.tokens = 0
+    adapter = install(503, 503, 503, 200)
+    for _ in range(3):
+        http_client.request("POST", URL)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        http_client.request("POST", URL)
+    assert adapter.calls == 3
+
+    clock.now += 30
+    assert http_client.request("POST", URL).status_code == 200
+    assert breaker.state == "closed" and adapter.calls == 4
+
+
+def test_arequest_retries_then_opens_the_breaker(upstream, monkeypatch):
+    breaker, budget, _ = upstream
+    statuses = [503, 200, 502, 502, 502]
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(statuses.pop(0), json={})
+
+    async def run():
+        monkeypatch.setattr(http_client, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            first = await http_client.arequest("POST", URL)
+            second = await http_client.arequest("POST", URL)
+            with pytest.raises(CircuitOpenError):
+                await http_client.arequest("POST", URL)
+            return first, second
+        finally:
+            await http_client.close_async_client()
+
+    first, second = asyncio.run(run())
+    assert first.status_code == 200 and second.status_code == 502
+    assert len(calls) == 5 and budget.retries == 3
+    assert breaker.state == "open"
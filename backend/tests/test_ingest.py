@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+
+from app import vector_store as vs
+from app.embeddings import HashingEmbeddings
+from app.ingest import embed_chunks
+from app.utils.recipe_parser import merge_overlapping_chunks
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self, fail_on_call=None):
+        super().__init__(dim=64)
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("embedding provider went away")
+        return super().embed_documents(texts)
+
+
+def _chunks(n):
+    return [Document(id=str(i), page_content=f"receta {i} con chile y frijoles") for i in range(n)]
+
+
+def test_embed_chunks_resumes_from_checkpoints(tmp_path):
+    chunks = _chunks(10)
+    failing = CountingEmbeddings(fail_on_call=3)
+    with pytest.raises(RuntimeError):
+        embed_chunks(chunks, failing, batch_size=2, max_workers=1, checkpoint_dir=str(tmp_path))
+
+    resumed = CountingEmbeddings()
+    vectors, stats = embed_chunks(chunks, resumed, batch_size=2, max_workers=1, checkpoint_dir=str(tmp_path))
+
+    # Only the batch that failed is embedded again; the pool finished and checkpointed the rest
+    assert stats["batches"] == 5
+    assert stats["resumed_batches"] == 4
+    assert stats["embedded_chunks"] == 2
+    assert resumed.calls == 1
+    expected = np.asarray(HashingEmbeddings(dim=64).embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    np.testing.assert_allclose(vectors, expected)
+
+
+def test_embed_chunks_keeps_chunk_order_across_workers():
+    chunks = _chunks(9)
+    vectors, stats = embed_chunks(chunks, HashingEmbeddings(dim=64), batch_size=2, max_workers=4, checkpoint_dir="")
+
+    assert vectors.shape == (9, 64)
+    assert stats["resumed_batches"] == 0
+    for chunk, vector in zip(chunks, vectors):
+        np.testing.assert_allclose(vector, HashingEmbeddings(dim=64).embed_query(chunk.page_content), rtol=1e-6)
+
+
+def test_merge_overlapping_chunks_removes_repeated_overlap():
+    text = "Ingredientes: 2 tazas de maíz pozolero, 1 kilo de maciza de puerco. Modo de preparación: cocer todo."
+    assert merge_overlapping_chunks([text[:60], text[40:]]) == text
+
+
+def test_merge_overlapping_chunks_joins_chunks_without_overlap():
+    assert merge_overlapping_chunks(["Primera parte.", "Segunda parte."]) == "Primera parte.\n\nSegunda parte."
+    assert merge_overlapping_chunks([]) == ""
+
+
+def _recipe(name, recipe_type, body):
+    return {
+        "text": f"Receta: {name} Porciones: 4 Ingredientes: {body} Modo de preparación Mezclar y cocer.",
+        "metadata": {"recipe_name": name, "recipe_type": recipe_type, "servings": 4, "page": 1},
+    }
+
+
+def test_update_vector_store_embeds_only_added_and_drops_removed(monkeypatch):
+    pozole = _recipe("POZOLE BLANCO", "soup", "maíz pozolero, maciza de puerco")
+    tinga = _recipe("TINGA DE POLLO", "chicken", "pechuga de pollo, chipotle")
+    arroz = _recipe("ARROZ ROJO", "rice", "arroz, jitomate")
+    recipes = [pozole, tinga, tinga]
+    monkeypatch.setattr(vs, "load_recipes_from_pdf", lambda *args: list(recipes))
+
+    vs.create_vector_store()
+    manifest = vs.load_manifest()
+    assert len(manifest) == 3
+
+    recipes[:] = [pozole, tinga, arroz]
+    result = vs.update_vector_store()
+
+    assert result["mode"] == "incremental"
+    assert (result["added"], result["removed"]) == (1, 1)
+    manifest = vs.load_manifest()
+    assert sorted(entry["recipe_name"] for entry in manifest.values()) == ["ARROZ ROJO", "POZOLE BLANCO", "TINGA DE POLLO"]
+
+    store = vs.load_vector_store(read_only=False)
+    indexed = set(store.index_to_docstore_id.values())
+    assert indexed == {doc_id for entry in manifest.values() for doc_id in entry["chunk_ids"]}
+    assert store.index.ntotal == len(indexed)
+
+    assert vs.update_vector_store() == {"mode": "incremental", "added": 0, "removed": 0}
+
+
+@pytest.mark.parametrize("index_spec", ["ivf:nlist=2,nprobe=2", "hnsw:M=16,efSearch=64", "flat:compression=sq8"])
+def test_update_vector_store_keeps_ids_aligned_on_non_flat_indexes(monkeypatch, index_spec):
+    recipes = [_recipe(f"RECETA {i}", "soup", f"ingrediente{i} maiz") for i in range(100)]
+    monkeypatch.setattr(vs, "VECTOR_INDEX_SPEC", index_spec)
+    monkeypatch.setattr(vs, "load_recipes_from_pdf", lambda *args: list(recipes))
+    vs.create_vector_store()
+
+    removed = recipes[40:50]
+    recipes[:] = recipes[:40] + recipes[50:] + [_recipe("RECETA NUEVA", "soup", "ingredientenuevo maiz")]
+    result = vs.update_vector_store()
+    assert (result["mode"], result["added"], result["removed"]) == ("incremental", 1, 10)
+
+    store = vs.load_vector_store(read_only=False)
+    assert store.index.ntotal == len(store.index_to_docstore_id) == len(recipes)
+
+    def top_name(query):
+        return store.similarity_search(query, k=1)[0].metadata["recipe_name"]
+
+    assert top_name("ingredientenuevo maiz") == "RECETA NUEVA"
+    assert top_name("ingrediente60 maiz") == "RECETA 60"
+    found = {doc.metadata["recipe_name"] for doc in store.similarity_search("ingrediente45 maiz", k=len(recipes))}
+    assert not found & {recipe["metadata"]["recipe_name"] for recipe in removed}
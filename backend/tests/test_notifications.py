@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import notifications
+from app.notifications import CLAIM_LEASE, MAX_MESSAGE_CHARS, UnknownQuestionQueue, format_digest
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(notifications, "time", clock)
+    # No jitter: a failed digest backs off exactly interval * 2 ** attempts
+    monkeypatch.setattr(notifications, "random", SimpleNamespace(uniform=lambda low, high: 1.0))
+    return clock
+
+
+@pytest.fixture
+def make_queue(tmp_path, monkeypatch, clock):
+    """Queues on one tmp SQLite file; each gets a stubbed _send_digest that records rows and returns queue.send_ok"""
+    queues = []
+
+    def make(**kwargs):
+        queue = UnknownQuestionQueue(str(tmp_path / "unknown.db"), interval=60, max_backoff=600,
+                                     dedupe_window=3600, **kwargs)
+        queue.send_ok = True
+        queue.digests = []
+
+        def send_digest(rows):
+            queue.digests.append([(question, times_asked) for _, question, times_asked, _ in rows])
+            return queue.send_ok
+
+        monkeypatch.setattr(queue, "_send_digest", send_digest)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+def test_repeats_are_deduplicated_and_counted(make_queue, clock):
+    queue = make_queue()
+    assert queue.enqueue("¿Qué es el epazote?")
+    assert not queue.enqueue("  que es el EPAZOTE ")
+    clock.now += 1
+    assert queue.enqueue("¿Cómo se hace el mole?")
+
+    assert queue.flush() == 2
+    assert queue.digests == [[("¿Qué es el epazote?", 2), ("¿Cómo se hace el mole?", 1)]]
+    assert queue.stats() == {**queue.stats(), "recorded": 2, "duplicates": 1, "pending": 0, "reported": 2}
+
+
+def test_reported_question_reopens_only_after_the_dedupe_window(make_queue, clock):
+    queue = make_queue()
+    queue.enqueue("¿Qué es el epazote?")
+    queue.flush()
+
+    clock.now += 3599
+    assert not queue.enqueue("¿Qué es el epazote?")
+    assert queue.flush() == 0 and len(queue.digests) == 1
+
+    clock.now += 2
+    assert queue.enqueue("¿Qué es el epazote?")
+    assert queue.flush() == 1
+    # The count keeps growing across reports
+    assert queue.digests[-1] == [("¿Qué es el epazote?", 3)]
+
+
+def test_failed_digest_stays_queued_with_exponential_backoff(make_queue, clock):
+    queue = make_queue()
+    queue.enqueue("¿Qué es el epazote?")
+    queue.send_ok = False
+
+    sent_at = []
+    while len(sent_at) < 6:
+        sends = len(queue.digests)
+        queue.flush()
+        if len(queue.digests) > sends:
+            sent_at.append(clock.now)
+        clock.now += 1
+
+    # Retried after 60, 120, 240, 480 and then max_backoff seconds
+    assert [b - a for a, b in zip(sent_at, sent_at[1:])] == [60, 120, 240, 480, 600]
+    clock.now += 600
+    queue.send_ok = True
+    assert queue.flush() == 1
+    assert queue.stats()["send_failures"] == 6 and queue.stats()["pending"] == 0
+
+
+def test_backoff_is_capped_at_max_backoff(make_queue):
+    queue = make_queue()
+    assert queue._backoff(3) == 480
+    assert queue._backoff(10) == 600
+
+
+def test_claimed_rows_are_leased_from_other_workers(make_queue, clock):
+    first, second = make_queue(), make_queue()
+    first.enqueue("¿Qué es el epazote?")
+    second.enqueue("¿Cómo se hace el mole?")
+
+    claimed = first._claim()
+    assert [row[1] for row in claimed] == ["¿Qué es el epazote?", "¿Cómo se hace el mole?"]
+    assert second._claim() == []
+
+    # The first worker died mid-send: once the lease lapses another worker picks the rows up
+    clock.now += CLAIM_LEASE
+    assert second.flush() == 2
+    assert first._claim() == []
+
+
+def test_digests_are_batched_to_fit_one_message(make_queue, clock):
+    queue = make_queue(batch_size=20)
+    questions = [f"{i:02d} " + "¿por qué? " * 30 for i in range(7)]
+    for question in questions:
+        queue.enqueue(question)
+        clock.now += 1
+
+    batches = []
+    while queue.flush():
+        batches.append(queue.digests[-1])
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [question for batch in batches for question, _ in batch] == [q.strip() for q in questions]
+    assert all(len(format_digest(batch)) <= MAX_MESSAGE_CHARS for batch in batches)
+
+
+def test_batch_size_limits_a_digest(make_queue, clock):
+    queue = make_queue(batch_size=2)
+    for i in range(3):
+        queue.enqueue(f"pregunta {i}")
+        clock.now += 1
+
+    assert queue.flush() == 2
+    assert queue.flush() == 1
+
+
+def test_oversized_question_is_sent_alone_and_truncated(tmp_path, monkeypatch, clock):
+    payloads = []
+    monkeypatch.setattr(notifications, "http_request",
+                        lambda method, url, data, timeout: payloads.append(data) or SimpleNamespace(status_code=200))
+    queue = UnknownQuestionQueue(str(tmp_path / "unknown.db"))
+    queue.enqueue("mole " * 400)
+    clock.now += 1
+    queue.enqueue("¿Qué es el epazote?")
+
+    assert queue.flush() == 1
+    assert len(payloads[0]["message"]) == MAX_MESSAGE_CHARS
+    assert payloads[0]["title"] == "SazónBot - 1 unanswered question"
+    assert queue.flush() == 1
+    queue.close()
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.embeddings import HashingEmbeddings
+from app.response_cache import ResponseCache, cache_key, detect_language
+from app.utils.name_index import RecipeNameIndex
+
+NAMES = ["MOLE DE OLLA ROJO", "MOLE DE OLLA VERDE", "POZOLE BLANCO DE LAS BENITEZ", "TINGA DE POLLO"]
+
+# Below the hashing-embedding similarity of "receta de mole verde" and "receta de mole rojo" (~0.67),
+# so only the recipe-word guard keeps them apart
+THRESHOLD = 0.6
+
+embeddings = HashingEmbeddings()
+
+
+def make_cache(recipe_words=RecipeNameIndex(NAMES).name_words):
+    return ResponseCache(embed_query=embeddings.embed_query, index_version=lambda: "v1",
+                         threshold=THRESHOLD, recipe_words=recipe_words)
+
+
+def similarity(a, b):
+    return float(np.dot(embeddings.embed_query(a), embeddings.embed_query(b)))
+
+
+def test_name_words_keep_only_words_of_recipe_names():
+    index = RecipeNameIndex(NAMES)
+    assert index.name_words("¿Cómo hago MOLE verde, por favor?") == {"mole", "verde"}
+    assert index.name_words("receta de mole de olla rojo") == {"mole", "olla", "rojo"}
+    assert index.name_words("what can I cook tonight") == frozenset()
+
+
+def test_different_recipe_is_a_miss_even_when_embeddings_are_close():
+    assert similarity("receta de mole verde", "receta de mole rojo") >= THRESHOLD
+
+    cache = make_cache()
+    cache.put("receta de mole verde", "Mole verde: ...")
+    assert cache.get("receta de mole rojo") is None
+    assert cache.get("Receta del mole verde, por favor") == "Mole verde: ..."
+    assert cache.stats()["semantic_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_without_the_guard_the_close_question_would_hit():
+    cache = make_cache(recipe_words=None)
+    cache.put("receta de mole verde", "Mole verde: ...")
+    assert cache.get("receta de mole rojo") == "Mole verde: ..."
+
+
+def test_failed_recipe_word_lookup_only_allows_exact_hits():
+    def broken(text):
+        raise RuntimeError("catalog unavailable")
+
+    cache = make_cache(recipe_words=broken)
+    cache.put("receta de mole verde", "Mole verde: ...")
+    assert cache.get("Receta de MOLE verde") == "Mole verde: ..."
+    assert cache.get("Receta del mole verde, por favor") is None
+
+
+def test_index_change_drops_entries():
+    version = {"digest": "v1"}
+    cache = ResponseCache(embed_query=embeddings.embed_query, index_version=lambda: version["digest"])
+    cache.put("receta de tinga", "Tinga: ...")
+    version["digest"] = "v2"
+    assert cache.get("receta de tinga") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.parametrize("question, language", [
+    ("¿Cómo hago pozole?", "es"),
+    ("receta de mole verde", "es"),
+    ("show me chicken recipes", "en"),
+])
+def test_detect_language(question, language):
+    assert detect_language(question) == language
+
+
+def test_cache_key_ignores_case_accents_and_punctuation():
+    assert cache_key("¿Cómo hago POZOLE?") == cache_key("como hago pozole")
@@ -0,0 +1,166 @@
+import faiss
+import numpy as np
+import pytest
+
+from app.index_spec import build_faiss_index, exact_filtered_search, factory_string, format_index_spec, parse_index_spec
+from app.utils.bm25 import BM25Index, reciprocal_rank_fusion
+from app.utils.name_index import RecipeNameIndex
+
+
+@pytest.mark.parametrize("spec", [
+    "flat",
+    "flat:compression=sq8",
+    "hnsw:M=16,efConstruction=40,efSearch=32",
+    "ivf:nlist=32,nprobe=4,compression=pq16",
+])
+def test_index_spec_round_trips(spec):
+    parsed = parse_index_spec(spec)
+    assert parse_index_spec(format_index_spec(parsed)) == parsed
+
+
+def test_index_spec_fills_defaults_and_normalizes():
+    assert parse_index_spec(None) == {"kind": "flat"}
+    assert parse_index_spec(" HNSW : efSearch=100 ") == {"kind": "hnsw", "M": 32, "efConstruction": 80, "efSearch": 100}
+    assert parse_index_spec("ivf:compression=SQ8")["compression"] == "sq8"
+
+
+@pytest.mark.parametrize("spec", ["annoy", "flat:compression=opq8", "ivf:nlist=lots"])
+def test_index_spec_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_index_spec(spec)
+
+
+def test_pq_falls_back_to_sq8_on_small_corpora():
+    spec = parse_index_spec("ivf:nlist=64,compression=pq16")
+    assert factory_string(spec, 500) == "IVF12,SQ8"
+    assert factory_string(spec, 20000) == "IVF64,PQ16x8"
+
+
+DOCS = {
+    "pozole": "Pozole blanco con maíz pozolero y maciza de puerco",
+    "tinga": "Tinga de pollo con chipotle y jitomate",
+    "nopales": "Nopales asados con epazote y queso fresco",
+    "arroz": "Arroz rojo con jitomate y caldo de pollo",
+}
+
+
+@pytest.fixture
+def bm25():
+    return BM25Index(list(DOCS), list(DOCS.values()))
+
+
+def test_bm25_matches_rare_words_literally(bm25):
+    results = bm25.search("epazote", k=3)
+    assert [doc_id for doc_id, _, _ in results] == ["nopales"]
+
+
+def test_bm25_ranks_and_ignores_stopwords_and_accents(bm25):
+    results = bm25.search("receta de pollo con JITOMATE", k=4)
+    assert {doc_id for doc_id, _, _ in results[:2]} == {"tinga", "arroz"}
+    assert all(matched == 2 for _, _, matched in results[:2])
+    assert bm25.search("maiz", k=1)[0][0] == "pozole"
+
+
+def test_bm25_strong_match_needs_every_term_in_the_top_hit(bm25):
+    assert bm25.is_strong_match("nopales epazote", bm25.search("nopales epazote"))
+    assert not bm25.is_strong_match("nopales pollo", bm25.search("nopales pollo"))
+    assert not bm25.is_strong_match("mole", bm25.search("mole"))
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a", "d"], ["b"]], k=60)
+    ids = [doc_id for doc_id, _ in fused]
+    assert ids[:2] == ["b", "a"]
+    assert set(ids) == {"a", "b", "c", "d"}
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61 + 1 / 61)
+    assert reciprocal_rank_fusion([]) == []
+
+
+NAMES = ["FAJITAS A LA VIZCAÍNA", "POZOLE BLANCO DE LAS BENITEZ", "SOPA DE PASTA (CODITO)", "TINGA DE POLLO"]
+
+
+def test_name_index_exact_match_ignores_accents_case_and_punctuation():
+    index = RecipeNameIndex(NAMES)
+    assert index.lookup("fajitas a la vizcaina") == {"recipe_name": "FAJITAS A LA VIZCAÍNA", "score": 1.0, "match": "exact"}
+    assert index.lookup("Sopa de pasta codito")["match"] == "exact"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("posole blanco", "POZOLE BLANCO DE LAS BENITEZ"),
+    ("receta de tinga de pollo", "TINGA DE POLLO"),
+    ("fajitas vizcaina", "FAJITAS A LA VIZCAÍNA"),
+])
+def test_name_index_fuzzy_match(query, expected):
+    result = RecipeNameIndex(NAMES).lookup(query)
+    assert result["match"] == "fuzzy"
+    assert result["recipe_name"] == expected
+    assert 0.75 <= result["score"] <= 1.0
+
+
+CATALOG_NAMES = [
+    "ARROZ ROJO", "CARNE CON NOPALES EN SALSA ROJA", "CARNE CON PAPAS EN SALSA VERDE", "MOLE DE OLLA ROJO",
+    "MOLE DE OLLA VERDE", "POLLO CON ELOTE Y CHAMPIÑONES", "POZOLE BLANCO DE LAS BENITEZ",
+    "SOPA DE FLOR DE CALABAZA", "SOPA DE PAPA CON ACELGA", "SOPA DE PAPA CON ELOTE", "TINGA DE POLLO",
+]
+
+
+@pytest.mark.parametrize("query", [
+    "pozole rojo",
+    "tamales de pollo",
+    "sopa de tortilla",
+    "carne asada",
+    "mole poblano",
+])
+def test_name_index_does_not_match_on_shared_words(query):
+    assert RecipeNameIndex(CATALOG_NAMES).lookup(query) is None
+
+
+@pytest.mark.parametrize("query", ["pollo", "sopa de papa", "mole de olla"])
+def test_name_index_leaves_ambiguous_queries_to_vector_search(query):
+    assert RecipeNameIndex(CATALOG_NAMES).lookup(query) is None
+
+
+def test_name_index_matches_a_unique_partial_name():
+    assert RecipeNameIndex(CATALOG_NAMES).lookup("mole verde")["recipe_name"] == "MOLE DE OLLA VERDE"
+    assert RecipeNameIndex(CATALOG_NAMES).lookup("the pozole recipe")["recipe_name"] == "POZOLE BLANCO DE LAS BENITEZ"
+
+
+def test_full_recipe_tool_labels_fuzzy_matches(monkeypatch):
+    from app import tools
+
+    recipe = {"recipe_name": "MOLE DE OLLA VERDE", "recipe_type": "soup", "servings": 6, "chunk_ids": ["a-0"]}
+    monkeypatch.setattr(tools, "get_full_recipe_text", lambda recipe: "Ingredientes: ...")
+    monkeypatch.setattr(tools, "find_recipe_by_name", lambda name: {**recipe, "match": "fuzzy", "match_score": 1.0})
+    assert "closest match: MOLE DE OLLA VERDE" in tools.get_full_recipe_function("mole verde")
+
+    monkeypatch.setattr(tools, "find_recipe_by_name", lambda name: {**recipe, "match": "exact", "match_score": 1.0})
+    assert tools.get_full_recipe_function("Mole de olla verde").startswith("**MOLE DE OLLA VERDE**")
+
+
+def test_name_index_rejects_weak_matches():
+    index = RecipeNameIndex(NAMES)
+    assert index.lookup("enchiladas suizas") is None
+    assert index.lookup("receta") is None
+    assert len(RecipeNameIndex(NAMES + ["tinga de pollo"])) == len(NAMES)
+
+
+@pytest.mark.parametrize("spec", ["hnsw:M=32,efSearch=64", "ivf:nlist=64,nprobe=4", "flat"])
+@pytest.mark.parametrize("fraction", [0.05, 0.002])
+def test_filtered_search_is_exact_on_small_partitions(spec, fraction):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5000, 32)).astype(np.float32)
+    queries = rng.standard_normal((20, 32)).astype(np.float32)
+    mask = np.zeros(len(vectors), dtype=np.bool_)
+    mask[rng.choice(len(vectors), int(len(vectors) * fraction), replace=False)] = True
+
+    index = build_faiss_index(parse_index_spec(spec), vectors)
+    bitmap = np.packbits(mask, bitorder="little")
+    target, params = exact_filtered_search(index, faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+    k = 10
+    _, positions = target.search(queries, k, params=params)
+
+    partition = np.flatnonzero(mask)
+    distances = ((queries[:, None, :] - vectors[partition][None, :, :]) ** 2).sum(-1)
+    expected = partition[np.argsort(distances, axis=1)[:, :k]]
+    for found, truth in zip(positions, expected):
+        assert list(found[:len(truth)]) == list(truth)
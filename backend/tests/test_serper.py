@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import fake_serper
+from app import http_client, serper
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """fake_serper on a free port, with serper.SERPER_URL pointed at it and an empty cache"""
+    monkeypatch.setattr(fake_serper.FakeSerperHandler, "delay", 0.3)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake_serper.FakeSerperHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(serper, "SERPER_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(serper, "SERPER_API_KEY", "fake")
+    serper.clear_cache()
+    fake_serper._counts.clear()
+    yield fake_serper.FakeSerperHandler
+    server.shutdown()
+    server.server_close()
+    serper.clear_cache()
+
+
+def upstream_calls(endpoint="search"):
+    return fake_serper._counts[endpoint]
+
+
+def test_concurrent_identical_queries_make_one_upstream_call(fake_server):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: serper.search("search", "Historia del Pozole", ttl=60, num=3), range(8)))
+
+    assert upstream_calls() == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]["organic"][0]["title"] == "Historia del Pozole (1)"
+
+
+def test_concurrent_identical_async_queries_make_one_upstream_call(fake_server):
+    async def run():
+        try:
+            return await asyncio.gather(*(serper.asearch("videos", "tamales", ttl=60, num=3) for _ in range(8)))
+        finally:
+            await http_client.close_async_client()
+
+    results = asyncio.run(run())
+    assert upstream_calls("videos") == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+
+def test_cache_key_ignores_case_and_spacing_but_not_params(fake_server):
+    fake_server.delay = 0
+    serper.search("search", "Qué es el epazote", ttl=60, num=3)
+    serper.search("search", "  qué es el  EPAZOTE ", ttl=60, num=3)
+    assert upstream_calls() == 1
+
+    serper.search("search", "qué es el epazote", ttl=60, num=5)
+    assert upstream_calls() == 2
+
+
+def test_entries_expire_after_their_ttl(fake_server, monkeypatch):
+    fake_server.delay = 0
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(serper, "time", SimpleNamespace(monotonic=lambda: clock.now))
+
+    serper.search("images", "nopales", ttl=30, num=3)
+    clock.now += 29
+    serper.search("images", "nopales", ttl=30, num=3)
+    assert upstream_calls("images") == 1
+
+    clock.now += 2
+    serper.search("images", "nopales", ttl=30, num=3)
+    assert upstream_calls("images") == 2
+
+
+def test_without_ttl_nothing_is_cached(fake_server):
+    fake_server.delay = 0
+    serper.search("search", "mole", num=3)
+    serper.search("search", "mole", num=3)
+    assert upstream_calls() == 2
+
+
+def test_errors_are_not_cached(fake_server, monkeypatch):
+    fake_server.delay = 0
+    monkeypatch.setattr(fake_server, "fail_rate", 1.0)
+    monkeypatch.setattr(fake_server, "fail_status", 400)
+    with pytest.raises(serper.SerperError):
+        serper.search("search", "chiles en nogada", ttl=60, num=3)
+
+    monkeypatch.setattr(fake_server, "fail_rate", 0.0)
+    assert serper.search("search", "chiles en nogada", ttl=60, num=3)["organic"]
+    assert upstream_calls() == 2
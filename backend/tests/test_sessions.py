@@ -0,0 +1,315 @@
+import io
+import socket
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app import sessions
+from app.sessions import RespClient, RespError, SessionStore, SQLiteSessionStore, create_session_store
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sessions, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_messages=4, idle_ttl=60)
+    yield store
+    store.close()
+
+
+def turn(i):
+    return [HumanMessage(content=f"pregunta {i}"), AIMessage(content=f"respuesta {i}")]
+
+
+def test_sqlite_store_round_trips_messages(sqlite_store):
+    messages = [SystemMessage(content="Resumen"), HumanMessage(content="¿Cómo hago mole?"), AIMessage(content="Así: 🌶️")]
+    sqlite_store.append("s1", messages)
+
+    restored = sqlite_store.get("s1")
+    assert [(m.type, m.content) for m in restored] == [(m.type, m.content) for m in messages]
+    assert sqlite_store.get("unknown") == []
+    assert sqlite_store.stats()["hits"] == 1 and sqlite_store.stats()["misses"] == 1
+
+
+def test_sqlite_store_keeps_the_last_max_messages(sqlite_store):
+    for i in range(4):
+        sqlite_store.append("s1", turn(i))
+
+    assert [m.content for m in sqlite_store.get("s1")] == ["pregunta 2", "respuesta 2", "pregunta 3", "respuesta 3"]
+    sqlite_store.sweep()
+    assert sqlite_store.stats()["rows"] == 4
+
+
+def test_sqlite_store_summary_keeps_last_messages_and_clear_drops_both(sqlite_store):
+    sqlite_store.append("s1", turn(0) + turn(1))
+    sqlite_store.set_summary("s1", "Hablamos de mole", keep_last=2)
+
+    assert sqlite_store.get_summary("s1") == "Hablamos de mole"
+    assert [m.content for m in sqlite_store.get("s1")] == ["pregunta 1", "respuesta 1"]
+    assert sqlite_store.clear("s1") is True
+    assert sqlite_store.get_summary("s1") is None and sqlite_store.get("s1") == []
+    assert sqlite_store.clear("s1") is False
+
+
+def test_sqlite_store_uses_wal(sqlite_store):
+    with sqlite3.connect(sqlite_store.path) as db:
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_store_expires_idle_sessions(tmp_path, clock):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_messages=4, idle_ttl=60)
+    store.append("idle", turn(0))
+    store.append("swept", turn(0))
+    store.set_summary("swept", "Resumen", keep_last=2)
+    clock.now += 59
+    store.append("active", turn(1))
+    assert [m.content for m in store.get("idle")] == ["pregunta 0", "respuesta 0"]
+
+    clock.now += 2
+    assert store.get("idle") == []
+    assert store.sweep() == 1
+    assert store.get_summary("swept") is None
+    assert [m.content for m in store.get("active")] == ["pregunta 1", "respuesta 1"]
+    assert store.stats()["expired"] == 2
+    store.close()
+
+
+def test_sqlite_store_concurrent_writers(tmp_path):
+    """Two stores on one file stand in for two workers; every append lands and none fails on a lock"""
+    path = str(tmp_path / "sessions.db")
+    stores = [SQLiteSessionStore(path, max_messages=1000) for _ in range(2)]
+    errors = []
+
+    def write(store, worker):
+        try:
+            for i in range(50):
+                store.append("shared", [HumanMessage(content=f"{worker}-{i}")])
+                store.append(f"own-{worker}", turn(i))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(stores[i % 2], i)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    shared = [m.content for m in stores[0].get("shared")]
+    assert sorted(shared) == sorted(f"{worker}-{i}" for worker in range(4) for i in range(50))
+    for worker in range(4):
+        # Each writer's own messages stay in the order it wrote them
+        assert [c for c in shared if c.startswith(f"{worker}-")] == [f"{worker}-{i}" for i in range(50)]
+        assert len(stores[1].get(f"own-{worker}")) == 100
+    assert stores[1].stats()["rows"] == 200 + 400
+    for store in stores:
+        store.close()
+
+
+def test_create_session_store_parses_sqlite_urls(tmp_path):
+    store = create_session_store(f"sqlite:///{tmp_path}/nested/sessions.db", max_messages=6,
+                                 max_sessions=10, max_bytes=1024, idle_ttl=0)
+    assert isinstance(store, SQLiteSessionStore)
+    assert store.path == f"{tmp_path}/nested/sessions.db"
+    assert store.max_messages == 6 and store.idle_ttl is None
+    store.close()
+
+
+def test_resp_encodes_commands_as_bulk_string_arrays():
+    assert RespClient._encode(("RPUSH", "k", "ñ", b"\x00\r\n", 5)) == (
+        b"*5\r\n$5\r\nRPUSH\r\n$1\r\nk\r\n$2\r\n\xc3\xb1\r\n$3\r\n\x00\r\n\r\n$1\r\n5\r\n"
+    )
+
+
+def reader_client(data: bytes) -> RespClient:
+    client = RespClient()
+    client._reader = io.BytesIO(data)
+    return client
+
+
+def test_resp_decodes_every_reply_type():
+    client = reader_client(
+        b"+OK\r\n:42\r\n$5\r\nhola\n\r\n$-1\r\n*-1\r\n*0\r\n"
+        b"*3\r\n$1\r\na\r\n:1\r\n*1\r\n$0\r\n\r\n"
+    )
+    assert client._read_reply() == "OK"
+    assert client._read_reply() == 42
+    assert client._read_reply() == b"hola\n"
+    assert client._read_reply() is None
+    assert client._read_reply() is None
+    assert client._read_reply() == []
+    assert client._read_reply() == [b"a", 1, [b""]]
+
+
+def test_resp_error_reply_still_consumes_the_rest_of_the_pipeline():
+    client = reader_client(b"-WRONGTYPE bad key\r\n:3\r\n-ERR second\r\n+PONG\r\n")
+    with pytest.raises(RespError, match="WRONGTYPE"):
+        client._read_replies(3)
+    # The stream stays aligned for the next command
+    assert client._read_reply() == "PONG"
+
+
+def test_resp_closed_connection_and_garbage_raise():
+    with pytest.raises(ConnectionError):
+        reader_client(b"")._read_reply()
+    with pytest.raises(RespError, match="Unexpected reply"):
+        reader_client(b"?what\r\n")._read_reply()
+
+
+class FakeSocket:
+    """Socket stand-in: records what was written and replays canned replies"""
+
+    def __init__(self, replies=b"", stale=False, send_error=None, read_error=None):
+        self.sent = []
+        self.replies = replies
+        self.stale = stale
+        self.send_error = send_error
+        self.read_error = read_error
+        self.closed = False
+
+    def sendall(self, data):
+        if self.send_error is not None:
+            raise self.send_error
+        self.sent.append(data)
+
+    def makefile(self, mode):
+        if self.read_error is not None:
+            return SimpleNamespace(readline=self._raise, read=self._raise)
+        return io.BytesIO(self.replies)
+
+    def _raise(self, *args):
+        raise self.read_error
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_connections(monkeypatch):
+    """Queue of FakeSockets handed out by socket.create_connection, in order"""
+    connections = []
+    opened = []
+
+    def create_connection(address, timeout=None):
+        opened.append(connections.pop(0))
+        return opened[-1]
+
+    monkeypatch.setattr(sessions, "socket", SimpleNamespace(create_connection=create_connection))
+    monkeypatch.setattr(sessions, "select", SimpleNamespace(
+        select=lambda readable, writable, errors, timeout: ([s for s in readable if s.stale], [], [])
+    ))
+    return SimpleNamespace(queue=connections, opened=opened)
+
+
+PUSH = ("RPUSH", "k", "v")
+
+
+def test_pipeline_resends_when_an_idle_connection_went_stale(fake_connections):
+    first, second = FakeSocket(b":1\r\n"), FakeSocket(b":2\r\n")
+    fake_connections.queue.extend([first, second])
+    client = RespClient()
+    assert client.pipeline(PUSH) == [1]
+
+    first.stale = True
+    assert client.pipeline(PUSH) == [2]
+    assert len(first.sent) == 1 and first.closed
+    assert second.sent == [RespClient._encode(PUSH)]
+
+
+def test_pipeline_resends_when_the_send_is_refused(fake_connections):
+    first, second = FakeSocket(b":1\r\n"), FakeSocket(b":2\r\n")
+    fake_connections.queue.extend([first, second])
+    client = RespClient()
+    client.pipeline(PUSH)
+
+    first.send_error = BrokenPipeError()
+    assert client.pipeline(PUSH) == [2]
+    assert len(second.sent) == 1
+
+
+@pytest.mark.parametrize("read_error", [socket.timeout("timed out"), None])
+def test_pipeline_never_resends_after_the_write(fake_connections, read_error):
+    # None: the server closed the connection after the write, before replying
+    first = FakeSocket(b"", read_error=read_error)
+    fake_connections.queue.extend([first, FakeSocket(b":1\r\n")])
+    client = RespClient()
+
+    with pytest.raises(OSError):
+        client.pipeline(PUSH)
+    assert first.sent == [RespClient._encode(PUSH)]
+    assert len(fake_connections.opened) == 1
+    assert client._sock is None and first.closed
+
+
+def test_pipeline_does_not_retry_a_failed_send_on_a_new_connection(fake_connections):
+    fake_connections.queue.extend([FakeSocket(send_error=ConnectionRefusedError()), FakeSocket(b":1\r\n")])
+    client = RespClient()
+
+    with pytest.raises(ConnectionError):
+        client.pipeline(PUSH)
+    assert len(fake_connections.opened) == 1
+    assert client.pipeline(PUSH) == [1]
+
+
+def test_memory_store_evicts_least_recently_used_beyond_capacity():
+    store = SessionStore(max_sessions=3, idle_ttl=None)
+    for session_id in ["a", "b", "c"]:
+        store.append(session_id, turn(0))
+
+    # Reading "a" makes "b" the least recently used
+    store.get("a")
+    store.append("d", turn(0))
+    assert "b" not in store and len(store) == 3
+
+    # Appending counts as use too
+    store.append("c", turn(1))
+    store.append("e", turn(0))
+    assert "a" not in store
+    assert list(store._sessions) == ["d", "c", "e"]
+    assert store.stats()["evicted_lru"] == 2
+
+
+def test_memory_store_byte_budget_evicts_oldest_but_keeps_the_newest():
+    one_turn = sum(sessions.message_size(m) for m in turn(0))
+    store = SessionStore(max_sessions=100, max_bytes=2 * one_turn, idle_ttl=None)
+    for session_id in ["a", "b", "c"]:
+        store.append(session_id, turn(0))
+    assert list(store._sessions) == ["b", "c"]
+    assert store.stats()["bytes"] == 2 * one_turn
+
+    store.append("huge", [HumanMessage(content="x" * 10 * one_turn)])
+    assert list(store._sessions) == ["huge"]
+    assert store.stats()["evicted_bytes"] == 3
+
+
+def test_memory_store_keeps_the_last_max_messages_and_expires_idle_sessions(clock):
+    store = SessionStore(max_messages=2, idle_ttl=60)
+    store.append("a", turn(0) + turn(1))
+    assert [m.content for m in store.get("a")] == ["pregunta 1", "respuesta 1"]
+
+    store.append("b", turn(0))
+    clock.now += 61
+    store.append("c", turn(0))
+    assert store.get("a") == []
+    assert store.sweep() == 1
+    assert list(store._sessions) == ["c"]
+    assert store.stats()["expired"] == 2
@@ -31,6 +31,83 @@ export const agentChat = async (message: string) => {
   return response.json();
 };
 
+export type AgentChatResult = {
+  response: string;
+  tools_used: string[];
+  session_id: string;
+};
+
+export type AgentStreamHandlers = {
+  onToken?: (token: string) => void;
+  onToolStart?: (tool: string) => void;
+  onToolEnd?: (tool: string) => void;
+};
+
+// Streams /agent-chat/stream (Server-Sent Events) and resolves with the final "done" payload
+export const agentChatStream = async (message: string, handlers: AgentStreamHandlers = {}) => {
+  const sessionId = getSessionId();
+  
+  const response = await fetch(`${API_URL}/agent-chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ 
+      message,
+      session_id: sessionId 
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to chat with agent');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result: AgentChatResult | null = null;
+
+  // Dispatches one SSE event; returns the final payload on "done"
+  const handleEvent = (raw: string): AgentChatResult | null => {
+    const dataLine = raw.split('\n').find(line => line.startsWith('data:'));
+    if (!dataLine) return null;
+    
+    const event = JSON.parse(dataLine.slice(5).trim());
+    switch (event.type) {
+      case 'token':
+        handlers.onToken?.(event.content);
+        break;
+      case 'tool_start':
+        handlers.onToolStart?.(event.tool);
+        break;
+      case 'tool_end':
+        handlers.onToolEnd?.(event.tool);
+        break;
+      case 'done':
+        return event;
+      case 'error':
+        throw new Error(event.error || 'Failed to chat with agent');
+    }
+    return null;
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      result = handleEvent(buffer.slice(0, boundary)) ?? result;
+      buffer = buffer.slice(boundary + 2);
+    }
+  }
+
+  if (!result) {
+    throw new Error('Stream ended before the agent finished');
+  }
+
+  return result;
+};
+
 export const clearAgentMemory = async () => {
   const sessionId = getSessionId();
   
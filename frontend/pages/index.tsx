@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import Head from 'next/head';
 import Image from 'next/image';
-import { agentChat, clearAgentMemory } from '@/lib/api';
+import { agentChatStream, clearAgentMemory } from '@/lib/api';
 import { translations, detectLanguage, Language } from '@/lib/translations';
 
 const LOADING_MESSAGES = {
@@ -23,6 +23,7 @@ export default function Home() {
   const [query, setQuery] = useState('');
   const [messages, setMessages] = useState<Array<{ role: 'user' | 'assistant'; content: string }>>([]);
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [language, setLanguage] = useState<Language>('en');
   const [sidebarOpen, setSidebarOpen] = useState(false);
@@ -67,9 +68,35 @@ export default function Home() {
     setMessages(prev => [...prev, { role: 'user', content: userMessage }]);
     setLoading(true);
 
+    let started = false;
+    const setAssistantContent = (update: (content: string) => string) => {
+      setMessages(prev => {
+        const next = [...prev];
+        const last = next[next.length - 1];
+        next[next.length - 1] = { ...last, content: update(last.content) };
+        return next;
+      });
+    };
+
     try {
-      const response = await agentChat(userMessage);
-      setMessages(prev => [...prev, { role: 'assistant', content: response.response }]);
+      const response = await agentChatStream(userMessage, {
+        onToken: (token) => {
+          if (!started) {
+            started = true;
+            setStreaming(true);
+            setMessages(prev => [...prev, { role: 'assistant', content: token }]);
+          } else {
+            setAssistantContent(content => content + token);
+          }
+        },
+      });
+      
+      // The final answer replaces whatever was streamed (e.g. text from intermediate steps)
+      if (started) {
+        setAssistantContent(() => response.response);
+      } else {
+        setMessages(prev => [...prev, { role: 'assistant', content: response.response }]);
+      }
     } catch (err) {
       console.error('Error chatting with agent:', err);
       setError('Failed to connect to recipe service.');
@@ -79,6 +106,7 @@ export default function Home() {
       }]);
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   };
 
@@ -341,7 +369,7 @@ export default function Home() {
                     </div>
                   </div>
                 ))}
-                {loading && (
+                {loading && !streaming && (
                   <div className="flex justify-start animate-fadeIn">
                     <div className="bg-cornsilk rounded-2xl px-3 py-3 sm:px-6 sm:py-5 border-2 border-fulvous">
                       <div className="flex items-center space-x-2">